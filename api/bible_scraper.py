@@ -2,43 +2,82 @@
 """
 Erweiterte Bible-Scraper für Ketiv
 Unterstützt Einzelverse, Versbereiche und verschiedene Quellen
+
+AsyncBibleScraper ist die asyncio-Variante zum Einbetten in asynchrone Dienste
+(Verbindungs-Pool, Parsing im Thread-Pool, scrape_many() liefert Ergebnisse sobald fertig);
+die Methoden von BibleScraper laufen darüber.
 """
 
-import requests
 from bs4 import BeautifulSoup
+import asyncio
 import json
+import os
 import sys
 import re
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+from bibleserver_links import BIGS_BOOK_SLUGS, BIGS_BASE_URL, BIBLESERVER_BASE_URL
+from scraper_io import emit, pop_flag, pop_option
+from profiling import ScrapeProfile
+import capabilities
+import cross_references
+import scheduler
+import singleflight
+import verse_store
+from upstream import (DeadlineExceeded, check_deadline, close_async_session, deadline,
+                      fetch_fragment_async, run_blocking, run_sync)
+from verse_cache import VerseCache, api_payload, get_cache, strip_metadata
+from verse_formats import with_formats
+
+# Container mit dem Bibeltext; nur dieser Ausschnitt wird geladen und geparst
+BIBLESERVER_CONTAINER = ('article', 'chapter')
+BIGS_CONTAINER = ('div', 'bibelText')
+
+BIBLESERVER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'de,en-US;q=0.7,en;q=0.3',
+}
+
+BIGS_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+}
+
+# Gleichzeitige Lookups in AsyncBibleScraper.scrape_many() und Threads für das Parsing
+ASYNC_CONCURRENCY = int(os.environ.get('SCRAPER_ASYNC_CONCURRENCY', '200'))
+PARSE_THREADS = int(os.environ.get('SCRAPER_PARSE_THREADS', str(os.cpu_count() or 2)))
+
+# Referenz als Text ("Johannes 3,16") oder bereits geparst (parse_reference())
+Reference = Union[str, Dict]
 
 class BibleScraper:
-    def __init__(self):
-        self.book_mappings = {
-            # Altes Testament
-            'Genesis': 'Gen', '1. Mose': 'Gen', 'Exodus': 'Ex', '2. Mose': 'Ex',
-            'Levitikus': 'Lev', '3. Mose': 'Lev', 'Numeri': 'Num', '4. Mose': 'Num',
-            'Deuteronomium': 'Dtn', '5. Mose': 'Dtn', 'Josua': 'Jos', 'Richter': 'Ri',
-            'Rut': 'Rut', '1. Samuel': '1-Sam', '2. Samuel': '2-Sam',
-            '1. Könige': '1-Koen', '2. Könige': '2-Koen', '1. Chronik': '1-Chr', '2. Chronik': '2-Chr',
-            'Esra': 'Esr', 'Nehemia': 'Neh', 'Ester': 'Est', 'Hiob': 'Hiob', 'Job': 'Hiob',
-            'Psalm': 'Ps', 'Psalmen': 'Ps', 'Sprüche': 'Spr', 'Sprichwörter': 'Spr', 
-            'Prediger': 'Koh', 'Kohelet': 'Koh', 'Hoheslied': 'Hld', 'Hohelied': 'Hld',
-            'Jesaja': 'Jes', 'Jeremia': 'Jer', 'Klagelieder': 'Klgl',
-            'Hesekiel': 'Ez-Hes', 'Ezechiel': 'Ez-Hes', 'Daniel': 'Dan', 'Hosea': 'Hos',
-            'Joel': 'Joel', 'Amos': 'Am', 'Obadja': 'Ob', 'Jona': 'Jona', 'Micha': 'Mi',
-            'Nahum': 'Nah', 'Habakuk': 'Hab', 'Zefanja': 'Zef', 'Haggai': 'Hag',
-            'Sacharja': 'Sach', 'Maleachi': 'Mal',
-            
-            # Neues Testament
-            'Matthäus': 'Mt', 'Markus': 'Mk', 'Lukas': 'Lk', 'Johannes': 'Joh',
-            'Apostelgeschichte': 'Apg', 'Römer': 'Roem', '1. Korinther': '1-Kor',
-            '2. Korinther': '2-Kor', 'Galater': 'Gal', 'Epheser': 'Eph', 'Philipper': 'Phil',
-            'Kolosser': 'Kol', '1. Thessalonicher': '1-Thess', '2. Thessalonicher': '2-Thess',
-            '1. Timotheus': '1-Tim', '2. Timotheus': '2-Tim', 'Titus': 'Tit',
-            'Philemon': 'Phlm', 'Hebräer': 'Hebr', 'Jakobus': 'Jak', '1. Petrus': '1-Petr',
-            '2. Petrus': '2-Petr', '1. Johannes': '1-Joh', '2. Johannes': '2-Joh',
-            '3. Johannes': '3-Joh', 'Judas': 'Jud', 'Offenbarung': 'Offb-Apk'
-        }
+    def __init__(self, cache: Optional[VerseCache] = None):
+        self.book_mappings = BIGS_BOOK_SLUGS
+        # Gemeinsamer Verse-Cache mit der PHP-API (SCRAPER_VERSE_CACHE), None = keiner
+        self.cache = cache if cache is not None else get_cache()
+        self._aio: Optional['AsyncBibleScraper'] = None
+    
+    @property
+    def aio(self) -> 'AsyncBibleScraper':
+        """Asynchrone Sicht auf diesen Scraper (gleicher Cache)"""
+        if self._aio is None:
+            self._aio = AsyncBibleScraper(scraper=self)
+        return self._aio
+    
+    def scrape_reference(self, reference_str: str, translation: str, testament_override: str = None) -> Optional[Dict]:
+        """Bibelstelle über den Verse-Cache oder per Scraping laden; neue Ergebnisse landen im Cache"""
+        return run_sync(self.aio.scrape_reference(reference_str, translation, testament_override))
+    
+    def scrape_many(self, items: List[Tuple[str, str]], workers: int = 4) -> List[Optional[Dict]]:
+        """Viele (Referenz, Übersetzung) auf einmal: ein MGET, Scraping nur für Fehlende, ein Pipeline-Schreiben"""
+        async def collect():
+            results = [None] * len(items)
+            async for index, result in self.aio.scrape_many(items, concurrency=workers):
+                results[index] = result
+            return results
+        
+        return run_sync(collect(), concurrent=True)
     
     def parse_reference(self, reference: str) -> Optional[Dict]:
         """Parse Bibelstellen-Referenz mit Unterstützung für Klammern und Buchstaben-Suffixe"""
@@ -84,223 +123,204 @@ class BibleScraper:
     
     def scrape_bibleserver(self, reference: Dict, translation: str, testament_override: str = None) -> Optional[Dict]:
         """Scrape von ERF Bibleserver mit Unterstützung für Versbereiche"""
-        try:
-            book = reference['book']
-            chapter = reference['chapter']
-            start_verse = reference['start_verse']
-            end_verse = reference['end_verse']
-            
-            # URL formatieren
-            ref_str = f"{book} {chapter},{start_verse}"
-            if end_verse > start_verse:
-                ref_str += f"-{end_verse}"
-            
-            # Umlaute und Leerzeichen für URL bereinigen
-            ref_clean = ref_str.replace(' ', '').replace('ä', 'ae').replace('ö', 'oe').replace('ü', 'ue')
-            ref_clean = ref_clean.replace('Ä', 'Ae').replace('Ö', 'Oe').replace('Ü', 'Ue').replace('ß', 'ss')
-            
-            url = f"https://www.bibleserver.com/{translation}/{ref_clean}"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                'Accept-Language': 'de,en-US;q=0.7,en;q=0.3',
-            }
-            
-            response = requests.get(url, headers=headers, timeout=10)
-            if response.status_code != 200:
-                return None
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Sammle alle gewünschten Verse
-            verse_texts = []
-            verses_data = []
-            
-            # Bei ganzen Kapiteln: Sammle alle verfügbaren Verse
-            is_whole_chapter = reference.get('whole_chapter', False)
-            
-            if is_whole_chapter:
-                # Finde alle Verse im Kapitel dynamisch
-                all_verse_elements = soup.find_all('span', class_='verse-number')
-                verse_numbers = []
-                for elem in all_verse_elements:
-                    try:
-                        verse_num = int(elem.get_text().strip())
-                        verse_numbers.append(verse_num)
-                    except (ValueError, AttributeError):
-                        continue
-                
-                if verse_numbers:
-                    start_verse = min(verse_numbers)
-                    end_verse = max(verse_numbers)
-            
-            for verse_num in range(start_verse, end_verse + 1):
-                verse_element = self._find_verse_element(soup, verse_num)
-                
-                # Bei ganzen Kapiteln: Stoppe wenn keine weiteren Verse gefunden werden
-                if is_whole_chapter and verse_element is None and verse_num > start_verse:
-                    break
-                
-                if verse_element:
-                    verse_content = verse_element.find('span', class_='verse-content')
-                    if verse_content:
-                        verse_text_elem = verse_content.find('span', class_='verse-content--hover')
-                        if verse_text_elem:
-                            # Entferne Fußnoten und Referenzen
-                            for unwanted in verse_text_elem.find_all(['sup', 'span'], class_=['footnote', 'verse-references']):
-                                unwanted.decompose()
-                            
-                            verse_text = verse_text_elem.get_text().strip()
-                            if verse_text:
-                                # Klammer-Entfernung
-                                verse_text = self._clean_text(verse_text)
-                                
-                                # Markiere optionale Verse (nur für Verse-Array, nicht im Text)
-                                is_optional = verse_num in reference.get('optional_verses', [])
-                                
-                                # Prüfe auf Suffixe (a, b, etc.)
-                                suffixes = reference.get('suffixes', {})
-                                suffix = suffixes.get(str(verse_num)) or suffixes.get(verse_num)
-                                
-                                # Bei Suffixen: Text am ersten Satzende abschneiden
-                                if suffix:
-                                    verse_text = self._apply_suffix_to_text(verse_text, suffix)
-                                
-                                verse_data = {
-                                    'number': verse_num,
-                                    'text': verse_text,
-                                    'optional': is_optional
-                                }
-                                
-                                if suffix:
-                                    verse_data['suffix'] = suffix
-                                
-                                verse_texts.append(verse_text)
-                                verses_data.append(verse_data)
-            
-            if verse_texts:
-                combined_text = ' '.join(verse_texts)
-                
-                return {
-                    'reference': reference['original'],
-                    'text': combined_text,
-                    'translation': {
-                        'code': translation,
-                        'name': self._get_translation_name(translation),
-                        'language': self._get_translation_language(translation)
-                    },
-                    'source': 'ERF Bibleserver',
-                    'url': url,
-                    'testament': testament_override or self._get_testament(reference['book']),
-                    'verses': verses_data if len(verses_data) > 1 else None
-                }
-            
-            return None
-            
-        except Exception as e:
-            return None
+        return run_sync(self.aio.scrape_bibleserver(reference, translation, testament_override))
     
     def scrape_bigs(self, reference: Dict, testament_override: str = None) -> Optional[Dict]:
         """Scrape von BIGS mit Unterstützung für Versbereiche"""
-        try:
-            book = reference['book']
-            chapter = reference['chapter']
-            start_verse = reference['start_verse']
-            end_verse = reference['end_verse']
-            
-            # Buchkürzel für BIGS
-            book_abbrev = self.book_mappings.get(book, book)
-            
-            # URL für BIGS - bei Versbereichen den Startvers verwenden
-            url = f"https://www.bibel-in-gerechter-sprache.de/die-bibel/bigs-online/?{book_abbrev}/{chapter}/{start_verse}/"
-            if end_verse > start_verse:
-                url = f"https://www.bibel-in-gerechter-sprache.de/die-bibel/bigs-online/?{book_abbrev}/{chapter}/{start_verse}-{end_verse}/"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            }
-            
-            response = requests.get(url, headers=headers, timeout=10)
-            if response.status_code != 200:
-                return None
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
+        return run_sync(self.aio.scrape_bigs(reference, testament_override))
+    
+    def fetch_reference(self, reference: Dict, translation: str) -> Tuple[int, str, str]:
+        """Lade die Seite zu einer Referenz und liefere (HTTP-Status, HTML-Ausschnitt, Ausgabe-URL)"""
+        return run_sync(self.aio.fetch_reference(reference, translation))
+    
+    def bibleserver_urls(self, reference: Dict, translation: str) -> Tuple[str, str]:
+        """(Vers-URL, Kapitel-URL) auf bibleserver.com"""
+        ref_str = f"{reference['book']} {reference['chapter']},{reference['start_verse']}"
+        if reference['end_verse'] > reference['start_verse']:
+            ref_str += f"-{reference['end_verse']}"
+        
+        # Umlaute und Leerzeichen für URL bereinigen
+        ref_clean = ref_str.replace(' ', '').replace('ä', 'ae').replace('ö', 'oe').replace('ü', 'ue')
+        ref_clean = ref_clean.replace('Ä', 'Ae').replace('Ö', 'Oe').replace('Ü', 'Ue').replace('ß', 'ss')
+        
+        # Geladen wird immer die Kapitelseite, damit parallele Anfragen
+        # auf dasselbe Kapitel sich einen einzigen Abruf teilen
+        chapter_clean = ref_clean.split(',')[0]
+        return (f"{BIBLESERVER_BASE_URL}/{translation}/{ref_clean}",
+                f"{BIBLESERVER_BASE_URL}/{translation}/{chapter_clean}")
+    
+    def bigs_url(self, reference: Dict) -> str:
+        """BIGS-URL; bei Versbereichen ab dem Startvers"""
+        book_abbrev = self.book_mappings.get(reference['book'], reference['book'])
+        url = f"{BIGS_BASE_URL}?{book_abbrev}/{reference['chapter']}/{reference['start_verse']}/"
+        if reference['end_verse'] > reference['start_verse']:
+            url = f"{BIGS_BASE_URL}?{book_abbrev}/{reference['chapter']}/{reference['start_verse']}-{reference['end_verse']}/"
+        return url
+    
+    def parse_bibleserver(self, html: str, reference: Dict, translation: str, url: str,
+                          testament_override: str = None) -> Optional[Dict]:
+        """Verse aus einer bibleserver.com-Kapitelseite lesen (ohne Netzwerkzugriff)"""
+        start_verse = reference['start_verse']
+        end_verse = reference['end_verse']
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Querverweise der ganzen Kapitelseite sichern, bevor sie unten aus dem Text entfernt werden
+        cross_references.record_page(soup, reference['book'], reference['chapter'], translation)
+        
+        # Sammle alle gewünschten Verse
+        verses_data = []
+        
+        # Bei ganzen Kapiteln: Sammle alle verfügbaren Verse
+        is_whole_chapter = reference.get('whole_chapter', False)
+        
+        if is_whole_chapter:
+            # Finde alle Verse im Kapitel dynamisch
+            all_verse_elements = soup.find_all('span', class_='verse-number')
+            verse_numbers = []
+            for elem in all_verse_elements:
+                try:
+                    verse_num = int(elem.get_text().strip())
+                    verse_numbers.append(verse_num)
+                except (ValueError, AttributeError):
+                    continue
             
-            # Suche nach dem Bibeltext
-            bibel_text_div = soup.find('div', class_='bibelText')
-            if not bibel_text_div:
-                return None
+            if verse_numbers:
+                start_verse = min(verse_numbers)
+                end_verse = max(verse_numbers)
+        
+        for verse_num in range(start_verse, end_verse + 1):
+            verse_element = self._find_verse_element(soup, verse_num)
             
-            # Sammle Verse
-            verse_texts = []
-            verses_data = []
+            # Bei ganzen Kapiteln: Stoppe wenn keine weiteren Verse gefunden werden
+            if is_whole_chapter and verse_element is None and verse_num > start_verse:
+                break
             
-            paragraphs = bibel_text_div.find_all('p')
-            for p in paragraphs:
-                vers_spans = p.find_all('span', class_='vers')
-                
-                for vers_span in vers_spans:
-                    verse_num_text = vers_span.get_text().strip()
-                    try:
-                        verse_num = int(verse_num_text)
-                    except ValueError:
-                        continue
-                    
-                    # Bei ganzen Kapiteln: Akzeptiere alle gefundenen Verse
-                    is_whole_chapter = reference.get('whole_chapter', False)
-                    
-                    if is_whole_chapter or (start_verse <= verse_num <= end_verse):
-                        # Extrahiere Text für diesen Vers
-                        verse_text = self._extract_bigs_verse_text(vers_span)
+            if verse_element:
+                verse_content = verse_element.find('span', class_='verse-content')
+                if verse_content:
+                    verse_text_elem = verse_content.find('span', class_='verse-content--hover')
+                    if verse_text_elem:
+                        # Entferne Fußnoten und Referenzen
+                        for unwanted in verse_text_elem.find_all(['sup', 'span'], class_=['footnote', 'verse-references']):
+                            unwanted.decompose()
+                        
+                        verse_text = verse_text_elem.get_text().strip()
                         if verse_text:
-                            verse_text = self._clean_text(verse_text)
-                            
-                            # Markiere optionale Verse (nur für Verse-Array, nicht im Text) 
-                            is_optional = verse_num in reference.get('optional_verses', [])
-                            
-                            # Prüfe auf Suffixe (a, b, etc.)
-                            suffixes = reference.get('suffixes', {})
-                            suffix = suffixes.get(str(verse_num)) or suffixes.get(verse_num)
-                            
-                            # Bei Suffixen: Text am ersten Satzende abschneiden
-                            if suffix:
-                                verse_text = self._apply_suffix_to_text(verse_text, suffix)
-                            
-                            verse_data = {
-                                'number': verse_num,
-                                'text': verse_text,
-                                'optional': is_optional
-                            }
-                            
-                            if suffix:
-                                verse_data['suffix'] = suffix
-                            
-                            verse_texts.append(verse_text)
-                            verses_data.append(verse_data)
+                            # Klammer-Entfernung
+                            verses_data.append(self._verse_data(reference, verse_num, self._clean_text(verse_text)))
+        
+        return self._result(reference, translation, url, testament_override, verses_data)
+    
+    def parse_bigs(self, html: str, reference: Dict, url: str, testament_override: str = None) -> Optional[Dict]:
+        """Verse aus einer BIGS-Seite lesen (ohne Netzwerkzugriff)"""
+        start_verse = reference['start_verse']
+        end_verse = reference['end_verse']
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Suche nach dem Bibeltext
+        bibel_text_div = soup.find('div', class_='bibelText')
+        if not bibel_text_div:
+            return None
+        
+        # Sammle Verse
+        verses_data = []
+        
+        paragraphs = bibel_text_div.find_all('p')
+        for p in paragraphs:
+            vers_spans = p.find_all('span', class_='vers')
             
-            if verse_texts:
-                combined_text = ' '.join(verse_texts)
+            for vers_span in vers_spans:
+                verse_num_text = vers_span.get_text().strip()
+                try:
+                    verse_num = int(verse_num_text)
+                except ValueError:
+                    continue
                 
-                return {
-                    'reference': reference['original'],
-                    'text': combined_text,
-                    'translation': {
-                        'code': 'BIGS',
-                        'name': 'Bibel in gerechter Sprache',
-                        'language': 'German'
-                    },
-                    'source': 'Bibel in gerechter Sprache',
-                    'url': url,
-                    'testament': testament_override or self._get_testament(reference['book']),
-                    'verses': verses_data if len(verses_data) > 1 else None
-                }
-            
+                # Bei ganzen Kapiteln: Akzeptiere alle gefundenen Verse
+                is_whole_chapter = reference.get('whole_chapter', False)
+                
+                if is_whole_chapter or (start_verse <= verse_num <= end_verse):
+                    # Extrahiere Text für diesen Vers
+                    verse_text = self._extract_bigs_verse_text(vers_span)
+                    if verse_text:
+                        verses_data.append(self._verse_data(reference, verse_num, self._clean_text(verse_text)))
+        
+        return self._result(reference, 'BIGS', url, testament_override, verses_data)
+    
+    def from_store(self, reference: Dict, translation: str, testament_override: str = None) -> Optional[Dict]:
+        """Stelle aus dem lokalen Versspeicher (verse_store.py) zusammensetzen, None wenn Verse fehlen"""
+        store = verse_store.get_store(translation)
+        if store is None:
             return None
-            
-        except Exception as e:
+        if reference.get('whole_chapter'):
+            verses = store.verses(reference['book'], reference['chapter'])
+            # Nur ein lückenloses Kapitel ab Vers 1 gilt als vollständig gecrawlt
+            if any(number != index for index, (number, _) in enumerate(verses, 1)):
+                return None
+        else:
+            start, end = reference['start_verse'], reference['end_verse']
+            verses = store.verses(reference['book'], reference['chapter'], start, end)
+            # Lücken (Vers fehlt im Crawl) lieber live laden als ein Teilergebnis liefern
+            if len(verses) != end - start + 1:
+                return None
+        if not verses:
+            return None
+        
+        if translation == 'BIGS':
+            url = self.bigs_url(reference)
+        else:
+            url = self.bibleserver_urls(reference, translation)[0]
+        verses_data = [self._verse_data(reference, number, text) for number, text in verses]
+        return self._result(reference, translation, url, testament_override, verses_data)
+    
+    def _verse_data(self, reference: Dict, verse_num: int, verse_text: str) -> Dict:
+        """Eintrag für das Verse-Array: optionale Verse markieren, Suffixe anwenden"""
+        # Markiere optionale Verse (nur für Verse-Array, nicht im Text)
+        is_optional = verse_num in reference.get('optional_verses', [])
+        
+        # Prüfe auf Suffixe (a, b, etc.)
+        suffixes = reference.get('suffixes', {})
+        suffix = suffixes.get(str(verse_num)) or suffixes.get(verse_num)
+        
+        # Bei Suffixen: Text am ersten Satzende abschneiden
+        if suffix:
+            verse_text = self._apply_suffix_to_text(verse_text, suffix)
+        
+        verse_data = {
+            'number': verse_num,
+            'text': verse_text,
+            'optional': is_optional
+        }
+        
+        if suffix:
+            verse_data['suffix'] = suffix
+        return verse_data
+    
+    def _result(self, reference: Dict, translation: str, url: str, testament_override: Optional[str],
+                verses_data: List[Dict]) -> Optional[Dict]:
+        if not verses_data:
             return None
+        
+        if translation == 'BIGS':
+            translation_info = {'code': 'BIGS', 'name': 'Bibel in gerechter Sprache', 'language': 'German'}
+            source = 'Bibel in gerechter Sprache'
+        else:
+            translation_info = {
+                'code': translation,
+                'name': self._get_translation_name(translation),
+                'language': self._get_translation_language(translation)
+            }
+            source = 'ERF Bibleserver'
+        
+        return {
+            'reference': reference['original'],
+            'text': ' '.join(verse['text'] for verse in verses_data),
+            'translation': translation_info,
+            'source': source,
+            'url': url,
+            'testament': testament_override or self._get_testament(reference['book']),
+            'verses': verses_data if len(verses_data) > 1 else None
+        }
     
     def _find_verse_element(self, soup, verse_num):
         """Finde Vers-Element in ERF Bibleserver HTML"""
@@ -442,13 +462,203 @@ class BibleScraper:
         ]
         return 'NT' if book in nt_books else 'AT'
 
+_parse_pool: Optional[ThreadPoolExecutor] = None
+
+def _get_parse_pool() -> ThreadPoolExecutor:
+    global _parse_pool
+    if _parse_pool is None:
+        _parse_pool = ThreadPoolExecutor(max_workers=PARSE_THREADS, thread_name_prefix='scraper-parse')
+    return _parse_pool
+
+class AsyncBibleScraper:
+    """
+    BibleScraper für asyncio-Dienste
+
+    Abrufe laufen über upstream.fetch_fragment_async() (mit aiohttp ein gemeinsamer
+    Verbindungs-Pool pro Event-Loop), Cache-Zugriffe und Parsing in Thread-Pools, damit
+    die Event-Loop frei bleibt. Referenzen dürfen als Text oder bereits geparst kommen.
+
+        async with AsyncBibleScraper() as scraper:
+            async for index, result in scraper.scrape_many(items):
+                ...
+    """
+    
+    def __init__(self, cache: Optional[VerseCache] = None, scraper: Optional[BibleScraper] = None):
+        # URL-Bau und Parser stammen vom synchronen Scraper
+        self.scraper = scraper if scraper is not None else BibleScraper(cache)
+        self.cache = self.scraper.cache
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+        return False
+    
+    async def close(self):
+        """Verbindungs-Pool der laufenden Event-Loop schließen"""
+        await close_async_session()
+    
+    def parse_reference(self, reference: Reference) -> Optional[Dict]:
+        return reference if isinstance(reference, dict) else self.scraper.parse_reference(reference)
+    
+    async def scrape_reference(self, reference: Reference, translation: str,
+                               testament_override: str = None) -> Optional[Dict]:
+        """Bibelstelle über den Verse-Cache oder per Scraping laden; neue Ergebnisse landen im Cache"""
+        reference_str = _reference_text(reference)
+        if self.cache is not None:
+            cached = await run_blocking(self.cache.get, reference_str, translation)
+            if cached is not None:
+                return with_formats(strip_metadata(cached))
+        
+        result = await self._scrape_uncached(reference, translation, testament_override)
+        if result and self.cache is not None:
+            await run_blocking(self.cache.set, reference_str, translation, api_payload(result))
+        return result
+    
+    async def scrape_many(self, items: Iterable[Tuple[Reference, str]],
+                          concurrency: int = ASYNC_CONCURRENCY) -> AsyncIterator[Tuple[int, Optional[Dict]]]:
+        """
+        Viele (Referenz, Übersetzung) nebenläufig; liefert (Index, Ergebnis) in Fertigstellungsreihenfolge
+
+        Ein MGET vorab (Treffer kommen sofort), höchstens concurrency Lookups gleichzeitig,
+        neue Ergebnisse am Ende in einem Pipeline-Schreiben. Nach Ablauf des Budgets bleiben
+        die übrigen Einträge None (Teilergebnis).
+        """
+        items = list(items)
+        keys = [(_reference_text(reference), translation) for reference, translation in items]
+        if self.cache is not None and keys:
+            cached = await run_blocking(self.cache.get_many, keys)
+        else:
+            cached = [None] * len(items)
+        
+        missing = []
+        for index, entry in enumerate(cached):
+            if entry is None:
+                missing.append(index)
+            else:
+                yield index, with_formats(strip_metadata(entry))
+        
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        async def scrape(index: int) -> Tuple[int, Optional[Dict]]:
+            async with semaphore:
+                try:
+                    return index, await self._scrape_uncached(*items[index])
+                except DeadlineExceeded:
+                    return index, None
+        
+        tasks = [asyncio.ensure_future(scrape(index)) for index in missing]
+        scraped = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, result = await next_done
+                if result:
+                    scraped.append((keys[index][0], keys[index][1], api_payload(result)))
+                yield index, result
+        finally:
+            # Bricht der Aufrufer ab, laufen keine verwaisten Lookups weiter
+            for task in tasks:
+                task.cancel()
+            if scraped and self.cache is not None:
+                await run_blocking(self.cache.set_many, scraped)
+    
+    async def _scrape_uncached(self, reference: Reference, translation: str,
+                               testament_override: str = None) -> Optional[Dict]:
+        parsed_ref = self.parse_reference(reference)
+        if not parsed_ref or capabilities.check(translation, parsed_ref):
+            return None
+        # Gecrawlte Übersetzungen brauchen keinen Upstream-Abruf
+        result = self.scraper.from_store(parsed_ref, translation, testament_override)
+        if result:
+            return await self._parse(with_formats, result)
+        if translation == 'BIGS':
+            result = await self.scrape_bigs(parsed_ref, testament_override)
+        else:
+            result = await self.scrape_bibleserver(parsed_ref, translation, testament_override)
+        # Ausgabeformate einmal hier rendern, sie werden mit den Versdaten gecacht
+        return await self._parse(with_formats, result) if result else None
+    
+    async def scrape_bibleserver(self, reference: Dict, translation: str,
+                                 testament_override: str = None) -> Optional[Dict]:
+        """Scrape von ERF Bibleserver mit Unterstützung für Versbereiche"""
+        try:
+            status, html, url = await self.fetch_reference(reference, translation)
+            if status != 200:
+                return None
+            
+            check_deadline()
+            return await self._parse(self.scraper.parse_bibleserver, html, reference, translation, url,
+                                     testament_override)
+            
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            return None
+    
+    async def scrape_bigs(self, reference: Dict, testament_override: str = None) -> Optional[Dict]:
+        """Scrape von BIGS mit Unterstützung für Versbereiche"""
+        try:
+            status, html, url = await self.fetch_reference(reference, 'BIGS')
+            if status != 200:
+                return None
+            
+            check_deadline()
+            return await self._parse(self.scraper.parse_bigs, html, reference, url, testament_override)
+            
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            return None
+    
+    async def fetch_reference(self, reference: Dict, translation: str) -> Tuple[int, str, str]:
+        """Lade die Seite zu einer Referenz und liefere (HTTP-Status, HTML-Ausschnitt, Ausgabe-URL)"""
+        book = reference['book']
+        chapter = reference['chapter']
+        
+        if translation == 'BIGS':
+            url = self.scraper.bigs_url(reference)
+            # BIGS-Seiten sind versadressiert, daher gehört der Versbereich mit zum Schlüssel
+            key = singleflight.flight_key('bigs', 'BIGS', book, chapter,
+                                          f"{reference['start_verse']}-{reference['end_verse']}")
+            status, html = await self._fetch_page(url, BIGS_HEADERS, key, BIGS_CONTAINER)
+            return status, html, url
+        
+        url, chapter_url = self.scraper.bibleserver_urls(reference, translation)
+        key = singleflight.flight_key('bibleserver', translation, book, chapter)
+        status, html = await self._fetch_page(chapter_url, BIBLESERVER_HEADERS, key, BIBLESERVER_CONTAINER)
+        return status, html, url
+    
+    async def _fetch_page(self, url: str, headers: Dict, key: str, container: Tuple[str, str]) -> Tuple[int, str]:
+        """Lade den Text-Container einer Upstream-Seite; gleichzeitige Abrufe teilen sich denselben"""
+        def load():
+            return fetch_fragment_async(url, container[0], container[1], headers=headers)
+        
+        return await singleflight.run_async(key, load)
+    
+    async def _parse(self, func, *args):
+        # BeautifulSoup ist CPU-gebunden und blockiert; eigener Pool, damit Abrufe nicht warten
+        return await run_blocking(func, *args, executor=_get_parse_pool())
+
+def _reference_text(reference: Reference) -> str:
+    return reference['original'] if isinstance(reference, dict) else reference
+
 def main():
+    # Ausgabeformat (--format json|msgpack), Standard ist JSON
+    output_format = pop_option(sys.argv, 'format', 'json')
+    # Profiling (--profile oder SCRAPER_PROFILE=1), siehe profiling.py
+    profile = pop_flag(sys.argv, 'profile')
+    # Gesamtbudget in Millisekunden für Abrufe und Parsing (--deadline-ms), Standard unbegrenzt
+    deadline_ms = pop_option(sys.argv, 'deadline-ms')
+    # Priorität der Upstream-Abrufe (--priority interactive|background), siehe scheduler.py
+    scheduler.set_priority(pop_option(sys.argv, 'priority', scheduler.current()))
+    
     if len(sys.argv) < 3:
         error_result = {
             "error": "Usage: python3 bible_scraper.py 'reference' 'translation' [testament]",
             "example": "python3 bible_scraper.py 'Johannes 3,16' 'LUT' 'NT'"
         }
-        print(json.dumps(error_result, ensure_ascii=False))
+        emit(error_result, output_format)
         return
     
     reference_str = sys.argv[1]
@@ -464,25 +674,34 @@ def main():
             "error": f"Invalid reference format: {reference_str}",
             "expected": "Book Chapter,Verse or Book Chapter,StartVerse-EndVerse"
         }
-        print(json.dumps(error_result, ensure_ascii=False))
+        emit(error_result, output_format)
+        return
+    
+    # Laut Fähigkeiten-Matrix unmögliche Kombinationen sofort ablehnen (capabilities.py)
+    unsupported = capabilities.check(translation, parsed_ref)
+    if unsupported:
+        emit({"error": unsupported, "unsupported": True}, output_format)
         return
     
     # Versuche Scraping
     result = None
     
-    if translation == 'BIGS':
-        result = scraper.scrape_bigs(parsed_ref, testament_override)
-    else:
-        result = scraper.scrape_bibleserver(parsed_ref, translation, testament_override)
+    try:
+        with ScrapeProfile(f"{reference_str} {translation}", profile), deadline(float(deadline_ms or 0)):
+            result = scraper.scrape_reference(reference_str, translation, testament_override)
+    except DeadlineExceeded:
+        emit({"error": f"Deadline of {deadline_ms} ms exceeded for {reference_str} in {translation}",
+              "timed_out": True}, output_format)
+        return
     
     if result:
-        print(json.dumps(result, ensure_ascii=False))
+        emit(result, output_format)
     else:
         error_result = {
             "error": f"Failed to scrape {reference_str} in {translation}",
             "reference": parsed_ref
         }
-        print(json.dumps(error_result, ensure_ascii=False))
+        emit(error_result, output_format)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
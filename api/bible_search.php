@@ -16,6 +16,7 @@ if ($_SERVER['REQUEST_METHOD'] === 'OPTIONS') {
 require_once 'auth.php';
 require_once 'database.php';
 require_once 'redis_cache.php';
+require_once 'scrape_queue.php';
 
 /**
  * Testament-Erkennung basierend auf Buchnamen
@@ -67,6 +68,11 @@ if (!validateApiKey()) {
 class BibleSearchAPI {
     private $db;
     private $cache;
+    private $queue;
+    private $queueWait = 3; // Sekunden, die ein Apache-Worker höchstens auf die Warteschlange wartet
+    private $asyncJobs = false; // ?async=1: nach $queueWait mit 202 und Job-ID antworten statt bis zur Deadline zu warten
+    private $deadlineMs = 18000; // Gesamtbudget aller Scraper-Aufrufe einer Anfrage (index.php wartet 20 s)
+    private $deadline;
     private $supportedTranslations = [
         // Deutsche Übersetzungen  
         'LUT', 'ELB', 'HFA', 'SLT', 'ZB', 'GNB', 'NGÜ', 'EU', 'NLB', 'VXB', 'NeÜ', 'BIGS',
@@ -80,12 +86,21 @@ class BibleSearchAPI {
     public function __construct() {
         $this->db = new LosungenDatabase();
         $this->cache = new RedisCache();
+        $this->queue = new ScrapeQueueClient();
+        if (getenv('SCRAPER_QUEUE_WAIT') !== false) {
+            $this->queueWait = (float)getenv('SCRAPER_QUEUE_WAIT');
+        }
+        if (getenv('SCRAPER_DEADLINE_MS') !== false) {
+            $this->deadlineMs = (int)getenv('SCRAPER_DEADLINE_MS');
+        }
+        $this->deadline = microtime(true) + $this->deadlineMs / 1000;
     }
     
     /**
      * Hauptsuchfunktion für Bibeltexte
      */
-    public function searchBibleText($reference, $translation = 'LUT', $format = 'json') {
+    public function searchBibleText($reference, $translation = 'LUT', $format = 'json', $async = false) {
+        $this->asyncJobs = (bool)$async;
         try {
             // Parameter validieren
             if (!$reference || !$translation) {
@@ -135,6 +150,7 @@ class BibleSearchAPI {
             if ($cachedResult) {
                 // Speichere auch im Redis Cache für nächstes Mal (nur bei erfolgreichen Ergebnissen)
                 if (!isset($cachedResult['error']) && !empty($cachedResult['text'])) {
+                    $cachedResult = $this->withFormats($cachedResult);
                     $this->cache->set($reference, $translation, $cachedResult);
                 }
                 // Formatierung auch für Cache-Ergebnisse anwenden
@@ -167,7 +183,8 @@ class BibleSearchAPI {
             }
             
             // Speichere nur erfolgreiche Ergebnisse im Redis Cache
-            if ($scrapedResult && !isset($scrapedResult['error']) && !empty($scrapedResult['text'])) {
+            if ($scrapedResult && !isset($scrapedResult['error']) && !empty($scrapedResult['text']) && empty($scrapedResult['timed_out'])) {
+                $scrapedResult = $this->withFormats($scrapedResult);
                 $this->cache->set($reference, $translation, $scrapedResult);
             }
             
@@ -188,11 +205,61 @@ class BibleSearchAPI {
             
             return $this->successResponse($formattedResult, 'live_scraping');
             
+        } catch (ScrapePendingException $e) {
+            return $this->pendingResponse($e->getJobId());
         } catch (Exception $e) {
             return $this->errorResponse('Search failed: ' . $e->getMessage());
         }
     }
     
+    /**
+     * Ergebnis eines Warteschlangen-Auftrags abfragen (Long-Poll)
+     */
+    public function pollJob($jobId, $format = 'json', $wait = 0) {
+        $job = $this->queue->result($jobId, min((float)$wait, 25));
+        
+        if (!$job) {
+            return $this->errorResponse('Scrape queue not available');
+        }
+        if (isset($job['error']) && ($job['status'] ?? '') !== 'failed') {
+            return $this->errorResponse($job['error']);
+        }
+        
+        switch ($job['status']) {
+            case 'done':
+                // Gleiche Nachbearbeitung wie bei der direkten Antwort: Referenz des Auftrags erneut parsen
+                $parsedRef = $this->parseReference($job['cache_reference'] ?? $job['reference']) ?: [];
+                $data = $this->normalizeSimpleResult($job['result'], $parsedRef);
+                return $this->successResponse($this->formatResult($data, $format), 'scrape_queue');
+            case 'failed':
+                return $this->errorResponse('Search failed: ' . $job['error']);
+            default:
+                return $this->pendingResponse($jobId);
+        }
+    }
+    
+    /**
+     * Verwandte Stellen aus dem Querverweis-Index (cross_references.py), ohne Upstream-Abruf
+     */
+    public function findRelated($reference, $limit = 50) {
+        $parsedRef = $this->parseReference($reference);
+        if (!$parsedRef) {
+            return $this->errorResponse('Invalid reference format: ' . $reference);
+        }
+        
+        $command = "/opt/venv/bin/python3 /var/www/html/cross_references.py related " .
+                  escapeshellarg($this->normalizeReferenceForScraper($parsedRef)) .
+                  " --limit " . max(1, (int)$limit) . " 2>&1";
+        
+        $data = json_decode(shell_exec($command) ?? '', true);
+        if (!$data || isset($data['error'])) {
+            return $this->errorResponse('Related lookup failed: ' . ($data['error'] ?? 'JSON decode failed'));
+        }
+        
+        $data['reference'] = $parsedRef['original'];
+        return $this->successResponse($data, 'cross_references');
+    }
+    
     /**
      * Parse Bibelstellen-Referenz mit DB-Abkürzungen
      */
@@ -473,11 +540,38 @@ class BibleSearchAPI {
         // Normalisiere Referenz für Python-Scraper (füge Leerzeichen hinzu falls nötig)
         $normalizedRef = $this->normalizeReferenceForScraper($parsedRef);
         
+        // Bevorzugt über die Scrape-Warteschlange: der Apache-Worker wartet nur kurz,
+        // langsame Upstreams stauen sich dort statt im Apache-Pool
+        if ($this->queue->isAvailable()) {
+            // Ohne deadline_ms: der Auftrag läuft weiter, auch wenn diese Anfrage vorher endet (async=1: 202, ?job= fragt nach)
+            $job = $this->queue->submit($normalizedRef, $translation, $parsedRef['testament'], $parsedRef['original'], $this->queueWait);
+            
+            // Ohne async=1 wartet die Anfrage wie beim synchronen Scraper bis zu ihrer Deadline
+            while (!$this->asyncJobs && $job && in_array($job['status'] ?? '', ['queued', 'running']) && $this->remainingMs() > 1000) {
+                $job = $this->queue->result($job['job_id'], min(10, $this->remainingMs() / 1000 - 0.5));
+            }
+            
+            if ($job && ($job['status'] ?? '') === 'done') {
+                return $this->normalizeSimpleResult($job['result'], $parsedRef);
+            }
+            if ($job && in_array($job['status'] ?? '', ['queued', 'running'])) {
+                if (!$this->asyncJobs) {
+                    throw new Exception('Scrape did not finish within ' . $this->deadlineMs . ' ms');
+                }
+                throw new ScrapePendingException($job['job_id']);
+            }
+            if ($job && isset($job['error'])) {
+                throw new Exception($job['error']);
+            }
+            // Dienst nicht erreichbar: synchron weiter
+        }
+        
         // Python-Scraper mit normalisierten Parametern aufrufen (inkl. Testament)
         $command = "/opt/venv/bin/python3 $pythonScript " . 
                   escapeshellarg($normalizedRef) . " " .
                   escapeshellarg($translation) . " " .
-                  escapeshellarg($parsedRef['testament']) . " 2>&1";
+                  escapeshellarg($parsedRef['testament']) .
+                  $this->deadlineArgument() . " 2>&1";
         
         $output = shell_exec($command);
         
@@ -492,6 +586,13 @@ class BibleSearchAPI {
             throw new Exception($error);
         }
         
+        return $this->normalizeSimpleResult($data, $parsedRef);
+    }
+    
+    /**
+     * Scraper-Ergebnis einer einfachen Referenz vervollständigen (Suffixe, optional/excluded)
+     */
+    private function normalizeSimpleResult($data, $parsedRef) {
         // Füge Suffixe zu den Versen hinzu, falls vorhanden
         if (isset($data['verses']) && is_array($data['verses'])) {
             foreach ($data['verses'] as &$verse) {
@@ -502,12 +603,15 @@ class BibleSearchAPI {
                     $verse['suffix'] = $suffixes[$verse['number']];
                     // Wende Suffix-Kürzung auf den Text an
                     $verse['text'] = $this->applySuffixToText($verse['text'], $verse['suffix']);
+                    // Vorgerenderte Formate passen nicht mehr zum gekürzten Vers
+                    unset($data['formats']);
                 }
                 
                 // Für normale Referenzen sind alle Verse optional=false und excluded=false
                 $verse['optional'] = false;
                 $verse['excluded'] = false;
             }
+            unset($verse);
         }
         
         return $data;
@@ -555,7 +659,8 @@ class BibleSearchAPI {
         $command = "/opt/venv/bin/python3 $pythonScript " . 
                   escapeshellarg($fullRef) . " " .
                   escapeshellarg($translation) . " " .
-                  escapeshellarg($parsedRef['testament']) . " 2>&1";
+                  escapeshellarg($parsedRef['testament']) .
+                  $this->deadlineArgument() . " 2>&1";
         
         $output = shell_exec($command);
         $data = json_decode($output, true);
@@ -643,9 +748,15 @@ class BibleSearchAPI {
 
         $scrapedVerses = [];
         $combinedText = '';
+        $timedOut = false;
 
         // Iteriere über den gesamten Bereich von min bis max
         for ($verseNum = $minVerse; $verseNum <= $maxVerse; $verseNum++) {
+            // Budget aufgebraucht: mit den bisherigen Versen als Teilergebnis aufhören
+            if ($this->remainingMs() <= 0) {
+                $timedOut = true;
+                break;
+            }
             
             // KORREKTUR: Verse-Klassifikation direkt aus den Parser-Daten
             $isOptional = in_array($verseNum, $parsedRef['optional_verses']);
@@ -663,10 +774,15 @@ class BibleSearchAPI {
             $command = "/opt/venv/bin/python3 /var/www/html/bible_scraper.py " .
                       escapeshellarg($simpleRef) . " " .
                       escapeshellarg($translation) . " " .
-                      escapeshellarg($parsedRef['testament']) . " 2>&1";
+                      escapeshellarg($parsedRef['testament']) .
+                      $this->deadlineArgument() . " 2>&1";
             
             $output = shell_exec($command);
             $data = json_decode($output, true);
+            if (!empty($data['timed_out'])) {
+                $timedOut = true;
+                break;
+            }
             
             $verseText = '';
             if ($data && !isset($data['error']) && isset($data['text'])) {
@@ -739,7 +855,7 @@ class BibleSearchAPI {
         
         usort($scrapedVerses, fn($a, $b) => $a['number'] <=> $b['number']);
 
-        return [
+        $result = [
             'reference' => $parsedRef['original'],
             'text' => trim($combinedText),
             'translation' => [
@@ -752,6 +868,12 @@ class BibleSearchAPI {
             'testament' => $parsedRef['testament'],
             'verses' => $scrapedVerses
         ];
+        
+        if ($timedOut) {
+            $result['timed_out'] = true;
+        }
+        
+        return $result;
     }
     
     /**
@@ -1049,34 +1171,92 @@ class BibleSearchAPI {
     
     /**
      * Formatiere Ergebnis je nach gewünschtem Format
+     * Vorgerenderte Formate ("formats", siehe verse_formats.py) werden direkt verwendet
      */
     private function formatResult($result, $format) {
-        switch ($format) {
-            case 'text':
-                return $result['text'];
-                
-            case 'markdown':
-                $text = $result['text'] ?? 'Kein Text verfügbar';
-                $ref = $result['reference'] ?? 'Unbekannte Referenz';
-                $translation = $result['translation']['name'] ?? $result['translation']['code'] ?? 'Unbekannte Übersetzung';
-                
-                return "## {$ref}\n\n> {$text}\n\n*— {$translation}*";
+        if ($format === 'json' || !in_array($format, ['text', 'markdown', 'html'])) {
+            unset($result['formats']);
+            return $result;
+        }
+        
+        if (isset($result['formats'][$format])) {
+            return $result['formats'][$format];
+        }
+        
+        return $this->renderFormats($result)[$format];
+    }
+    
+    /**
+     * Ergebnis mit vorgerenderten Formaten ergänzen, bevor es in den Cache geht
+     */
+    private function withFormats($result) {
+        if (!isset($result['formats']['text'], $result['formats']['html'], $result['formats']['markdown'])) {
+            $result['formats'] = $this->renderFormats($result);
+        }
+        return $result;
+    }
+    
+    /**
+     * Text-, HTML- und Markdown-Ausgabe erzeugen - muss verse_formats.py entsprechen
+     */
+    private function renderFormats($result) {
+        $ref = $result['reference'] ?? '';
+        $translation = $result['translation']['name'] ?? $result['translation']['code'] ?? 'Unbekannte Übersetzung';
+        $verses = $result['verses'] ?? [];
+        
+        if (!empty($verses)) {
+            $htmlParts = [];
+            $markdownParts = [];
+            foreach ($verses as $verse) {
+                $label = ($verse['number'] ?? '') . ($verse['suffix'] ?? '');
+                $verseText = $verse['text'] ?? '';
                 
-            case 'html':
-                $text = htmlspecialchars($result['text']);
-                $ref = htmlspecialchars($result['reference']);
-                $translation = htmlspecialchars($result['translation']['name'] ?? $result['translation']['code']);
+                $html = '<sup class="verse-number">' . htmlspecialchars($label, ENT_QUOTES) . '</sup> ' . htmlspecialchars($verseText, ENT_QUOTES);
+                $markdown = "**{$label}** {$verseText}";
                 
-                return "<div class=\"bible-verse\">\n" .
-                       "  <h3 class=\"reference\">{$ref}</h3>\n" .
-                       "  <blockquote class=\"text\">{$text}</blockquote>\n" .
-                       "  <footer class=\"translation\">{$translation}</footer>\n" .
-                       "</div>";
+                if (!empty($verse['excluded'])) {
+                    $html = "<span class=\"verse excluded\">{$html}</span>";
+                    $markdown = "~~{$markdown}~~";
+                } elseif (!empty($verse['optional'])) {
+                    $html = "<span class=\"verse optional\">({$html})</span>";
+                    $markdown = "*({$markdown})*";
+                }
                 
-            case 'json':
-            default:
-                return $result;
+                $htmlParts[] = $html;
+                $markdownParts[] = $markdown;
+            }
+            $htmlBody = implode(' ', $htmlParts);
+            $markdownBody = implode(' ', $markdownParts);
+        } else {
+            $htmlBody = htmlspecialchars($result['text'] ?? '', ENT_QUOTES);
+            $markdownBody = ($result['text'] ?? '') ?: 'Kein Text verfügbar';
         }
+        
+        $markdownRef = $ref ?: 'Unbekannte Referenz';
+        
+        return [
+            'text' => $result['text'] ?? '',
+            'html' => "<div class=\"bible-verse\">\n" .
+                      "  <h3 class=\"reference\">" . htmlspecialchars($ref, ENT_QUOTES) . "</h3>\n" .
+                      "  <blockquote class=\"text\">{$htmlBody}</blockquote>\n" .
+                      "  <footer class=\"translation\">" . htmlspecialchars($translation, ENT_QUOTES) . "</footer>\n" .
+                      "</div>",
+            'markdown' => "## {$markdownRef}\n\n> {$markdownBody}\n\n*— {$translation}*"
+        ];
+    }
+    
+    /**
+     * Verbleibendes Zeitbudget der Anfrage in Millisekunden
+     */
+    private function remainingMs() {
+        return max(0, (int)(($this->deadline - microtime(true)) * 1000));
+    }
+    
+    /**
+     * --deadline-ms für den nächsten Scraper-Aufruf (mindestens 1 ms, 0 hieße unbegrenzt)
+     */
+    private function deadlineArgument() {
+        return ' --deadline-ms ' . max(1, $this->remainingMs());
     }
     
     private function successResponse($data, $source = null) {
@@ -1100,12 +1280,39 @@ class BibleSearchAPI {
             'timestamp' => date('c')
         ];
     }
+    
+    private function pendingResponse($jobId) {
+        return [
+            'success' => false,
+            'pending' => true,
+            'job_id' => $jobId,
+            'error' => 'Scrape in progress, poll with ?job=' . $jobId,
+            'poll' => '/bible_search.php?job=' . urlencode($jobId) . '&wait=10',
+            'timestamp' => date('c')
+        ];
+    }
 }
 
 // API Endpunkt verarbeiten
 $method = $_SERVER['REQUEST_METHOD'];
 
-if ($method === 'GET') {
+if ($method === 'GET' && isset($_GET['job'])) {
+    // Ergebnis eines Warteschlangen-Auftrags abfragen, optional mit Long-Poll (?wait=Sekunden)
+    $api = new BibleSearchAPI();
+    $result = $api->pollJob($_GET['job'], $_GET['format'] ?? 'json', $_GET['wait'] ?? 0);
+    
+    http_response_code($result['success'] ? 200 : (!empty($result['pending']) ? 202 : 500));
+    echo json_encode($result, JSON_PRETTY_PRINT | JSON_UNESCAPED_UNICODE | JSON_UNESCAPED_SLASHES);
+    
+} elseif ($method === 'GET' && isset($_GET['related'])) {
+    // Verwandte Stellen: ?related=Johannes 3,16[&limit=50]
+    $api = new BibleSearchAPI();
+    $result = $api->findRelated($_GET['related'], $_GET['limit'] ?? 50);
+    
+    http_response_code($result['success'] ? 200 : 500);
+    echo json_encode($result, JSON_PRETTY_PRINT | JSON_UNESCAPED_UNICODE | JSON_UNESCAPED_SLASHES);
+    
+} elseif ($method === 'GET') {
     $reference = $_GET['reference'] ?? null;
     $translation = $_GET['translation'] ?? 'LUT';
     $format = $_GET['format'] ?? 'json';
@@ -1122,7 +1329,12 @@ if ($method === 'GET') {
     }
     
     $api = new BibleSearchAPI();
-    $result = $api->searchBibleText($reference, $translation, $format);
+    $result = $api->searchBibleText($reference, $translation, $format, !empty($_GET['async']));
+    
+    // Noch laufender Auftrag (nur mit async=1): nie als Bibeltext mit 200 ausliefern
+    if (!empty($result['pending']) && in_array($format, ['text', 'markdown', 'html'])) {
+        http_response_code(202);
+    }
     
     // Für text/markdown/html Format, Content-Type anpassen
     if ($format === 'text') {
@@ -1135,7 +1347,7 @@ if ($method === 'GET') {
         header('Content-Type: text/html; charset=utf-8');
         echo $result['success'] ? $result['data'] : '<p>Error: ' . htmlspecialchars($result['error']) . '</p>';
     } else {
-        http_response_code($result['success'] ? 200 : 500);
+        http_response_code($result['success'] ? 200 : (!empty($result['pending']) ? 202 : 500));
         echo json_encode($result, JSON_PRETTY_PRINT | JSON_UNESCAPED_UNICODE | JSON_UNESCAPED_SLASHES);
     }
     
@@ -1156,10 +1368,11 @@ if ($method === 'GET') {
     $result = $api->searchBibleText(
         $input['reference'],
         $input['translation'] ?? 'LUT',
-        $input['format'] ?? 'json'
+        $input['format'] ?? 'json',
+        !empty($input['async'])
     );
     
-    http_response_code($result['success'] ? 200 : 500);
+    http_response_code($result['success'] ? 200 : (!empty($result['pending']) ? 202 : 500));
     echo json_encode($result, JSON_PRETTY_PRINT | JSON_UNESCAPED_UNICODE | JSON_UNESCAPED_SLASHES);
     
 } else {
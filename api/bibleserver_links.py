@@ -1,5 +1,22 @@
 #!/opt/venv/bin/python3
+"""
+Link-Generator für Bibelstellen (ERF Bibleserver, BIGS)
+Einzelaufruf per generate_link() oder Batch-Modus über NDJSON auf stdin
+"""
+
+import argparse
+import json
+import os
 import re
+import sys
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+# Basis-URLs der Quellen; für Lasttests per Umgebungsvariable auf einen lokalen
+# Stand-in umbiegbar (siehe scripts/fake_upstream.py)
+BIBLESERVER_BASE_URL = os.environ.get('SCRAPER_BIBLESERVER_URL', 'https://www.bibleserver.com').rstrip('/')
+BIGS_BASE_URL = os.environ.get('SCRAPER_BIGS_URL', 'https://www.bibel-in-gerechter-sprache.de/die-bibel/bigs-online/')
+LOSUNGEN_URL = os.environ.get('SCRAPER_LOSUNGEN_URL', 'https://www.losungen.de/')
 
 # ERF Bibleserver Übersetzungscodes 
 BIBLESERVER_TRANSLATIONS = {
@@ -29,80 +46,137 @@ BIBLESERVER_TRANSLATIONS = {
     'BIGS': None, # Hat eigene Website
 }
 
+# Buchnamen für ERF Bibleserver URLs
+ERF_BOOK_NAMES = {
+    # Altes Testament
+    '1. Mose': '1.Mose',
+    '2. Mose': '2.Mose', 
+    '3. Mose': '3.Mose',
+    '4. Mose': '4.Mose',
+    '5. Mose': '5.Mose',
+    'Richter': 'Richter',
+    '1. Samuel': '1.Samuel',
+    '2. Samuel': '2.Samuel', 
+    '1. Könige': '1.Koenige',
+    '2. Könige': '2.Koenige',
+    '1. Chronik': '1.Chronik',
+    '2. Chronik': '2.Chronik',
+    'Esra': 'Esra',
+    'Nehemia': 'Nehemia',
+    'Ester': 'Ester',
+    'Hiob': 'Hiob',
+    'Psalm': 'Psalm',
+    'Sprüche': 'Sprueche',
+    'Prediger': 'Prediger',
+    'Hohelied': 'Hohelied',
+    'Jesaja': 'Jesaja',
+    'Jeremia': 'Jeremia',
+    'Klagelieder': 'Klagelieder',
+    'Hesekiel': 'Hesekiel',
+    'Daniel': 'Daniel',
+    'Hosea': 'Hosea',
+    'Joel': 'Joel',
+    'Amos': 'Amos',
+    'Obadja': 'Obadja',
+    'Jona': 'Jona',
+    'Micha': 'Micha',
+    'Nahum': 'Nahum',
+    'Habakuk': 'Habakuk',
+    'Zefanja': 'Zefanja',
+    'Haggai': 'Haggai',
+    'Sacharja': 'Sacharja',
+    'Maleachi': 'Maleachi',
+    
+    # Neues Testament
+    'Matthäus': 'Matthaeus',
+    'Markus': 'Markus',
+    'Lukas': 'Lukas',
+    'Johannes': 'Johannes',
+    'Apostelgeschichte': 'Apostelgeschichte',
+    'Römer': 'Roemer',
+    '1. Korinther': '1.Korinther',
+    '2. Korinther': '2.Korinther',
+    'Galater': 'Galater',
+    'Epheser': 'Epheser',
+    'Philipper': 'Philipper',
+    'Kolosser': 'Kolosser',
+    '1. Thessalonicher': '1.Thessalonicher',
+    '2. Thessalonicher': '2.Thessalonicher',
+    '1. Timotheus': '1.Timotheus',
+    '2. Timotheus': '2.Timotheus',
+    'Titus': 'Titus',
+    'Philemon': 'Philemon',
+    'Hebräer': 'Hebraeer',
+    'Jakobus': 'Jakobus',
+    '1. Petrus': '1.Petrus',
+    '2. Petrus': '2.Petrus',
+    '1. Johannes': '1.Johannes',
+    '2. Johannes': '2.Johannes',
+    '3. Johannes': '3.Johannes',
+    'Judas': 'Judas',
+    'Offenbarung': 'Offenbarung'
+}
+
+# Buchkürzel (Slugs) für BIGS-URLs
+BIGS_BOOK_SLUGS = {
+    # Altes Testament
+    'Genesis': 'Gen', '1. Mose': 'Gen', 'Exodus': 'Ex', '2. Mose': 'Ex',
+    'Levitikus': 'Lev', '3. Mose': 'Lev', 'Numeri': 'Num', '4. Mose': 'Num',
+    'Deuteronomium': 'Dtn', '5. Mose': 'Dtn', 'Josua': 'Jos', 'Richter': 'Ri',
+    'Rut': 'Rut', '1. Samuel': '1-Sam', '2. Samuel': '2-Sam',
+    '1. Könige': '1-Koen', '2. Könige': '2-Koen', '1. Chronik': '1-Chr', '2. Chronik': '2-Chr',
+    'Esra': 'Esr', 'Nehemia': 'Neh', 'Ester': 'Est', 'Hiob': 'Hiob', 'Job': 'Hiob',
+    'Psalm': 'Ps', 'Psalmen': 'Ps', 'Sprüche': 'Spr', 'Sprichwörter': 'Spr', 
+    'Prediger': 'Koh', 'Kohelet': 'Koh', 'Hoheslied': 'Hld', 'Hohelied': 'Hld',
+    'Jesaja': 'Jes', 'Jeremia': 'Jer', 'Klagelieder': 'Klgl',
+    'Hesekiel': 'Ez-Hes', 'Ezechiel': 'Ez-Hes', 'Daniel': 'Dan', 'Hosea': 'Hos',
+    'Joel': 'Joel', 'Amos': 'Am', 'Obadja': 'Ob', 'Jona': 'Jona', 'Micha': 'Mi',
+    'Nahum': 'Nah', 'Habakuk': 'Hab', 'Zefanja': 'Zef', 'Haggai': 'Hag',
+    'Sacharja': 'Sach', 'Maleachi': 'Mal',
+    
+    # Neues Testament
+    'Matthäus': 'Mt', 'Markus': 'Mk', 'Lukas': 'Lk', 'Johannes': 'Joh',
+    'Apostelgeschichte': 'Apg', 'Römer': 'Roem', '1. Korinther': '1-Kor',
+    '2. Korinther': '2-Kor', 'Galater': 'Gal', 'Epheser': 'Eph', 'Philipper': 'Phil',
+    'Kolosser': 'Kol', '1. Thessalonicher': '1-Thess', '2. Thessalonicher': '2-Thess',
+    '1. Timotheus': '1-Tim', '2. Timotheus': '2-Tim', 'Titus': 'Tit',
+    'Philemon': 'Phlm', 'Hebräer': 'Hebr', 'Jakobus': 'Jak', '1. Petrus': '1-Petr',
+    '2. Petrus': '2-Petr', '1. Johannes': '1-Joh', '2. Johannes': '2-Joh',
+    '3. Johannes': '3-Joh', 'Judas': 'Jud', 'Offenbarung': 'Offb-Apk'
+}
+
+# Vorkompilierte Muster für das Referenz-Parsing
+# Format: "Buchname Kapitel,Vers" oder "Buchname Kapitel,Vers-Vers"
+REFERENCE_PATTERN = re.compile(r'^(.+?)\s+(\d+),(\d+)(?:-(\d+))?$')
+PARENTHESES_PATTERN = re.compile(r'\([^)]*\)')
+VERSE_SUFFIX_PATTERN = re.compile(r'(\d+)[a-z]\b')
+DASH_PATTERN = re.compile(r'\s*[-–—]\s*')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
 def normalize_book_name(book_ref):
     """Normalisiert Buchname für ERF Bibleserver URLs"""
-    # Häufige Buchname-Mappings
-    book_mappings = {
-        # Altes Testament
-        '1. Mose': '1.Mose',
-        '2. Mose': '2.Mose', 
-        '3. Mose': '3.Mose',
-        '4. Mose': '4.Mose',
-        '5. Mose': '5.Mose',
-        'Richter': 'Richter',
-        '1. Samuel': '1.Samuel',
-        '2. Samuel': '2.Samuel', 
-        '1. Könige': '1.Koenige',
-        '2. Könige': '2.Koenige',
-        '1. Chronik': '1.Chronik',
-        '2. Chronik': '2.Chronik',
-        'Esra': 'Esra',
-        'Nehemia': 'Nehemia',
-        'Ester': 'Ester',
-        'Hiob': 'Hiob',
-        'Psalm': 'Psalm',
-        'Sprüche': 'Sprueche',
-        'Prediger': 'Prediger',
-        'Hohelied': 'Hohelied',
-        'Jesaja': 'Jesaja',
-        'Jeremia': 'Jeremia',
-        'Klagelieder': 'Klagelieder',
-        'Hesekiel': 'Hesekiel',
-        'Daniel': 'Daniel',
-        'Hosea': 'Hosea',
-        'Joel': 'Joel',
-        'Amos': 'Amos',
-        'Obadja': 'Obadja',
-        'Jona': 'Jona',
-        'Micha': 'Micha',
-        'Nahum': 'Nahum',
-        'Habakuk': 'Habakuk',
-        'Zefanja': 'Zefanja',
-        'Haggai': 'Haggai',
-        'Sacharja': 'Sacharja',
-        'Maleachi': 'Maleachi',
-        
-        # Neues Testament
-        'Matthäus': 'Matthaeus',
-        'Markus': 'Markus',
-        'Lukas': 'Lukas',
-        'Johannes': 'Johannes',
-        'Apostelgeschichte': 'Apostelgeschichte',
-        'Römer': 'Roemer',
-        '1. Korinther': '1.Korinther',
-        '2. Korinther': '2.Korinther',
-        'Galater': 'Galater',
-        'Epheser': 'Epheser',
-        'Philipper': 'Philipper',
-        'Kolosser': 'Kolosser',
-        '1. Thessalonicher': '1.Thessalonicher',
-        '2. Thessalonicher': '2.Thessalonicher',
-        '1. Timotheus': '1.Timotheus',
-        '2. Timotheus': '2.Timotheus',
-        'Titus': 'Titus',
-        'Philemon': 'Philemon',
-        'Hebräer': 'Hebraeer',
-        'Jakobus': 'Jakobus',
-        '1. Petrus': '1.Petrus',
-        '2. Petrus': '2.Petrus',
-        '1. Johannes': '1.Johannes',
-        '2. Johannes': '2.Johannes',
-        '3. Johannes': '3.Johannes',
-        'Judas': 'Judas',
-        'Offenbarung': 'Offenbarung'
-    }
-    
-    return book_mappings.get(book_ref, book_ref)
+    return ERF_BOOK_NAMES.get(book_ref, book_ref)
+
+@lru_cache(maxsize=4096)
+def parse_reference(reference: str) -> Optional[tuple]:
+    """
+    Zerlegt eine Bibelstelle in (Buch, Kapitel, Startvers, Endvers)
+
+    Optionale Verse in Klammern und Buchstaben-Suffixe (15a) werden für die
+    Link-Erzeugung ignoriert. Ergebnisse werden gecacht, da Losungen und
+    Perikopen dieselben Stellen vielfach enthalten.
+    """
+    cleaned = PARENTHESES_PATTERN.sub('', reference)
+    cleaned = VERSE_SUFFIX_PATTERN.sub(r'\1', cleaned)
+    cleaned = DASH_PATTERN.sub('-', cleaned)
+    cleaned = WHITESPACE_PATTERN.sub(' ', cleaned).strip()
+
+    match = REFERENCE_PATTERN.match(cleaned)
+    if not match:
+        return None
+
+    book, chapter, verse_start, verse_end = match.groups()
+    return (book.strip(), int(chapter), int(verse_start), int(verse_end) if verse_end else None)
 
 def generate_bibleserver_url(reference, translation='LUT'):
     """
@@ -120,21 +194,14 @@ def generate_bibleserver_url(reference, translation='LUT'):
     if not bibleserver_code:
         return None
     
-    # Referenz parsen
-    # Format: "Buchname Kapitel,Vers" oder "Buchname Kapitel,Vers-Vers"
-    pattern = r'^(.+?)\s+(\d+),(\d+)(?:-(\d+))?$'
-    match = re.match(pattern, reference.strip())
-    
-    if not match:
+    return _bibleserver_url(reference, bibleserver_code)
+
+def _bibleserver_url(reference, bibleserver_code):
+    parsed = parse_reference(reference)
+    if not parsed:
         return None
     
-    book, chapter, verse_start, verse_end = match.groups()
-    
-    # Buchname für URL normalisieren
-    book_normalized = normalize_book_name(book.strip())
-    
-    # URL zusammenbauen
-    base_url = f"https://www.bibleserver.com/{bibleserver_code}"
+    book, chapter, verse_start, verse_end = parsed
     
     if verse_end:
         # Versbereich: Johannes3,16-18
@@ -143,10 +210,78 @@ def generate_bibleserver_url(reference, translation='LUT'):
         # Einzelvers: Johannes3,16
         verse_part = f"{chapter},{verse_start}"
     
-    # Vollständige URL
-    url = f"{base_url}/{book_normalized}{verse_part}"
+    # Vollständige URL mit für die URL normalisiertem Buchnamen
+    return f"{BIBLESERVER_BASE_URL}/{bibleserver_code}/{normalize_book_name(book)}{verse_part}"
+
+def generate_bigs_url(reference):
+    """Generiert URLs für Bibel in gerechter Sprache (BIGS online)"""
+    parsed = parse_reference(reference)
+    if not parsed:
+        return None
+    
+    book, chapter, verse_start, verse_end = parsed
+    slug = BIGS_BOOK_SLUGS.get(book, book)
+    
+    verse_part = f"{verse_start}-{verse_end}" if verse_end and verse_end > verse_start else f"{verse_start}"
+    return f"{BIGS_BASE_URL}?{slug}/{chapter}/{verse_part}/"
+
+def generate_link(reference, translation='LUT'):
+    """
+    Liefert den Quell-Link einer Bibelstelle für eine beliebige Übersetzung
+
+    BIGS verweist auf die eigene Website, Übersetzungen ohne ERF-Angebot
+    (in BIBLESERVER_TRANSLATIONS mit None markiert) liefern None, alle
+    übrigen Codes werden direkt an ERF Bibleserver durchgereicht.
+    """
+    if translation == 'BIGS':
+        return generate_bigs_url(reference)
+    
+    if translation in BIBLESERVER_TRANSLATIONS:
+        return generate_bibleserver_url(reference, translation)
     
-    return url
+    return _bibleserver_url(reference, translation)
+
+def resolve_links(reference: str, translations: Iterable[str]) -> Dict[str, Optional[str]]:
+    """Links einer Bibelstelle für alle gewünschten Übersetzungen"""
+    return {translation: generate_link(reference, translation) for translation in translations}
+
+def resolve_stream(lines: Iterable[str], default_translations: List[str]):
+    """
+    Batch-Resolver über NDJSON-Zeilen
+
+    Jede Zeile ist entweder ein JSON-String ("Johannes 3,16") oder ein Objekt
+    {"reference": "...", "translations": [...], "id": ...}. Pro Zeile wird ein
+    Ergebnisobjekt erzeugt; "id" wird unverändert durchgereicht.
+    """
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        
+        try:
+            item = json.loads(line)
+        except ValueError:
+            yield {"error": "Invalid JSON", "input": line}
+            continue
+        
+        if isinstance(item, str):
+            item = {"reference": item}
+        
+        reference = item.get("reference") if isinstance(item, dict) else None
+        if not reference:
+            yield {"error": "Missing reference", "input": line}
+            continue
+        
+        translations = item.get("translations") or default_translations
+        result = {
+            "reference": reference,
+            "parsed": parse_reference(reference) is not None,
+            "links": resolve_links(reference, translations)
+        }
+        if "id" in item:
+            result["id"] = item["id"]
+        
+        yield result
 
 def test_bibleserver_links():
     """Testet die URL-Generierung"""
@@ -157,11 +292,31 @@ def test_bibleserver_links():
         ("Jeremia 14,22", "LUT"),
         ("1. Johannes 5,11", "NGÜ"),
         ("Matthäus 5,3-12", "ESV"),
+        ("Römer 5,20-21", "BIGS"),
+        ("Jesaja 40,1-8(9-11)", "LUT"),
     ]
     
     for reference, translation in test_cases:
-        url = generate_bibleserver_url(reference, translation)
+        url = generate_link(reference, translation)
         print(f"{reference} ({translation}): {url}")
 
+def main():
+    parser = argparse.ArgumentParser(
+        description="Erzeugt Quell-Links für Bibelstellen aus NDJSON auf stdin"
+    )
+    parser.add_argument('--translations', default='LUT',
+                        help="Kommagetrennte Übersetzungscodes für Zeilen ohne eigene Angabe (Standard: LUT)")
+    parser.add_argument('--test', action='store_true', help="Beispiel-Links ausgeben")
+    args = parser.parse_args()
+    
+    if args.test:
+        test_bibleserver_links()
+        return
+    
+    translations = [t.strip() for t in args.translations.split(',') if t.strip()]
+    write = sys.stdout.write
+    for result in resolve_stream(sys.stdin, translations):
+        write(json.dumps(result, ensure_ascii=False) + "\n")
+
 if __name__ == "__main__":
-    test_bibleserver_links()
\ No newline at end of file
+    main()
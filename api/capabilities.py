@@ -0,0 +1,250 @@
+#!/opt/venv/bin/python3
+"""
+Fähigkeiten-Matrix der Übersetzungen (Quelle × Übersetzung × Feature)
+Der Probe-Lauf fragt jede Übersetzung mit bekannten Stellen bei ihrer Quelle ab und hält fest,
+was funktioniert: Einzelvers, Versbereich und ganzes Kapitel. BibleScraper lehnt Anfragen, die
+laut Matrix nicht gehen können, sofort ab, statt einen vollen Upstream-Abruf zu riskieren.
+
+Ergebnis pro Feature: true (geht), false (Seite geladen, aber keine bzw. zu wenige Verse
+oder 404), null (nicht feststellbar: Timeout, 429, 5xx). Nur false führt zur Ablehnung, und nur
+solange die Probe dieser Übersetzung nicht älter als SCRAPER_CAPABILITY_MAX_AGE Tage ist
+(Standard 14; Zeitstempel pro Übersetzung, Teil-Probes frischen nur ihre eigenen auf).
+
+Datei: SCRAPER_CAPABILITY_FILE (Standard <SCRAPER_STATE_DIR>/capabilities.json)
+
+Verwendung:
+    python3 capabilities.py probe [--translations LUT,NIV | --stale] [--delay 1.0]
+    python3 capabilities.py show
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from bibleserver_links import BIBLESERVER_TRANSLATIONS
+from upstream import STATE_DIR
+
+CAPABILITY_FILE = os.environ.get('SCRAPER_CAPABILITY_FILE', os.path.join(STATE_DIR, 'capabilities.json'))
+MAX_AGE = float(os.environ.get('SCRAPER_CAPABILITY_MAX_AGE', '14')) * 86400
+
+# Bekannte Stellen je Feature; Kapitel werden über die Versstelle als ganzes Kapitel abgefragt.
+# Jedes Feature auf einer eigenen Kapitelseite (bibleserver lädt immer das ganze Kapitel, gleiche
+# Seiten kämen sonst aus dem Single-Flight), alle im NT, das auch Teilbibeln wie NGÜ enthalten
+PROBE_REFERENCES = {
+    'verse': 'Johannes 3,16',
+    'range': 'Matthäus 5,3-12',
+    'chapter': 'Lukas 15,1',
+}
+
+# Mindestanzahl Verse, die ein Feature liefern muss (Lukas 15 hat 32 Verse, über mehrere Abschnitte)
+PROBE_MIN_VERSES = {
+    'verse': 1,
+    'range': 10,
+    'chapter': 30,
+}
+
+FEATURES = tuple(PROBE_REFERENCES)
+
+# HTTP-Status, die eindeutig "gibt es nicht" bedeuten
+NOT_FOUND_STATUSES = (400, 404, 410)
+
+
+def source_for(translation: str) -> str:
+    return 'bigs' if translation == 'BIGS' else 'bibleserver'
+
+
+def feature_for(reference: Dict) -> str:
+    if reference.get('whole_chapter'):
+        return 'chapter'
+    return 'range' if reference['end_verse'] > reference['start_verse'] else 'verse'
+
+
+def load(path: str = CAPABILITY_FILE) -> Optional[Dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save(matrix: Dict, path: str = CAPABILITY_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(matrix, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+_matrix: Optional[Dict] = None
+_matrix_mtime: Optional[float] = None
+
+
+def get_matrix() -> Optional[Dict]:
+    """Matrix laden und neu lesen, sobald ein Probe-Lauf die Datei ersetzt hat (lange laufende
+    Dienste wie scrape_queue.py); das Alter zählt pro Übersetzung (probed_at())"""
+    global _matrix, _matrix_mtime
+    try:
+        mtime = os.path.getmtime(CAPABILITY_FILE)
+    except OSError:
+        mtime = None
+    if mtime != _matrix_mtime:
+        _matrix_mtime = mtime
+        _matrix = load() if mtime is not None else None
+    return _matrix
+
+
+def probed_at(matrix: Dict, translation: str) -> float:
+    """Zeitpunkt der letzten Probe einer Übersetzung (ältere Dateien: der des ganzen Laufs), 0 = nie"""
+    entry = matrix.get('translations', {}).get(translation, {}).get(source_for(translation))
+    if entry is None:
+        return 0
+    return entry.get('probed_at', matrix.get('probed_at', 0))
+
+
+def is_stale(matrix: Dict, translation: str) -> bool:
+    return time.time() - probed_at(matrix, translation) > MAX_AGE
+
+
+def check(translation: str, reference: Dict) -> Optional[str]:
+    """Grund, warum die Anfrage laut Matrix nicht gehen kann, sonst None"""
+    matrix = get_matrix()
+    if not matrix:
+        return None
+
+    source = source_for(translation)
+    feature = feature_for(reference)
+    verdict = matrix.get('translations', {}).get(translation, {}).get(source, {}).get(feature)
+    if verdict is False and not is_stale(matrix, translation):
+        probed = time.strftime('%Y-%m-%d', time.localtime(probed_at(matrix, translation)))
+        return f"{translation} does not support {feature} lookups on {source} (probed {probed})"
+    return None
+
+
+def _probe_feature(scraper, translation: str, feature: str) -> Dict:
+    reference = scraper.parse_reference(PROBE_REFERENCES[feature])
+    if feature == 'chapter':
+        reference = dict(reference, whole_chapter=True)
+
+    started = time.monotonic()
+    try:
+        status, html, url = scraper.fetch_reference(reference, translation)
+    except Exception as e:
+        return {'ok': None, 'error': str(e)}
+    elapsed_ms = int((time.monotonic() - started) * 1000)
+
+    if status in NOT_FOUND_STATUSES:
+        return {'ok': False, 'status': status, 'ms': elapsed_ms}
+    if status != 200:
+        return {'ok': None, 'status': status, 'ms': elapsed_ms}
+
+    if translation == 'BIGS':
+        result = scraper.parse_bigs(html, reference, url)
+    else:
+        result = scraper.parse_bibleserver(html, reference, translation, url)
+    verses = len(result.get('verses') or [result]) if result and result.get('text') else 0
+    return {'ok': verses >= PROBE_MIN_VERSES[feature], 'verses': verses, 'status': status, 'ms': elapsed_ms}
+
+
+def probe(translations: List[str], delay: float = 1.0) -> Dict:
+    """Alle Übersetzungen × Features abfragen und die Matrix zurückgeben"""
+    from bible_scraper import BibleScraper
+
+    scraper = BibleScraper()
+    matrix = {'probed_at': time.time(), 'references': PROBE_REFERENCES, 'translations': {}}
+    for translation in translations:
+        source = source_for(translation)
+        details = {}
+        for feature in FEATURES:
+            details[feature] = _probe_feature(scraper, translation, feature)
+            time.sleep(delay)
+        entry = {feature: details[feature]['ok'] for feature in FEATURES}
+        entry['probed_at'] = time.time()
+        entry['details'] = details
+        matrix['translations'][translation] = {source: entry}
+        print(f"{translation:6} {source:12} " + ' '.join(f"{feature}={entry[feature]}" for feature in FEATURES),
+              file=sys.stderr)
+    return matrix
+
+
+def all_translations() -> List[str]:
+    from scraper import TRANSLATIONS
+    return list(dict.fromkeys(list(TRANSLATIONS) + list(BIBLESERVER_TRANSLATIONS)))
+
+
+def disagreements(matrix: Dict) -> List[str]:
+    """Abweichungen zwischen Probe-Ergebnis und BIBLESERVER_TRANSLATIONS (Link-Tabelle)"""
+    notes = []
+    for translation, sources in sorted(matrix.get('translations', {}).items()):
+        if translation == 'BIGS' or translation not in BIBLESERVER_TRANSLATIONS:
+            continue
+        works = sources.get('bibleserver', {}).get('verse')
+        listed = BIBLESERVER_TRANSLATIONS[translation] is not None
+        if works is True and not listed:
+            notes.append(f"{translation}: works on bibleserver but has no link in BIBLESERVER_TRANSLATIONS")
+        elif works is False and listed:
+            notes.append(f"{translation}: linked in BIBLESERVER_TRANSLATIONS but probe failed")
+    return notes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fähigkeiten-Matrix der Übersetzungen")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    probe_parser = sub.add_parser('probe', help="Übersetzungen abfragen und Matrix speichern")
+    probe_parser.add_argument('--translations', help="Kommagetrennt, Standard: alle")
+    probe_parser.add_argument('--stale', action='store_true',
+                              help="Nur Übersetzungen ohne Eintrag oder mit Probe älter als MAX_AGE")
+    probe_parser.add_argument('--delay', type=float, default=1.0, help="Pause zwischen Abrufen (Sekunden)")
+    probe_parser.add_argument('--output', default=CAPABILITY_FILE)
+
+    sub.add_parser('show', help="Gespeicherte Matrix anzeigen")
+
+    args = parser.parse_args()
+
+    if args.command == 'probe':
+        import upstream
+        import scheduler
+        # Probes sollen die Upstreams nicht doppelt belasten und Nutzeranfragen nicht ausbremsen
+        upstream.HEDGE_ENABLED = False
+        scheduler.set_priority(scheduler.BACKGROUND)
+        translations = ([t.strip() for t in args.translations.split(',') if t.strip()]
+                        if args.translations else all_translations())
+        previous = load(args.output) or {}
+        if args.stale:
+            translations = [t for t in translations if is_stale(previous, t)]
+        matrix = probe(translations, args.delay)
+        if args.translations or args.stale:
+            # Teil-Probe: übrige Übersetzungen samt ihrem Zeitstempel aus der bisherigen Matrix übernehmen
+            matrix['translations'] = dict(previous.get('translations', {}), **matrix['translations'])
+        save(matrix, args.output)
+        matrix['disagreements'] = disagreements(matrix)
+    else:
+        matrix = load()
+        if matrix is None:
+            print(json.dumps({"error": f"No capability matrix at {CAPABILITY_FILE}"}))
+            return
+        matrix['disagreements'] = disagreements(matrix)
+
+    summary = {translation: {source: dict({feature: entry.get(feature) for feature in FEATURES},
+                                          probed=time.strftime('%Y-%m-%d', time.localtime(
+                                              probed_at(matrix, translation))))
+                             for source, entry in sources.items()}
+               for translation, sources in matrix['translations'].items()}
+    print(json.dumps({'probed_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(matrix['probed_at'])),
+                      'translations': summary, 'disagreements': matrix['disagreements']},
+                     ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
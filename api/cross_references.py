@@ -0,0 +1,460 @@
+#!/opt/venv/bin/python3
+"""
+Querverweis-Index aus den Kapitelseiten von bibleserver.com
+Jede geladene Kapitelseite enthält pro Vers die Querverweise (span.verse-references). Statt sie
+nur aus dem Text zu entfernen, merkt parse_bibleserver() sie sich hier als Paare normalisierter
+Vers-IDs - ohne einen einzigen zusätzlichen Upstream-Abruf.
+
+Vers-ID: Buchnummer * 1.000.000 + Kapitel * 1000 + Vers (Vers 0 = ganzes Kapitel), Buchnummer
+nach BIBLE_BOOKS. Neue Paare landen in einem Anhänge-Log; compact() führt sie in einen binären
+Index mit zwei sortierten Richtungen (Vers → Verweise, Vers → verwiesen von) zusammen, Abfragen
+sind eine Binärsuche ohne vollständiges Einlesen in Dicts.
+
+Jedes Kapitel wird je Übersetzung prozessübergreifend nur einmal erfasst (Markierungsdatei in
+chapters/, nur nach einer Seite mit Verweisen).
+Kompaktiert wird per Cron (docker/cron.d/crossref-compact), nie im Parse-Pfad einer Anfrage.
+
+Dateien: <SCRAPER_STATE_DIR>/crossrefs/{index.bin,pending.ndjson,chapters/}, abschaltbar mit SCRAPER_CROSSREFS=0
+
+Verwendung:
+    python3 cross_references.py related "Johannes 3,16" [--limit 50]
+    python3 cross_references.py compact
+    python3 cross_references.py stats
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import re
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import unquote, urlparse
+
+from bibleserver_links import BIGS_BOOK_SLUGS, parse_reference
+from upstream import STATE_DIR
+
+INDEX_DIR = os.path.join(STATE_DIR, 'crossrefs')
+INDEX_FILE = os.path.join(INDEX_DIR, 'index.bin')
+PENDING_FILE = os.path.join(INDEX_DIR, 'pending.ndjson')
+CHAPTER_DIR = os.path.join(INDEX_DIR, 'chapters')
+ENABLED = os.environ.get('SCRAPER_CROSSREFS', '1') != '0'
+
+# Längere Verweisbereiche werden nur mit ihrem ersten Vers erfasst
+MAX_RANGE = 40
+
+INDEX_MAGIC = b'XREF'
+INDEX_VERSION = 1
+HEADER = struct.Struct('<4sII')
+
+BIBLE_BOOKS = (
+    '1. Mose', '2. Mose', '3. Mose', '4. Mose', '5. Mose', 'Josua', 'Richter', 'Rut',
+    '1. Samuel', '2. Samuel', '1. Könige', '2. Könige', '1. Chronik', '2. Chronik', 'Esra',
+    'Nehemia', 'Ester', 'Hiob', 'Psalm', 'Sprüche', 'Prediger', 'Hohelied', 'Jesaja', 'Jeremia',
+    'Klagelieder', 'Hesekiel', 'Daniel', 'Hosea', 'Joel', 'Amos', 'Obadja', 'Jona', 'Micha',
+    'Nahum', 'Habakuk', 'Zefanja', 'Haggai', 'Sacharja', 'Maleachi',
+    'Matthäus', 'Markus', 'Lukas', 'Johannes', 'Apostelgeschichte', 'Römer', '1. Korinther',
+    '2. Korinther', 'Galater', 'Epheser', 'Philipper', 'Kolosser', '1. Thessalonicher',
+    '2. Thessalonicher', '1. Timotheus', '2. Timotheus', 'Titus', 'Philemon', 'Hebräer',
+    'Jakobus', '1. Petrus', '2. Petrus', '1. Johannes', '2. Johannes', '3. Johannes', 'Judas',
+    'Offenbarung',
+)
+
+TRANSLITERATION = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'})
+NON_ALNUM_PATTERN = re.compile(r'[^a-z0-9]+')
+# Pfad eines Verweis-Links: /LUT/Johannes3,16-18 oder /LUT/1.Mose1 (Buch endet nie auf einer Ziffer)
+LINK_PATH_PATTERN = re.compile(r'^(.*?\D)(\d+)(?:[,.:](\d+)(?:-(\d+)(?:[,.:](\d+))?)?)?/?$')
+# Linktext als Rückfall: "Joh 3,16" oder "1Mo 1,1-3"
+LINK_TEXT_PATTERN = re.compile(r'^(.*?\D)\s*(\d+)(?:,(\d+)(?:\s*[-–]\s*(\d+))?)?')
+
+
+def _book_key(name: str) -> str:
+    return NON_ALNUM_PATTERN.sub('', name.lower().translate(TRANSLITERATION))
+
+
+def _build_book_keys() -> Dict[str, int]:
+    keys = {_book_key(name): number for number, name in enumerate(BIBLE_BOOKS, 1)}
+    # BIGS-Kürzel und alternative Namen (Genesis, Kohelet, Joh, 1-Kor …) auf dasselbe Buch
+    slug_numbers = {BIGS_BOOK_SLUGS[name]: keys[_book_key(name)]
+                    for name in BIBLE_BOOKS if name in BIGS_BOOK_SLUGS}
+    for alias, slug in BIGS_BOOK_SLUGS.items():
+        if slug in slug_numbers:
+            keys.setdefault(_book_key(alias), slug_numbers[slug])
+            keys.setdefault(_book_key(slug), slug_numbers[slug])
+    return keys
+
+
+BOOK_KEYS = _build_book_keys()
+
+
+def book_number(name: str) -> Optional[int]:
+    return BOOK_KEYS.get(_book_key(name))
+
+
+def verse_id(book: int, chapter: int, verse: int = 0) -> int:
+    return book * 1000000 + chapter * 1000 + verse
+
+
+def split_id(vid: int) -> Tuple[int, int, int]:
+    book, rest = divmod(vid, 1000000)
+    chapter, verse = divmod(rest, 1000)
+    return book, chapter, verse
+
+
+def _target_ids(book: int, chapter: int, start: Optional[str], end: Optional[str],
+                end_verse: Optional[str]) -> List[int]:
+    if not start:
+        return [verse_id(book, chapter)]
+    first = int(start)
+    # Kapitelübergreifende Bereiche (Joh 3,16-4,2) nur mit dem Startvers
+    last = int(end) if end and not end_verse else first
+    if last < first or last - first >= MAX_RANGE:
+        last = first
+    return [verse_id(book, chapter, verse) for verse in range(first, last + 1)]
+
+
+def parse_link(href: Optional[str], text: str = '') -> List[int]:
+    """Vers-IDs eines Verweis-Links, bevorzugt aus dem Pfad, sonst aus dem Linktext"""
+    if href:
+        path = unquote(urlparse(href).path).rstrip('/')
+        match = LINK_PATH_PATTERN.match(path.rsplit('/', 1)[-1])
+        if match:
+            book = book_number(match.group(1))
+            if book:
+                return _target_ids(book, int(match.group(2)), *match.group(3, 4, 5))
+
+    match = LINK_TEXT_PATTERN.match(text.strip())
+    if match:
+        book = book_number(match.group(1))
+        if book:
+            return _target_ids(book, int(match.group(2)), match.group(3), match.group(4), None)
+    return []
+
+
+def _verse_number(verse_element) -> Optional[int]:
+    number = verse_element.find('span', class_='verse-number')
+    if number is not None and number.get_text().strip().isdigit():
+        return int(number.get_text().strip())
+    for css_class in verse_element.get('class', []):
+        if re.fullmatch(r'v\d+', css_class):
+            return int(css_class[1:])
+    return None
+
+
+def extract_page(soup, book: str, chapter: int) -> List[Tuple[int, int]]:
+    """Alle (Quellvers, Zielvers)-Paare einer bibleserver-Kapitelseite"""
+    source_book = book_number(book)
+    if not source_book:
+        return []
+
+    edges = []
+    for references in soup.find_all('span', class_='verse-references'):
+        verse_element = references.find_parent('span', class_='verse')
+        number = _verse_number(verse_element) if verse_element is not None else None
+        if number is None:
+            continue
+        source = verse_id(source_book, chapter, number)
+        for link in references.find_all('a'):
+            edges.extend((source, target) for target in parse_link(link.get('href'), link.get_text())
+                         if target != source)
+    return edges
+
+
+# Im Prozess schon geprüfte Kapitel, erspart auch den stat() auf die Markierung
+_recorded: Set[Tuple[str, str, int]] = set()
+
+
+def _marker_path(translation: str, book: int, chapter: int) -> str:
+    # Je Übersetzung: nicht jede liefert Querverweise im Markup
+    return os.path.join(CHAPTER_DIR, f"{_book_key(translation)}-{book}-{chapter}")
+
+
+def _claim_chapter(translation: str, book: int, chapter: int) -> Optional[str]:
+    """Markierungsdatei exklusiv anlegen; None, wenn ein Prozess das Kapitel schon erfasst hat"""
+    marker = _marker_path(translation, book, chapter)
+    try:
+        os.makedirs(CHAPTER_DIR, exist_ok=True)
+        os.close(os.open(marker, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o664))
+    except FileExistsError:
+        return None
+    return marker
+
+
+def record_page(soup, book: str, chapter: int, translation: str = ''):
+    """Querverweise einer geladenen Kapitelseite ins Log schreiben; Fehler bleiben folgenlos"""
+    key = (translation, book, chapter)
+    if not ENABLED or key in _recorded:
+        return
+    _recorded.add(key)
+    number = book_number(book)
+    if not number or os.path.exists(_marker_path(translation, number, chapter)):
+        return
+    marker = None
+    recorded = False
+    try:
+        marker = _claim_chapter(translation, number, chapter)
+        if marker is None:
+            return
+        edges = extract_page(soup, book, chapter)
+        if edges:
+            append(edges, f"{book} {chapter}")
+            recorded = True
+    except Exception as e:
+        print(f"Cross references: record failed - {e}", file=sys.stderr)
+    finally:
+        # Ohne Verweise (Fehlerseite, Übersetzung ohne Verweis-Markup) oder bei Fehlern
+        # bleibt das Kapitel offen und wird beim nächsten Laden erneut versucht
+        if marker is not None and not recorded:
+            _recorded.discard(key)
+            try:
+                os.unlink(marker)
+            except OSError:
+                pass
+
+
+def append(edges: List[Tuple[int, int]], label: str = ''):
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    line = json.dumps({'chapter': label, 'edges': edges}, ensure_ascii=False) + '\n'
+    # Eine einzelne write()-Operation mit O_APPEND; parallele Prozesse verschränken keine Zeilen
+    fd = os.open(PENDING_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o664)
+    try:
+        os.write(fd, line.encode('utf-8'))
+    finally:
+        os.close(fd)
+
+
+def _read_pending(path: str) -> Iterable[Tuple[int, int]]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    for source, target in json.loads(line)['edges']:
+                        yield source, target
+                except (ValueError, KeyError, TypeError):
+                    continue
+    except OSError:
+        return
+
+
+class CrossReferenceIndex:
+    """Kompakter Index: je Richtung zwei parallele, nach Schlüssel sortierte uint32-Arrays"""
+
+    def __init__(self, edges: Iterable[Tuple[int, int]] = ()):
+        pairs = sorted(set(edges))
+        self.sources = array('I', (source for source, _ in pairs))
+        self.targets = array('I', (target for _, target in pairs))
+        reverse = sorted((target, source) for source, target in pairs)
+        self.reverse_targets = array('I', (target for target, _ in reverse))
+        self.reverse_sources = array('I', (source for _, source in reverse))
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def edges(self) -> Iterable[Tuple[int, int]]:
+        return zip(self.sources, self.targets)
+
+    @staticmethod
+    def _lookup(keys: array, values: array, low: int, high: int) -> List[int]:
+        start = bisect_left(keys, low)
+        end = bisect_right(keys, high, start)
+        return list(values[start:end])
+
+    def references(self, low: int, high: Optional[int] = None) -> List[int]:
+        """Verweisziele der Verse low..high"""
+        return self._lookup(self.sources, self.targets, low, high if high is not None else low)
+
+    def referenced_by(self, low: int, high: Optional[int] = None) -> List[int]:
+        """Verse, die auf low..high verweisen"""
+        return self._lookup(self.reverse_targets, self.reverse_sources, low, high if high is not None else low)
+
+    def to_bytes(self) -> bytes:
+        parts = [HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(self))]
+        for values in (self.sources, self.targets, self.reverse_targets, self.reverse_sources):
+            chunk = array('I', values)
+            if sys.byteorder != 'little':
+                chunk.byteswap()
+            parts.append(chunk.tobytes())
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'CrossReferenceIndex':
+        magic, version, count = HEADER.unpack_from(data)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError("Unknown cross reference index format")
+        index = cls()
+        size = count * 4
+        offset = HEADER.size
+        for name in ('sources', 'targets', 'reverse_targets', 'reverse_sources'):
+            values = array('I')
+            values.frombytes(data[offset:offset + size])
+            if sys.byteorder != 'little':
+                values.byteswap()
+            setattr(index, name, values)
+            offset += size
+        return index
+
+
+def load_index(path: str = INDEX_FILE) -> CrossReferenceIndex:
+    try:
+        with open(path, 'rb') as f:
+            return CrossReferenceIndex.from_bytes(f.read())
+    except (OSError, ValueError, struct.error):
+        return CrossReferenceIndex()
+
+
+def compact(blocking: bool = True) -> Optional[int]:
+    """Log in den Index übernehmen; liefert die Anzahl Paare oder None, wenn gerade jemand anders kompaktiert"""
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    with open(os.path.join(INDEX_DIR, '.lock'), 'w') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            return None
+
+        # Log erst umbenennen, neue Einträge landen dann in einer frischen Datei
+        claimed = f"{PENDING_FILE}.{os.getpid()}"
+        try:
+            os.replace(PENDING_FILE, claimed)
+        except FileNotFoundError:
+            claimed = None
+
+        index = load_index()
+        if claimed is None:
+            return len(index)
+        merged = CrossReferenceIndex(list(index.edges()) + list(_read_pending(claimed)))
+
+        fd, tmp_path = tempfile.mkstemp(dir=INDEX_DIR, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(merged.to_bytes())
+            os.replace(tmp_path, INDEX_FILE)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        os.unlink(claimed)
+        return len(merged)
+
+
+_index: Optional[CrossReferenceIndex] = None
+
+
+def get_index() -> CrossReferenceIndex:
+    """Index einmal pro Prozess laden; noch nicht kompaktierte Log-Einträge sind enthalten"""
+    global _index
+    if _index is None:
+        pending = list(_read_pending(PENDING_FILE))
+        _index = load_index()
+        if pending:
+            _index = CrossReferenceIndex(list(_index.edges()) + pending)
+    return _index
+
+
+def format_ids(ids: Iterable[int]) -> List[str]:
+    """Vers-IDs als Stellenangaben, aufeinanderfolgende Verse zu Bereichen zusammengefasst"""
+    references = []
+    run: List[int] = []
+    for vid in sorted(set(ids)):
+        if run and vid == run[-1] + 1 and split_id(vid)[2] != 0:
+            run.append(vid)
+            continue
+        if run:
+            references.append(_format_run(run))
+        run = [vid]
+    if run:
+        references.append(_format_run(run))
+    return references
+
+
+def _format_run(run: List[int]) -> str:
+    book, chapter, verse = split_id(run[0])
+    name = BIBLE_BOOKS[book - 1] if 0 < book <= len(BIBLE_BOOKS) else str(book)
+    if verse == 0:
+        return f"{name} {chapter}"
+    if len(run) == 1:
+        return f"{name} {chapter},{verse}"
+    return f"{name} {chapter},{verse}-{split_id(run[-1])[2]}"
+
+
+def related(reference: str, limit: Optional[int] = None,
+            index: Optional[CrossReferenceIndex] = None) -> Dict:
+    """Verwandte Stellen: Verweise der Stelle und Stellen, die auf sie (oder ihr Kapitel) verweisen"""
+    parsed = parse_reference(reference)
+    book = book_number(parsed[0]) if parsed else None
+    if not book:
+        return {'error': f"Invalid reference format: {reference}"}
+
+    _, chapter, start, end = parsed
+    low, high = verse_id(book, chapter, start), verse_id(book, chapter, end or start)
+    index = index if index is not None else get_index()
+
+    # Verweise innerhalb der abgefragten Stelle selbst sind keine "verwandten" Stellen
+    outgoing = [vid for vid in index.references(low, high) if not low <= vid <= high]
+    incoming = [vid for vid in index.referenced_by(low, high) + index.referenced_by(verse_id(book, chapter))
+                if not low <= vid <= high]
+
+    references, referenced_by = format_ids(outgoing), format_ids(incoming)
+    if limit:
+        references, referenced_by = references[:limit], referenced_by[:limit]
+    return {
+        'reference': reference,
+        'references': references,
+        'referenced_by': referenced_by,
+        'indexed_pairs': len(index),
+    }
+
+
+def stats() -> Dict:
+    index = get_index()
+    try:
+        pending_bytes = os.path.getsize(PENDING_FILE)
+    except OSError:
+        pending_bytes = 0
+    try:
+        index_bytes = os.path.getsize(INDEX_FILE)
+    except OSError:
+        index_bytes = 0
+    try:
+        chapters = len(os.listdir(CHAPTER_DIR))
+    except OSError:
+        chapters = 0
+    return {
+        'chapters': chapters,
+        'pairs': len(index),
+        'verses_with_references': len(set(index.sources)),
+        'referenced_verses': len(set(index.reverse_targets)),
+        'index_bytes': index_bytes,
+        'pending_bytes': pending_bytes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Querverweis-Index (bibleserver.com)")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    related_parser = sub.add_parser('related', help="Verwandte Stellen einer Bibelstelle")
+    related_parser.add_argument('reference')
+    related_parser.add_argument('--limit', type=int, default=50)
+
+    sub.add_parser('compact', help="Log in den binären Index übernehmen")
+    sub.add_parser('stats', help="Größe des Index")
+
+    args = parser.parse_args()
+
+    if args.command == 'related':
+        result = related(args.reference, args.limit)
+    elif args.command == 'compact':
+        result = {'pairs': compact()}
+    else:
+        result = stats()
+    print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -316,31 +316,55 @@ class LosungenService {
      */
     private function fetchBibleText($reference, $translation) {
         $apiKey = $_SERVER['HTTP_X_API_KEY'] ?? $_GET['api_key'] ?? '';
+        // Gesamtbudget in Sekunden, inklusive Nachfragen bei der Scrape-Warteschlange
+        $budgetEnd = microtime(true) + 20;
 
         $params = http_build_query([
             'reference' => $reference,
             'translation' => $translation,
             'api_key' => $apiKey,
-            'format' => 'json'
+            'format' => 'json',
+            'async' => 1
         ]);
 
-        $context = stream_context_create([
-            'http' => ['timeout' => 20, 'ignore_errors' => true]
-        ]);
+        $decoded = $this->requestBibleSearch($params, $budgetEnd);
 
-        $response = @file_get_contents("http://localhost/bible_search.php?$params", false, $context);
+        // Langsamer Scrape: bible_search.php antwortet (async=1) nach kurzer Wartezeit mit 202 und Job-ID,
+        // der Auftrag läuft in der Warteschlange weiter; per Long-Poll bis zum Budgetende nachfragen
+        while ($decoded && !empty($decoded['pending']) && !empty($decoded['job_id'])) {
+            $left = $budgetEnd - microtime(true);
+            if ($left < 1) {
+                logDocker("[LOSUNGEN] WARNING: Scrape of $reference ($translation) still pending after budget");
+                return null;
+            }
+            $pollParams = http_build_query([
+                'job' => $decoded['job_id'],
+                'wait' => (int)min(10, $left - 1),
+                'api_key' => $apiKey,
+                'format' => 'json'
+            ]);
+            $decoded = $this->requestBibleSearch($pollParams, $budgetEnd);
+        }
 
-        if ($response === false) {
+        if (!$decoded || empty($decoded['success'])) {
             return null;
         }
 
-        $decoded = json_decode($response, true);
+        return $decoded['data'] ?? null;
+    }
 
-        if (!$decoded || empty($decoded['success'])) {
+    private function requestBibleSearch($params, $budgetEnd) {
+        $context = stream_context_create([
+            'http' => ['timeout' => max(1, $budgetEnd - microtime(true)), 'ignore_errors' => true]
+        ]);
+
+        $response = @file_get_contents("http://localhost/bible_search.php?$params", false, $context);
+
+        if ($response === false) {
             return null;
         }
 
-        return $decoded['data'] ?? null;
+        return json_decode($response, true);
     }
     
     private function enhanceWithBibleserver($data, $translation) {
@@ -0,0 +1,181 @@
+#!/opt/venv/bin/python3
+"""
+Tagescache für die geparste Losung von losungen.de
+Die Losung wechselt einmal am Tag; scraper.py lädt die Startseite deshalb nur beim ersten Aufruf
+eines Tages und alle weiteren Übersetzungsläufe lesen die geparste Losung aus diesem Cache.
+
+Schlüssel ist das Kalenderdatum in Europe/Berlin, der Wechsel passiert also automatisch um
+Mitternacht deutscher Zeit. Geschrieben wird atomar (temporäre Datei + os.replace), das erste
+Laden eines Tages ist per Dateisperre prozessübergreifend nur einmal unterwegs.
+
+Dateien: <SCRAPER_STATE_DIR>/losungen/<YYYY-MM-DD>.json, abschaltbar mit SCRAPER_LOSUNG_CACHE=0
+
+Verwendung:
+    python3 losung_cache.py [show|clear]
+"""
+
+import fcntl
+import glob
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from typing import Callable, Dict, Optional
+from zoneinfo import ZoneInfo
+
+import upstream
+from upstream import STATE_DIR
+
+CACHE_DIR = os.path.join(STATE_DIR, 'losungen')
+CACHE_ENABLED = os.environ.get('SCRAPER_LOSUNG_CACHE', '1') != '0'
+TIMEZONE = ZoneInfo('Europe/Berlin')
+
+# Ältere Tage werden beim Schreiben aufgeräumt
+KEEP_DAYS = 7
+
+# Maximale Wartezeit auf das Laden durch einen anderen Prozess, danach wird selbst geladen
+LOCK_WAIT = float(os.environ.get('SCRAPER_FLIGHT_WAIT', '15'))
+POLL_INTERVAL = 0.05
+
+GERMAN_MONTHS = {
+    'januar': 1, 'februar': 2, 'märz': 3, 'april': 4, 'mai': 5, 'juni': 6, 'juli': 7,
+    'august': 8, 'september': 9, 'oktober': 10, 'november': 11, 'dezember': 12,
+}
+NUMERIC_DATE_PATTERN = re.compile(r'(\d{1,2})\.\s*(\d{1,2})\.\s*(\d{4})')
+NAMED_DATE_PATTERN = re.compile(r'(\d{1,2})\.\s*([A-Za-zÄÖÜäöü]+)\s+(\d{4})')
+
+
+def today() -> date:
+    """Heutiges Datum in deutscher Zeit, unabhängig von der Zeitzone des Containers"""
+    return datetime.now(TIMEZONE).date()
+
+
+def page_date(text: Optional[str]) -> Optional[date]:
+    """Datum aus dem dateWrapper ("19.10.2026" oder "Montag, 19. Oktober 2026")"""
+    if not text:
+        return None
+    match = NUMERIC_DATE_PATTERN.search(text)
+    try:
+        if match:
+            return date(int(match.group(3)), int(match.group(2)), int(match.group(1)))
+        match = NAMED_DATE_PATTERN.search(text)
+        if match and match.group(2).lower() in GERMAN_MONTHS:
+            return date(int(match.group(3)), GERMAN_MONTHS[match.group(2).lower()], int(match.group(1)))
+    except ValueError:
+        pass
+    return None
+
+
+def _path(day: date) -> str:
+    return os.path.join(CACHE_DIR, day.isoformat() + '.json')
+
+
+def get(day: Optional[date] = None) -> Optional[Dict]:
+    try:
+        with open(_path(day or today()), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def put(data: Dict, day: Optional[date] = None):
+    day = day or today()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, _path(day))
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    _cleanup(day)
+
+
+def _cleanup(day: date):
+    for path in glob.glob(os.path.join(CACHE_DIR, '*.json')):
+        try:
+            if (day - date.fromisoformat(os.path.basename(path)[:-5])).days > KEEP_DAYS:
+                os.unlink(path)
+        except (OSError, ValueError):
+            pass
+
+
+def load(loader: Callable[[], Dict]) -> Dict:
+    """Losung des heutigen Tages aus dem Cache, sonst einmalig über loader() laden"""
+    if not CACHE_ENABLED:
+        return loader()
+
+    day = today()
+    cached = get(day)
+    if cached is not None:
+        return cached
+
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        lock = open(os.path.join(CACHE_DIR, '.lock'), 'w')
+    except OSError:
+        return loader()
+
+    with lock:
+        # Nicht länger warten, als LOCK_WAIT und das Zeitbudget des Aufrufs (--deadline-ms) erlauben;
+        # hängt der Abruf eines anderen Prozesses, lädt dieser Aufruf selbst
+        wait = LOCK_WAIT
+        left = upstream.remaining()
+        if left is not None:
+            wait = max(0.0, min(wait, left))
+        give_up = time.monotonic() + wait
+        while True:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except OSError:
+                if time.monotonic() >= give_up:
+                    return loader()
+                time.sleep(POLL_INTERVAL)
+                cached = get(day)
+                if cached is not None:
+                    return cached
+
+        # Ein anderer Prozess kann inzwischen geladen haben
+        cached = get(day)
+        if cached is not None:
+            return cached
+
+        result = loader()
+        if result and not result.get('error'):
+            # Kurz nach Mitternacht zeigt losungen.de evtl. noch den Vortag - dann nicht cachen
+            shown = page_date(result.get('date'))
+            if shown is None or shown == day:
+                try:
+                    put(result, day)
+                except OSError as e:
+                    print(f"Losung cache: write failed - {e}", file=sys.stderr)
+        return result
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else 'show'
+    if command == 'clear':
+        removed = 0
+        for path in glob.glob(os.path.join(CACHE_DIR, '*.json')):
+            os.unlink(path)
+            removed += 1
+        print(json.dumps({'removed': removed}))
+        return
+
+    print(json.dumps({
+        'date': today().isoformat(),
+        'cached': sorted(os.path.basename(path)[:-5] for path in glob.glob(os.path.join(CACHE_DIR, '*.json'))),
+        'today': get(),
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/opt/venv/bin/python3
+"""
+Opt-in-Profiling für einzelne Scraper-Aufrufe
+cProfile (pstats) und tracemalloc-Top-N pro Aufruf, aktiviert per --profile oder SCRAPER_PROFILE=1
+
+Dateien landen in SCRAPER_PROFILE_DIR (Standard: <SCRAPER_STATE_DIR>/profiles):
+    <zeit>_<pid>_<referenz>_<übersetzung>.pstats    cProfile-Daten
+    <zeit>_<pid>_<referenz>_<übersetzung>.mem.txt   Spitzenverbrauch und Top-N-Allokationen
+
+Auswertung:
+    python3 profiling.py [verzeichnis] [--top 20] [--filter Roemer] [--sort cumulative|tottime]
+"""
+
+import argparse
+import cProfile
+import glob
+import io
+import os
+import pstats
+import re
+import sys
+import time
+import tracemalloc
+from typing import List, Optional
+
+import upstream
+from upstream import STATE_DIR
+
+PROFILE_DIR = os.environ.get('SCRAPER_PROFILE_DIR', os.path.join(STATE_DIR, 'profiles'))
+PROFILE_ENABLED = os.environ.get('SCRAPER_PROFILE', '0') == '1'
+TOP_ALLOCATIONS = int(os.environ.get('SCRAPER_PROFILE_TOP', '25'))
+
+
+def _slug(label: str) -> str:
+    return re.sub(r'[^\w,.-]+', '_', label).strip('_')[:80]
+
+
+class ScrapeProfile:
+    """Profiliert einen Abschnitt; ohne enabled=True entstehen keinerlei Kosten"""
+
+    def __init__(self, label: str, enabled: bool = False):
+        self.label = label
+        self.enabled = enabled or PROFILE_ENABLED
+        self.profiler: Optional[cProfile.Profile] = None
+        self.started = 0.0
+        self.files: List[str] = []
+
+    def start(self):
+        if not self.enabled:
+            return self
+        tracemalloc.start(10)
+        self.profiler = cProfile.Profile()
+        self.started = time.perf_counter()
+        self.profiler.enable()
+        return self
+
+    def stop(self):
+        if not self.enabled or self.profiler is None:
+            return
+        self.profiler.disable()
+        elapsed = time.perf_counter() - self.started
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            base = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}_{_slug(self.label)}")
+
+            self.profiler.dump_stats(base + '.pstats')
+            self.files.append(base + '.pstats')
+
+            snapshot = snapshot.filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            ))
+            with open(base + '.mem.txt', 'w', encoding='utf-8') as f:
+                f.write(f"label: {self.label}\n")
+                f.write(f"elapsed_ms: {elapsed * 1000:.1f}\n")
+                f.write(f"peak_kb: {peak / 1024:.1f}\n")
+                f.write(f"current_kb: {current / 1024:.1f}\n")
+                f.write(f"bytes_read: {upstream.transfer_stats['bytes_read']}\n\n")
+                f.write(f"Top {TOP_ALLOCATIONS} Allokationen (nach Zeile):\n")
+                for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+                    f.write(f"{stat}\n")
+            self.files.append(base + '.mem.txt')
+        except OSError as e:
+            print(f"Profiling: could not write report - {e}", file=sys.stderr)
+        finally:
+            self.profiler = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+def _read_mem_header(path: str) -> dict:
+    header = {'file': os.path.basename(path)}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                break
+            key, _, value = line.partition(':')
+            header[key.strip()] = value.strip()
+    return header
+
+
+def summarize(directory: str, top: int = 20, name_filter: Optional[str] = None, sort: str = 'cumulative') -> str:
+    """Alle pstats-Dateien zusammenfassen und Speicherspitzen auflisten"""
+    pattern = f"*{name_filter}*" if name_filter else '*'
+    stats_files = sorted(glob.glob(os.path.join(directory, pattern + '.pstats')))
+    mem_files = sorted(glob.glob(os.path.join(directory, pattern + '.mem.txt')))
+
+    out = io.StringIO()
+    if not stats_files:
+        out.write(f"Keine Profile in {directory}\n")
+        return out.getvalue()
+
+    out.write(f"{len(stats_files)} Profile aus {directory}\n\n")
+    stats = pstats.Stats(stats_files[0], stream=out)
+    for path in stats_files[1:]:
+        stats.add(path)
+    stats.strip_dirs().sort_stats(sort).print_stats(top)
+
+    if mem_files:
+        headers = [_read_mem_header(path) for path in mem_files]
+        headers.sort(key=lambda h: float(h.get('peak_kb', 0)), reverse=True)
+        out.write("Speicherspitzen (tracemalloc):\n")
+        for header in headers[:top]:
+            out.write(f"  {header.get('peak_kb', '?'):>10} KB  {header.get('elapsed_ms', '?'):>9} ms  "
+                      f"{header.get('label', '')}  ({header['file']})\n")
+
+    return out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fasst Scraper-Profile (pstats + tracemalloc) zusammen")
+    parser.add_argument('directory', nargs='?', default=PROFILE_DIR)
+    parser.add_argument('--top', type=int, default=20, help="Anzahl Funktionen/Einträge")
+    parser.add_argument('--filter', help="Nur Profile, deren Dateiname diesen Text enthält")
+    parser.add_argument('--sort', choices=('cumulative', 'tottime', 'calls'), default='cumulative')
+    args = parser.parse_args()
+
+    print(summarize(args.directory, args.top, args.filter, args.sort))
+
+
+if __name__ == "__main__":
+    main()
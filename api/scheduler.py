@@ -0,0 +1,323 @@
+#!/opt/venv/bin/python3
+"""
+Prioritäten für Upstream-Abrufe: interaktiv vor Hintergrund
+Nutzeranfragen (bible_search.php, Warteschlange) laufen als "interactive", Warm-up-Läufe
+(daily_fetch.php, verse_cache.py warm, Probes, Crawler) als "background". Vor jedem
+Hintergrund-Abruf entscheidet admit() prozessübergreifend über STATE_DIR:
+
+    - laufen gerade interaktive Abrufe oder endete einer vor weniger als
+      SCRAPER_BACKGROUND_QUIET_MS, wartet der Hintergrund (Vorrang, auch zwischen den
+      Abrufen einer Nutzeranfrage)
+    - Hintergrund-Abrufe belegen höchstens SCRAPER_BACKGROUND_SLOTS gleichzeitige Slots
+    - steigt die p95 der letzten interaktiven Abrufe über SCRAPER_INTERACTIVE_P95_MS,
+      bleibt ein Slot mit Pause dazwischen; ab dem Doppelten pausiert der Hintergrund ganz
+      (höchstens SCRAPER_BACKGROUND_MAX_WAIT Sekunden, danach geht es mit einem Slot weiter)
+
+Interaktive Abrufe warten nie, sie hinterlassen nur eine Markierung und ihre Latenz.
+
+Priorität eines Aufrufs: --priority background (scraper.py, bible_scraper.py),
+SCRAPER_PRIORITY oder priority() für einzelne Jobs der Warteschlange.
+
+Verwendung:
+    python3 scheduler.py     # aktuelle Lage (p95, Stufe, belegte Slots)
+"""
+
+import asyncio
+import contextvars
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Optional, Set
+
+from upstream import STATE_DIR, DeadlineExceeded, LatencyTracker, remaining
+
+SCHEDULER_DIR = os.path.join(STATE_DIR, 'scheduler')
+INTERACTIVE_DIR = os.path.join(SCHEDULER_DIR, 'interactive')
+INTERACTIVE_LATENCY_FILE = os.path.join(SCHEDULER_DIR, 'interactive.json')
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+PRIORITIES = (INTERACTIVE, BACKGROUND)
+
+BACKGROUND_SLOTS = int(os.environ.get('SCRAPER_BACKGROUND_SLOTS', '2'))
+INTERACTIVE_P95_TARGET = float(os.environ.get('SCRAPER_INTERACTIVE_P95_MS', '1500')) / 1000
+BACKGROUND_MAX_WAIT = float(os.environ.get('SCRAPER_BACKGROUND_MAX_WAIT', '10'))
+INTERACTIVE_QUIET = float(os.environ.get('SCRAPER_BACKGROUND_QUIET_MS', '500')) / 1000
+
+# Nur die jüngsten interaktiven Abrufe zählen; ohne neue Messwerte gilt die Lage als entspannt
+INTERACTIVE_WINDOW = 50
+PRESSURE_MAX_AGE = 60
+# Markierungen abgestürzter Prozesse gelten danach nicht mehr als laufend (Sekunden)
+MARKER_MAX_AGE = 30
+POLL_INTERVAL = 0.05
+
+# Stufen der interaktiven Last
+NORMAL = 'normal'
+ELEVATED = 'elevated'
+OVERLOADED = 'overloaded'
+
+_default_priority = os.environ.get('SCRAPER_PRIORITY', INTERACTIVE)
+# Pro Job (Warteschlange) überschreibbar; None = Prozess-Standard
+_priority: contextvars.ContextVar = contextvars.ContextVar('scraper_priority', default=None)
+# Verschachtelte Abrufe (z.B. Hedge-Anfragen) nicht doppelt zulassen
+_admitted: contextvars.ContextVar = contextvars.ContextVar('scraper_admitted', default=False)
+
+
+def _valid(name: Optional[str]) -> str:
+    return name if name in PRIORITIES else INTERACTIVE
+
+
+def set_priority(name: Optional[str]):
+    """Priorität für den ganzen Prozess (Kommandozeilen-Aufrufe), gilt auch in Worker-Threads"""
+    global _default_priority
+    _default_priority = _valid(name)
+
+
+@contextmanager
+def priority(name: Optional[str]):
+    """Priorität für alle Abrufe innerhalb des Blocks"""
+    token = _priority.set(_valid(name) if name else None)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current() -> str:
+    return _priority.get() or _valid(_default_priority)
+
+
+_tracker: Optional[LatencyTracker] = None
+
+
+def get_tracker() -> LatencyTracker:
+    global _tracker
+    if _tracker is None:
+        _tracker = LatencyTracker(INTERACTIVE_LATENCY_FILE, INTERACTIVE_WINDOW)
+    return _tracker
+
+
+def interactive_p95() -> Optional[float]:
+    """p95 der jüngsten interaktiven Abrufe in Sekunden, None ohne aktuelle Messwerte"""
+    try:
+        if time.time() - os.path.getmtime(INTERACTIVE_LATENCY_FILE) > PRESSURE_MAX_AGE:
+            return None
+    except OSError:
+        return None
+    tracker = get_tracker()
+    # Andere Prozesse schreiben die Datei; für die Entscheidung frisch lesen
+    tracker.refresh()
+    return tracker.percentile(INTERACTIVE, 95)
+
+
+def pressure() -> str:
+    p95 = interactive_p95()
+    if p95 is None or p95 <= INTERACTIVE_P95_TARGET:
+        return NORMAL
+    return ELEVATED if p95 <= 2 * INTERACTIVE_P95_TARGET else OVERLOADED
+
+
+def interactive_in_flight() -> int:
+    try:
+        names = os.listdir(INTERACTIVE_DIR)
+    except OSError:
+        return 0
+    count = 0
+    cutoff = time.time() - MARKER_MAX_AGE
+    for name in names:
+        path = os.path.join(INTERACTIVE_DIR, name)
+        try:
+            if os.path.getmtime(path) >= cutoff:
+                count += 1
+            else:
+                os.unlink(path)
+        except OSError:
+            pass
+    return count
+
+
+def interactive_active() -> bool:
+    """Interaktiver Abruf läuft oder ist gerade erst beendet (Datei wird bei jedem Messwert geschrieben)"""
+    try:
+        if time.time() - os.path.getmtime(INTERACTIVE_LATENCY_FILE) < INTERACTIVE_QUIET:
+            return True
+    except OSError:
+        pass
+    return interactive_in_flight() > 0
+
+
+@contextmanager
+def _interactive(host: str):
+    marker = os.path.join(INTERACTIVE_DIR, f"{os.getpid()}-{threading.get_ident()}-{time.monotonic_ns()}")
+    try:
+        os.makedirs(INTERACTIVE_DIR, exist_ok=True)
+        open(marker, 'w').close()
+    except OSError:
+        marker = None
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        if marker:
+            try:
+                os.unlink(marker)
+            except OSError:
+                pass
+        get_tracker().record(INTERACTIVE, time.monotonic() - started)
+
+
+# Gerade belegte Slot-Dateien. Ein per fork erzeugter Kindprozess (z.B. der Parse-Pool des
+# Crawlers) erbt sie; hält er sie offen, bleibt die flock-Sperre nach dem Schließen im
+# Elternprozess bestehen und der Slot ist für immer belegt
+_held: Set = set()
+
+
+def _release_inherited():
+    for handle in list(_held):
+        handle.close()
+    _held.clear()
+
+
+os.register_at_fork(after_in_child=_release_inherited)
+
+
+def _try_slot(limit: int):
+    """Freien Hintergrund-Slot per nicht-blockierender Dateisperre belegen"""
+    for index in range(limit):
+        handle = open(os.path.join(SCHEDULER_DIR, f"background-{index}.lock"), 'w')
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return handle
+        except BlockingIOError:
+            handle.close()
+    return None
+
+
+def _check_wait(seconds: float):
+    left = remaining()
+    if left is not None and left <= seconds:
+        raise DeadlineExceeded("Deadline exceeded while waiting for a background slot")
+
+
+def _wait(seconds: float):
+    _check_wait(seconds)
+    time.sleep(seconds)
+
+
+def _poll_slot(waited_since: float):
+    """Ein Versuch, einen Hintergrund-Slot zu belegen: (Slot oder None, Pause danach)"""
+    level = pressure()
+    if time.monotonic() - waited_since > BACKGROUND_MAX_WAIT:
+        # Kein Verhungern: nach der Höchstwartezeit mit einem Slot weiter, ohne Vorrang-Prüfung
+        return _try_slot(1), 0.0
+    if level == OVERLOADED or interactive_active():
+        return None, 0.0
+    slot = _try_slot(BACKGROUND_SLOTS if level == NORMAL else 1)
+    if slot is not None and level == ELEVATED:
+        # Gedrosselt: Abstand in Höhe der aktuellen interaktiven p95
+        return slot, interactive_p95() or 0.0
+    return slot, 0.0
+
+
+@contextmanager
+def _background(host: str):
+    os.makedirs(SCHEDULER_DIR, exist_ok=True)
+    waited_since = time.monotonic()
+    slot, pause = _poll_slot(waited_since)
+    while slot is None:
+        _wait(POLL_INTERVAL)
+        slot, pause = _poll_slot(waited_since)
+
+    _held.add(slot)
+    try:
+        if pause:
+            _wait(pause)
+        yield
+    finally:
+        _held.discard(slot)
+        slot.close()
+
+
+@asynccontextmanager
+async def _background_async(host: str):
+    os.makedirs(SCHEDULER_DIR, exist_ok=True)
+    waited_since = time.monotonic()
+    slot, pause = _poll_slot(waited_since)
+    while slot is None:
+        # Warten ohne die Event-Loop zu blockieren
+        _check_wait(POLL_INTERVAL)
+        await asyncio.sleep(POLL_INTERVAL)
+        slot, pause = _poll_slot(waited_since)
+
+    _held.add(slot)
+    try:
+        if pause:
+            _check_wait(pause)
+            await asyncio.sleep(pause)
+        yield
+    finally:
+        _held.discard(slot)
+        slot.close()
+
+
+@contextmanager
+def admit(host: str):
+    """Um einen Upstream-Abruf legen: interaktiv messen, Hintergrund ggf. zurückstellen"""
+    if _admitted.get():
+        yield
+        return
+
+    token = _admitted.set(True)
+    try:
+        with (_background(host) if current() == BACKGROUND else _interactive(host)):
+            yield
+    finally:
+        _admitted.reset(token)
+
+
+@asynccontextmanager
+async def admit_async(host: str):
+    """admit() für asyncio: Hintergrund-Abrufe warten per asyncio.sleep"""
+    if _admitted.get():
+        yield
+        return
+
+    token = _admitted.set(True)
+    try:
+        if current() == BACKGROUND:
+            async with _background_async(host):
+                yield
+        else:
+            with _interactive(host):
+                yield
+    finally:
+        _admitted.reset(token)
+
+
+def status() -> Dict:
+    p95 = interactive_p95()
+    busy = 0
+    for index in range(BACKGROUND_SLOTS):
+        path = os.path.join(SCHEDULER_DIR, f"background-{index}.lock")
+        if not os.path.exists(path):
+            continue
+        with open(path, 'w') as handle:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                busy += 1
+    return {
+        'pressure': pressure(),
+        'interactive_p95_ms': int(p95 * 1000) if p95 is not None else None,
+        'interactive_target_ms': int(INTERACTIVE_P95_TARGET * 1000),
+        'interactive_in_flight': interactive_in_flight(),
+        'background_slots': BACKGROUND_SLOTS,
+        'background_busy': busy,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(status(), ensure_ascii=False))
@@ -0,0 +1,87 @@
+<?php
+
+/**
+ * Scrape läuft noch in der Warteschlange; der Client soll mit der Job-ID nachfragen
+ */
+class ScrapePendingException extends Exception {
+    private $jobId;
+
+    public function __construct($jobId) {
+        parent::__construct('Scrape in progress');
+        $this->jobId = $jobId;
+    }
+
+    public function getJobId() {
+        return $this->jobId;
+    }
+}
+
+/**
+ * Client für die asynchrone Scrape-Warteschlange (scrape_queue.py)
+ */
+class ScrapeQueueClient {
+    private $socketPath;
+    private $timeout;
+
+    public function __construct() {
+        $stateDir = getenv('SCRAPER_STATE_DIR') ?: '/tmp/ketiv_scraper';
+        $this->socketPath = getenv('SCRAPER_QUEUE_SOCKET') ?: $stateDir . '/queue.sock';
+        $this->timeout = 35; // etwas länger als die maximale Long-Poll-Dauer des Dienstes
+    }
+
+    /**
+     * Prüfe ob der Dienst läuft (Socket vorhanden)
+     */
+    public function isAvailable() {
+        return file_exists($this->socketPath);
+    }
+
+    /**
+     * Auftrag einreichen; wartet höchstens $wait Sekunden auf das Ergebnis
+     * $deadlineMs begrenzt die Gesamtdauer des Auftrags ab Einreichen (null = unbegrenzt)
+     * $priority: 'interactive' (Nutzeranfrage) oder 'background' (Warm-up, wird zurückgestellt)
+     */
+    public function submit($reference, $translation, $testament = null, $cacheReference = null, $wait = 0, $deadlineMs = null, $priority = 'interactive') {
+        return $this->request([
+            'op' => 'submit',
+            'reference' => $reference,
+            'translation' => $translation,
+            'testament' => $testament,
+            'cache_reference' => $cacheReference,
+            'wait' => $wait,
+            'deadline_ms' => $deadlineMs,
+            'priority' => $priority
+        ]);
+    }
+
+    /**
+     * Status/Ergebnis eines Auftrags (Long-Poll mit $wait Sekunden)
+     */
+    public function result($jobId, $wait = 0) {
+        return $this->request([
+            'op' => 'result',
+            'job_id' => $jobId,
+            'wait' => $wait
+        ]);
+    }
+
+    private function request($payload) {
+        $socket = @stream_socket_client('unix://' . $this->socketPath, $errno, $errstr, 2);
+        if (!$socket) {
+            error_log("Scrape Queue: Connection failed - $errstr");
+            return null;
+        }
+
+        stream_set_timeout($socket, $this->timeout);
+        fwrite($socket, json_encode($payload, JSON_UNESCAPED_UNICODE) . "\n");
+        $line = fgets($socket);
+        fclose($socket);
+
+        if ($line === false) {
+            error_log("Scrape Queue: No response");
+            return null;
+        }
+
+        return json_decode($line, true);
+    }
+}
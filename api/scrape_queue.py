@@ -0,0 +1,417 @@
+#!/opt/venv/bin/python3
+"""
+Asynchrone Scrape-Warteschlange für die PHP-API
+Nimmt Scrape-Aufträge über einen Unix-Socket entgegen, liefert sofort eine Job-ID und
+arbeitet die Aufträge in einem Worker-Pool ab. Fertige Ergebnisse werden in den
+Redis-Cache der API geschrieben (verse_cache.py), sodass die nächste Anfrage sie dort findet.
+
+Protokoll (eine JSON-Zeile pro Anfrage, eine JSON-Zeile als Antwort):
+    {"op": "submit", "reference": "Johannes 3,16", "translation": "LUT",
+     "testament": "NT", "cache_reference": "Joh 3,16", "wait": 2, "deadline_ms": 18000,
+     "priority": "interactive"}
+    {"op": "result", "job_id": "…", "wait": 10}
+    {"op": "stats"}
+
+Antwort: {"job_id", "status": queued|running|done|failed, "priority", "result"?, "error"?, "timed_out"?, "shed"?}
+"result" entspricht der Ausgabe von bible_scraper.py. "deadline_ms" ist das Gesamtbudget ab
+Einreichen (Warten in der Schlange eingeschlossen); zusammengefasste Aufträge behalten das
+Budget des ersten Auftrags.
+
+"priority" ist "interactive" (Standard) oder "background". Freie Worker nehmen immer zuerst
+wartende interaktive Aufträge; Hintergrund-Aufträge belegen höchstens drei Viertel der Worker
+und werden bei hoher interaktiver Latenz gedrosselt bzw. nach BACKGROUND_SHED_AFTER
+Sekunden Wartezeit verworfen ("shed": true). Ein interaktiver Auftrag, der einen wartenden
+Hintergrund-Auftrag trifft, hebt ihn auf interaktiv an.
+
+Verwendung:
+    python3 scrape_queue.py serve [--socket PFAD] [--workers 8]
+    python3 scrape_queue.py submit "Johannes 3,16" LUT [--wait 10] [--deadline-ms 18000]
+                                   [--priority background]
+    python3 scrape_queue.py result JOB_ID [--wait 10]
+    python3 scrape_queue.py stats
+"""
+
+import argparse
+import json
+import os
+import secrets
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional
+
+import capabilities
+import scheduler
+from bible_scraper import BibleScraper
+from upstream import STATE_DIR, DeadlineExceeded, deadline
+from verse_cache import VerseCache, api_payload, get_cache
+
+SOCKET_PATH = os.environ.get('SCRAPER_QUEUE_SOCKET', os.path.join(STATE_DIR, 'queue.sock'))
+WORKERS = int(os.environ.get('SCRAPER_QUEUE_WORKERS', '8'))
+
+# Fertige Jobs bleiben so lange abrufbar (Sekunden)
+RESULT_TTL = 600
+# Obergrenze für wartende Jobs; darüber werden neue Aufträge abgelehnt
+MAX_PENDING = 1000
+# Maximale Long-Poll-Dauer pro Anfrage (Sekunden)
+MAX_WAIT = 30.0
+# Wartende Hintergrund-Aufträge werden bei Überlast nach dieser Zeit verworfen (Sekunden)
+BACKGROUND_SHED_AFTER = float(os.environ.get('SCRAPER_QUEUE_SHED_AFTER', '60'))
+# Worker prüfen die Lastlage spätestens in diesem Abstand neu (Sekunden)
+DISPATCH_INTERVAL = 0.5
+
+
+class Job:
+    """Ein Scrape-Auftrag mit Status und Ergebnis"""
+
+    def __init__(self, reference: str, translation: str, testament: Optional[str],
+                 cache_reference: Optional[str], deadline_ms: Optional[float] = None,
+                 priority: str = scheduler.INTERACTIVE):
+        self.id = secrets.token_hex(8)
+        self.reference = reference
+        self.translation = translation
+        self.testament = testament
+        self.cache_reference = cache_reference
+        self.deadline_ms = deadline_ms
+        self.priority = priority
+        # Klasse, aus der ein Worker den Job genommen hat (zählt für running_background)
+        self.dispatched: Optional[str] = None
+        self.timed_out = False
+        self.shed = False
+        self.status = 'queued'
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.submitted = time.time()
+        self.finished: Optional[float] = None
+        self.done = threading.Event()
+
+    def to_dict(self) -> Dict:
+        data = {
+            'job_id': self.id,
+            'status': self.status,
+            'reference': self.reference,
+            'translation': self.translation,
+            'priority': self.priority,
+        }
+        if self.cache_reference:
+            data['cache_reference'] = self.cache_reference
+        if self.result is not None:
+            data['result'] = self.result
+        if self.error is not None:
+            data['error'] = self.error
+        if self.timed_out:
+            data['timed_out'] = True
+        if self.shed:
+            data['shed'] = True
+        if self.finished is not None:
+            data['duration_ms'] = int((self.finished - self.submitted) * 1000)
+        return data
+
+
+class ScrapeQueue:
+    """Worker-Pool mit zwei Prioritätsklassen; gleiche laufende Aufträge werden zusammengefasst"""
+
+    def __init__(self, workers: int = WORKERS, cache: Optional[VerseCache] = None):
+        self.workers = workers
+        # Mindestens ein Viertel der Worker (wenigstens einer) bleibt interaktiven Aufträgen vorbehalten
+        self.background_workers = max(1, workers - max(1, workers // 4))
+        self.cache = cache
+        self.scraper = BibleScraper(cache=cache)
+        self.jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self.active: Dict[tuple, Job] = {}
+        self.pending: Dict[str, Deque[Job]] = {priority: deque() for priority in scheduler.PRIORITIES}
+        self.running_background = 0
+        self.lock = threading.Lock()
+        self.available = threading.Condition(self.lock)
+        self.counters = {'submitted': 0, 'coalesced': 0, 'promoted': 0, 'done': 0, 'failed': 0,
+                         'rejected': 0, 'shed': 0, 'cached': 0}
+        for index in range(workers):
+            threading.Thread(target=self._work, name=f'scrape-{index}', daemon=True).start()
+
+    def submit(self, reference: str, translation: str, testament: Optional[str] = None,
+               cache_reference: Optional[str] = None, deadline_ms: Optional[float] = None,
+               priority: str = scheduler.INTERACTIVE) -> Job:
+        identity = (reference, translation, testament)
+        priority = priority if priority in scheduler.PRIORITIES else scheduler.INTERACTIVE
+        with self.lock:
+            self._expire()
+            existing = self.active.get(identity)
+            if existing is not None:
+                self.counters['coalesced'] += 1
+                if (priority == scheduler.INTERACTIVE and existing.priority == scheduler.BACKGROUND
+                        and existing.status == 'queued'):
+                    # Ein Nutzer wartet jetzt darauf: in die interaktive Schlange umhängen
+                    self.pending[scheduler.BACKGROUND].remove(existing)
+                    existing.priority = scheduler.INTERACTIVE
+                    self.pending[scheduler.INTERACTIVE].append(existing)
+                    self.counters['promoted'] += 1
+                    self.available.notify()
+                return existing
+
+            if sum(len(queue) for queue in self.pending.values()) >= MAX_PENDING:
+                self.counters['rejected'] += 1
+                raise OverflowError("Scrape queue full")
+
+            job = Job(reference, translation, testament, cache_reference, deadline_ms, priority)
+            self.jobs[job.id] = job
+            self.active[identity] = job
+            self.pending[priority].append(job)
+            self.counters['submitted'] += 1
+            self.available.notify()
+        return job
+
+    def get(self, job_id: str, wait: float = 0) -> Optional[Job]:
+        with self.lock:
+            job = self.jobs.get(job_id)
+        if job is not None and wait > 0:
+            job.done.wait(min(wait, MAX_WAIT))
+        return job
+
+    def stats(self) -> Dict:
+        with self.lock:
+            statuses: Dict[str, int] = {}
+            for job in self.jobs.values():
+                statuses[job.status] = statuses.get(job.status, 0) + 1
+            return {
+                'jobs': statuses,
+                'pending': {priority: len(queue) for priority, queue in self.pending.items()},
+                'running_background': self.running_background,
+                'scheduler': scheduler.status(),
+                'counters': dict(self.counters),
+                'cache_enabled': bool(self.cache and self.cache.enabled),
+            }
+
+    def _expire(self):
+        # Jobs sind in Einfüge-Reihenfolge gespeichert; abgelaufene stehen vorne
+        cutoff = time.time() - RESULT_TTL
+        while self.jobs:
+            job = next(iter(self.jobs.values()))
+            if job.finished is None or job.finished > cutoff:
+                break
+            self.jobs.popitem(last=False)
+
+    def _work(self):
+        while True:
+            with self.lock:
+                job = self._next_job()
+                while job is None:
+                    self.available.wait(DISPATCH_INTERVAL)
+                    job = self._next_job()
+            try:
+                self._run(job)
+            finally:
+                if job.dispatched == scheduler.BACKGROUND:
+                    with self.lock:
+                        self.running_background -= 1
+                        self.available.notify()
+
+    def _next_job(self) -> Optional[Job]:
+        """Nächster Auftrag (Lock gehalten): interaktiv zuerst, Hintergrund nur mit freier Kapazität"""
+        if self.pending[scheduler.INTERACTIVE]:
+            return self._dispatch(self.pending[scheduler.INTERACTIVE].popleft(), scheduler.INTERACTIVE)
+
+        background = self.pending[scheduler.BACKGROUND]
+        if not background:
+            return None
+
+        level = scheduler.pressure()
+        if level == scheduler.OVERLOADED:
+            self._shed(background)
+            return None
+        limit = self.background_workers if level == scheduler.NORMAL else 1
+        if self.running_background >= limit:
+            return None
+        self.running_background += 1
+        return self._dispatch(background.popleft(), scheduler.BACKGROUND)
+
+    def _dispatch(self, job: Job, priority: str) -> Job:
+        # Noch unter dem Lock: ein gleichzeitiges submit() darf den Job nicht mehr umhängen
+        job.status = 'running'
+        job.dispatched = priority
+        return job
+
+    def _shed(self, background: Deque[Job]):
+        cutoff = time.time() - BACKGROUND_SHED_AFTER
+        while background and background[0].submitted < cutoff:
+            job = background.popleft()
+            job.status = 'failed'
+            job.shed = True
+            job.error = "Shed: interactive latency too high"
+            job.finished = time.time()
+            self.counters['failed'] += 1
+            self.counters['shed'] += 1
+            identity = (job.reference, job.translation, job.testament)
+            if self.active.get(identity) is job:
+                del self.active[identity]
+            job.done.set()
+
+    def _run(self, job: Job):
+        budget = None
+        if job.deadline_ms:
+            # Das Budget läuft ab Einreichen, die Wartezeit in der Schlange zählt mit
+            budget = max(job.deadline_ms - (time.time() - job.submitted) * 1000, 0.001)
+        try:
+            with deadline(budget), scheduler.priority(job.priority):
+                result = self._scrape(job)
+        except DeadlineExceeded:
+            job.timed_out = True
+            result = {"error": f"Deadline of {job.deadline_ms:.0f} ms exceeded"}
+        except Exception as e:
+            result = {"error": f"Scraper exception: {e}"}
+
+        if 'error' in result:
+            job.error = result['error']
+            job.status = 'failed'
+        else:
+            job.result = result
+            job.status = 'done'
+            # BibleScraper schreibt unter der Scraper-Referenz; PHP sucht unter der Eingabe des Nutzers
+            if (self.cache is not None and job.cache_reference and job.cache_reference != job.reference
+                    and self.cache.set(job.cache_reference, job.translation, api_payload(result))):
+                self.counters['cached'] += 1
+
+        job.finished = time.time()
+        with self.lock:
+            self.counters[job.status] += 1
+            identity = (job.reference, job.translation, job.testament)
+            if self.active.get(identity) is job:
+                del self.active[identity]
+        job.done.set()
+
+    def _scrape(self, job: Job) -> Dict:
+        """Wie bible_scraper.py main(), nur ohne eigenen Prozess"""
+        parsed_ref = self.scraper.parse_reference(job.reference)
+        if not parsed_ref:
+            return {"error": f"Invalid reference format: {job.reference}"}
+
+        unsupported = capabilities.check(job.translation, parsed_ref)
+        if unsupported:
+            return {"error": unsupported}
+
+        result = self.scraper.scrape_reference(job.reference, job.translation, job.testament)
+        if not result:
+            return {"error": f"Failed to scrape {job.reference} in {job.translation}"}
+        return result
+
+
+class QueueRequestHandler(socketserver.StreamRequestHandler):
+    queue: ScrapeQueue = None
+
+    def handle(self):
+        for line in self.rfile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                response = self.dispatch(json.loads(line))
+            except ValueError:
+                response = {"error": "Invalid JSON"}
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+    def dispatch(self, request: Dict) -> Dict:
+        op = request.get('op')
+        wait = float(request.get('wait') or 0)
+
+        if op == 'submit':
+            if not request.get('reference') or not request.get('translation'):
+                return {"error": "Missing reference or translation"}
+            try:
+                job = self.queue.submit(request['reference'], request['translation'],
+                                        request.get('testament'), request.get('cache_reference'),
+                                        float(request['deadline_ms']) if request.get('deadline_ms') else None,
+                                        request.get('priority') or scheduler.INTERACTIVE)
+            except OverflowError as e:
+                return {"error": str(e)}
+            if wait > 0:
+                job.done.wait(min(wait, MAX_WAIT))
+            return job.to_dict()
+
+        if op == 'result':
+            job = self.queue.get(str(request.get('job_id')), wait)
+            if job is None:
+                return {"error": "Unknown job_id", "job_id": request.get('job_id')}
+            return job.to_dict()
+
+        if op == 'stats':
+            return self.queue.stats()
+
+        return {"error": f"Unknown op: {op}"}
+
+
+class QueueServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(socket_path: str, workers: int):
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    QueueRequestHandler.queue = ScrapeQueue(workers, get_cache())
+    with QueueServer(socket_path, QueueRequestHandler) as server:
+        os.chmod(socket_path, 0o660)
+        print(f"Scrape queue listening on {socket_path} ({workers} workers)", file=sys.stderr)
+        server.serve_forever()
+
+
+def request(payload: Dict, socket_path: str = SOCKET_PATH, timeout: float = MAX_WAIT + 5) -> Dict:
+    """Eine Anfrage an den laufenden Dienst senden"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(socket_path)
+        client.sendall(json.dumps(payload, ensure_ascii=False).encode('utf-8') + b'\n')
+        data = b''
+        while not data.endswith(b'\n'):
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    return json.loads(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Asynchrone Scrape-Warteschlange")
+    parser.add_argument('--socket', default=SOCKET_PATH, help="Pfad des Unix-Sockets")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = sub.add_parser('serve', help="Dienst starten")
+    serve_parser.add_argument('--workers', type=int, default=WORKERS)
+
+    submit_parser = sub.add_parser('submit', help="Auftrag einreichen")
+    submit_parser.add_argument('reference')
+    submit_parser.add_argument('translation')
+    submit_parser.add_argument('testament', nargs='?')
+    submit_parser.add_argument('--wait', type=float, default=0)
+    submit_parser.add_argument('--deadline-ms', type=float, help="Gesamtbudget des Auftrags")
+    submit_parser.add_argument('--priority', choices=scheduler.PRIORITIES, default=scheduler.INTERACTIVE)
+
+    result_parser = sub.add_parser('result', help="Status/Ergebnis abfragen")
+    result_parser.add_argument('job_id')
+    result_parser.add_argument('--wait', type=float, default=0)
+
+    sub.add_parser('stats', help="Statistik des Dienstes")
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve(args.socket, args.workers)
+        return
+
+    if args.command == 'submit':
+        payload = {'op': 'submit', 'reference': args.reference, 'translation': args.translation,
+                   'testament': args.testament, 'wait': args.wait, 'deadline_ms': args.deadline_ms,
+                   'priority': args.priority}
+    elif args.command == 'result':
+        payload = {'op': 'result', 'job_id': args.job_id, 'wait': args.wait}
+    else:
+        payload = {'op': 'stats'}
+
+    print(json.dumps(request(payload, args.socket), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
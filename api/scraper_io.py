@@ -0,0 +1,150 @@
+#!/opt/venv/bin/python3
+"""
+Ein- und Ausgabe der Scraper-Prozesse
+Gemeinsame CLI-Optionen und Ausgabeformate (JSON, MessagePack) für scraper.py und bible_scraper.py
+
+Ausgabeformate (--format):
+    json     Standard. Ein JSON-Objekt pro Aufruf, UTF-8, ensure_ascii=False.
+    msgpack  Dasselbe Objekt als MessagePack-Map (Schema-Version 1):
+             - Schlüssel und Texte als UTF-8 str, Versnummern als int, null als nil
+             - zusätzlicher Schlüssel "format_version": 1
+             - alle übrigen Felder identisch zur JSON-Ausgabe, d.h. für bible_scraper.py
+               reference, text, translation{code,name,language}, source, url, testament,
+               verses[{number, text, optional, suffix?}],
+               formats{text, html, markdown} (vorgerendert, siehe verse_formats.py)
+               bzw. error bei Fehlern
+             PHP: msgpack_unpack($output) liefert dasselbe Array wie json_decode($output, true).
+
+Benchmark gegen JSON auf gespeicherten Ergebnissen:
+    python3 scraper_io.py bench kapitel1.json [kapitel2.json ...]
+"""
+
+import json
+import sys
+import time
+from typing import Dict, List, Optional
+
+try:
+    import msgpack
+except ImportError:  # optional, nur für --format msgpack nötig
+    msgpack = None
+
+FORMATS = ('json', 'msgpack')
+MSGPACK_FORMAT_VERSION = 1
+
+
+def pop_option(argv: List[str], name: str, default: Optional[str] = None) -> Optional[str]:
+    """
+    Entfernt eine Option (--name wert oder --name=wert) aus argv und liefert ihren Wert
+
+    Die Scraper lesen ihre Positionsargumente weiterhin über sys.argv, daher werden
+    Optionen vorher herausgelöst statt auf argparse umzustellen.
+    """
+    flag = f'--{name}'
+    for index, arg in enumerate(argv):
+        if arg == flag and index + 1 < len(argv):
+            value = argv[index + 1]
+            del argv[index:index + 2]
+            return value
+        if arg.startswith(flag + '='):
+            del argv[index]
+            return arg[len(flag) + 1:]
+    return default
+
+
+def pop_flag(argv: List[str], name: str) -> bool:
+    """Entfernt einen Schalter ohne Wert (--name) aus argv und meldet, ob er gesetzt war"""
+    flag = f'--{name}'
+    if flag in argv:
+        argv.remove(flag)
+        return True
+    return False
+
+
+def encode(result: Dict, fmt: str = 'json') -> bytes:
+    """Ergebnis im gewünschten Format kodieren"""
+    if fmt == 'msgpack':
+        if msgpack is None:
+            raise RuntimeError("msgpack not installed")
+        payload = dict(result)
+        payload['format_version'] = MSGPACK_FORMAT_VERSION
+        return msgpack.packb(payload, use_bin_type=True)
+    return json.dumps(result, ensure_ascii=False).encode('utf-8')
+
+
+def decode(data: bytes, fmt: str = 'json') -> Dict:
+    if fmt == 'msgpack':
+        if msgpack is None:
+            raise RuntimeError("msgpack not installed")
+        return msgpack.unpackb(data, raw=False)
+    return json.loads(data.decode('utf-8'))
+
+
+def emit(result: Dict, fmt: str = 'json'):
+    """Ergebnis auf stdout ausgeben; ohne msgpack-Modul fällt die Ausgabe auf JSON zurück"""
+    if fmt not in FORMATS:
+        result = {"error": f"Unsupported format: {fmt}", "available_formats": list(FORMATS)}
+        fmt = 'json'
+    elif fmt == 'msgpack' and msgpack is None:
+        result = {"error": "Format msgpack requires the msgpack package"}
+        fmt = 'json'
+
+    if fmt == 'json':
+        print(json.dumps(result, ensure_ascii=False))
+        return
+
+    sys.stdout.buffer.write(encode(result, fmt))
+    sys.stdout.buffer.flush()
+
+
+def benchmark(results: List[Dict], rounds: int = 200) -> Dict:
+    """Größe sowie Encode-/Decode-Zeit von JSON und MessagePack vergleichen"""
+    report = {'results': len(results), 'rounds': rounds}
+    formats = [fmt for fmt in FORMATS if fmt == 'json' or msgpack is not None]
+
+    for fmt in formats:
+        encoded = [encode(result, fmt) for result in results]
+
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for result in results:
+                encode(result, fmt)
+        encode_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for data in encoded:
+                decode(data, fmt)
+        decode_time = time.perf_counter() - started
+
+        calls = rounds * len(results)
+        report[fmt] = {
+            'bytes': sum(len(data) for data in encoded),
+            'encode_us': round(encode_time / calls * 1e6, 2),
+            'decode_us': round(decode_time / calls * 1e6, 2)
+        }
+
+    if 'msgpack' in report:
+        report['size_ratio'] = round(report['msgpack']['bytes'] / report['json']['bytes'], 3)
+
+    return report
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] != 'bench':
+        print(json.dumps({
+            "error": "Usage: python3 scraper_io.py bench result.json [result.json ...]",
+            "hint": "result.json = gespeicherte Ausgabe von bible_scraper.py, z.B. eines ganzen Kapitels"
+        }, ensure_ascii=False))
+        return
+
+    results = []
+    for path in sys.argv[2:]:
+        with open(path, 'r', encoding='utf-8') as f:
+            results.append(json.load(f))
+
+    print(json.dumps(benchmark(results), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/opt/venv/bin/python3
+"""
+Prozessübergreifendes Request-Coalescing (Single-Flight) für Upstream-Seiten
+Der erste Aufrufer lädt die Seite, parallele Aufrufer warten auf dessen Ergebnisdatei.
+run_async() macht dasselbe für asyncio; Tasks desselben Prozesses teilen sich zusätzlich einen Future.
+"""
+
+import asyncio
+import fcntl
+import hashlib
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import upstream
+from upstream import STATE_DIR
+
+FLIGHT_DIR = os.path.join(STATE_DIR, 'flights')
+
+# Wie lange ein Ergebnis für nachfolgende Aufrufer gültig bleibt (Sekunden)
+RESULT_TTL = int(os.environ.get('SCRAPER_FLIGHT_TTL', '30'))
+
+# Fehlerantworten (kein HTTP 200) nur an gerade Wartende weitergeben, nicht für volle TTL
+ERROR_TTL = 1
+
+# Maximale Wartezeit auf einen fremden Fetch, danach wird selbst geladen
+WAIT_TIMEOUT = float(os.environ.get('SCRAPER_FLIGHT_WAIT', '15'))
+POLL_INTERVAL = 0.05
+
+# Aufräumen abgelaufener Dateien (Sekunden)
+CLEANUP_AGE = 3600
+
+
+def flight_key(source: str, translation: str, book: str, chapter, extra: str = '') -> str:
+    """Schlüssel aus (Quelle, Übersetzung, Buch, Kapitel)"""
+    raw = f"{source}|{translation}|{book}|{chapter}|{extra}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _paths(key: str) -> Tuple[str, str]:
+    return (os.path.join(FLIGHT_DIR, key + '.lock'), os.path.join(FLIGHT_DIR, key + '.result'))
+
+
+def _read_fresh(path: str) -> Optional[Dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - data.get('created', 0) > data.get('ttl', RESULT_TTL):
+        return None
+    return data
+
+
+def _write_result(path: str, data: Dict):
+    fd, tmp_path = tempfile.mkstemp(dir=FLIGHT_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def _cleanup():
+    now = time.time()
+    try:
+        for name in os.listdir(FLIGHT_DIR):
+            path = os.path.join(FLIGHT_DIR, name)
+            try:
+                if now - os.path.getmtime(path) > CLEANUP_AGE:
+                    os.unlink(path)
+            except OSError:
+                continue
+    except OSError:
+        pass
+
+
+def _wait_limit() -> float:
+    """Nicht länger warten, als das Zeitbudget des Aufrufs erlaubt"""
+    wait = WAIT_TIMEOUT
+    left = upstream.remaining()
+    if left is not None:
+        wait = max(0.0, min(wait, left))
+    return time.monotonic() + wait
+
+
+def _store(result_path: str, status: int, body: str):
+    ttl = RESULT_TTL if status == 200 else ERROR_TTL
+    _write_result(result_path, {'created': time.time(), 'ttl': ttl, 'status': status, 'body': body})
+    if random.random() < 0.02:
+        _cleanup()
+
+
+def run(key: str, loader: Callable[[], Tuple[int, str]]) -> Tuple[int, str]:
+    """
+    Führt loader() höchstens einmal pro Schlüssel gleichzeitig aus
+
+    loader liefert (HTTP-Status, Seiteninhalt). Während ein Prozess lädt, warten
+    alle anderen mit demselben Schlüssel auf die Ergebnisdatei und verwenden sie.
+    Exceptions des Loaders werden nicht geteilt, sondern an den eigenen Aufrufer
+    weitergereicht.
+    """
+    lock_path, result_path = _paths(key)
+
+    cached = _read_fresh(result_path)
+    if cached is not None:
+        return cached['status'], cached['body']
+
+    try:
+        os.makedirs(FLIGHT_DIR, exist_ok=True)
+        lock_file = open(lock_path, 'a')
+    except OSError:
+        # Ohne beschreibbares Verzeichnis kein Coalescing, aber weiterhin funktionsfähig
+        return loader()
+
+    with lock_file:
+        deadline = _wait_limit()
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    return loader()
+                time.sleep(POLL_INTERVAL)
+                cached = _read_fresh(result_path)
+                if cached is not None:
+                    return cached['status'], cached['body']
+
+        try:
+            # Ein anderer Prozess kann fertig geworden sein, während wir auf den Lock gewartet haben
+            cached = _read_fresh(result_path)
+            if cached is not None:
+                return cached['status'], cached['body']
+
+            status, body = loader()
+            _store(result_path, status, body)
+            return status, body
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+# Laufende Ladevorgänge dieses Prozesses, pro (Event-Loop, Schlüssel)
+_inflight: Dict[Tuple[asyncio.AbstractEventLoop, str], asyncio.Future] = {}
+
+
+async def run_async(key: str, loader: Callable[[], Awaitable[Tuple[int, str]]]) -> Tuple[int, str]:
+    """
+    run() für asyncio: loader ist eine Coroutine-Funktion
+
+    Tasks derselben Event-Loop warten auf den Future des ersten Tasks statt auf die
+    Datei. Scheitert dieser, lädt jeder Wartende selbst (Exceptions werden nicht geteilt).
+    """
+    loop = asyncio.get_running_loop()
+    slot = (loop, key)
+    shared = _inflight.get(slot)
+    if shared is not None:
+        result = await asyncio.shield(shared)
+        if result is not None:
+            return result
+        return await _run_async(key, loader)
+
+    future = loop.create_future()
+    _inflight[slot] = future
+    result = None
+    try:
+        result = await _run_async(key, loader)
+        return result
+    finally:
+        _inflight.pop(slot, None)
+        future.set_result(result)
+
+
+async def _run_async(key: str, loader: Callable[[], Awaitable[Tuple[int, str]]]) -> Tuple[int, str]:
+    lock_path, result_path = _paths(key)
+
+    cached = _read_fresh(result_path)
+    if cached is not None:
+        return cached['status'], cached['body']
+
+    try:
+        os.makedirs(FLIGHT_DIR, exist_ok=True)
+        lock_file = open(lock_path, 'a')
+    except OSError:
+        return await loader()
+
+    with lock_file:
+        deadline = _wait_limit()
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    return await loader()
+                await asyncio.sleep(POLL_INTERVAL)
+                cached = _read_fresh(result_path)
+                if cached is not None:
+                    return cached['status'], cached['body']
+
+        try:
+            cached = _read_fresh(result_path)
+            if cached is not None:
+                return cached['status'], cached['body']
+
+            status, body = await loader()
+            _store(result_path, status, body)
+            return status, body
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,413 @@
+#!/opt/venv/bin/python3
+"""
+Cache-Snapshot für einen warmen Containerstart
+Nach jedem Deploy beginnen Verse-Cache, Losungs-Cache, Querverweise und Fähigkeiten-Matrix leer,
+und die ersten Anfragen lösen eine Welle von Upstream-Abrufen aus. Ein Snapshot fasst diesen
+Zustand in einer kompakten, versionierten Datei mit Prüfsummen zusammen, die ins Image gebacken
+oder beim Start gemountet wird.
+
+Format (Little Endian):
+    Kopf      KSNP, Version, Anzahl Abschnitte, Erstellzeit, SHA-256 der Abschnittstabelle
+    Tabelle   je Abschnitt Name, Offset, Länge, Anzahl Einträge, SHA-256 des Inhalts
+    verses    sortierte Schlüsseltabelle (MD5 des Cache-Schlüssels, TTL, Offset, Länge), dahinter
+              die einzeln zlib-komprimierten Cache-Werte - Einzelabruf per Binärsuche im mmap
+    losungen, capabilities   zlib-komprimiertes JSON
+    crossrefs                zlib-komprimierter index.bin
+
+import prüft zuerst alle Prüfsummen und lädt dann in einem Rutsch: Verse per Pipeline nach Redis
+(die TTL zählt ab dem Import, Bibeltexte ändern sich nie), Losungen und Matrix nur, wo lokal
+nichts Neueres liegt, Querverweise werden mit dem lokalen Index zusammengeführt.
+
+Mit SCRAPER_SNAPSHOT=<datei> liest der Verse-Cache Fehltreffer zusätzlich direkt aus der
+gemappten Datei, Anfragen sind also auch vor dem Import oder ohne Redis warm.
+
+Verwendung:
+    python3 snapshot.py export cache.snap [--sections verses,losungen,capabilities,crossrefs]
+    python3 snapshot.py import cache.snap
+    python3 snapshot.py verify cache.snap
+    python3 snapshot.py info cache.snap
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MAGIC = b'KSNP'
+VERSION = 1
+HEADER = struct.Struct('<4sHHd32s')
+SECTION = struct.Struct('<16sQQI32s')
+VERSE_ENTRY = struct.Struct('<16sIII')
+COUNT = struct.Struct('<I')
+
+SECTIONS = ('verses', 'losungen', 'capabilities', 'crossrefs')
+COMPRESSION_LEVEL = 9
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _digest(data) -> bytes:
+    return hashlib.sha256(data).digest()
+
+
+def _key_digest(key: str) -> bytes:
+    """bible:<md5-hex> -> 16 Bytes"""
+    return bytes.fromhex(key.split(':', 1)[1])
+
+
+def _pack_json(data) -> bytes:
+    return zlib.compress(json.dumps(data, ensure_ascii=False).encode('utf-8'), COMPRESSION_LEVEL)
+
+
+def _unpack_json(data) -> object:
+    return json.loads(zlib.decompress(data))
+
+
+# --- Export -------------------------------------------------------------------------------------
+
+def _export_verses() -> Optional[Tuple[bytes, int]]:
+    from verse_cache import get_cache
+
+    cache = get_cache()
+    if cache is None or not cache.enabled:
+        print("Snapshot: verse cache not available, skipping verses", file=sys.stderr)
+        return None
+
+    entries: List[Tuple[bytes, int, bytes]] = []
+    for key, ttl, raw in cache.scan():
+        try:
+            entries.append((_key_digest(key), ttl, zlib.compress(raw, COMPRESSION_LEVEL)))
+        except ValueError:
+            continue
+    entries.sort()
+
+    table = [COUNT.pack(len(entries))]
+    blob = []
+    offset = 0
+    for digest, ttl, value in entries:
+        table.append(VERSE_ENTRY.pack(digest, ttl, offset, len(value)))
+        blob.append(value)
+        offset += len(value)
+    return b''.join(table + blob), len(entries)
+
+
+def _export_losungen() -> Optional[Tuple[bytes, int]]:
+    import losung_cache
+
+    days = {}
+    for path in sorted(glob.glob(os.path.join(losung_cache.CACHE_DIR, '*.json'))):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                days[os.path.basename(path)[:-5]] = json.load(f)
+        except (OSError, ValueError):
+            continue
+    return (_pack_json(days), len(days)) if days else None
+
+
+def _export_capabilities() -> Optional[Tuple[bytes, int]]:
+    import capabilities
+
+    matrix = capabilities.load()
+    return (_pack_json(matrix), len(matrix.get('translations', {}))) if matrix else None
+
+
+def _export_crossrefs() -> Optional[Tuple[bytes, int]]:
+    import cross_references
+
+    # Log vorher übernehmen, damit der Snapshot auch frische Paare enthält
+    count = cross_references.compact()
+    try:
+        with open(cross_references.INDEX_FILE, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    return zlib.compress(data, COMPRESSION_LEVEL), count or 0
+
+
+EXPORTERS = {
+    'verses': _export_verses,
+    'losungen': _export_losungen,
+    'capabilities': _export_capabilities,
+    'crossrefs': _export_crossrefs,
+}
+
+
+def write_snapshot(path: str, sections: Dict[str, Tuple[bytes, int]]):
+    """Abschnitte atomar als Snapshot-Datei schreiben"""
+    table = []
+    offset = HEADER.size + SECTION.size * len(sections)
+    for name, (data, entries) in sections.items():
+        table.append(SECTION.pack(name.encode('ascii'), offset, len(data), entries, _digest(data)))
+        offset += len(data)
+    table_bytes = b''.join(table)
+    header = HEADER.pack(MAGIC, VERSION, len(sections), time.time(), _digest(table_bytes))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(table_bytes)
+            for data, _ in sections.values():
+                f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def export(path: str, names: Iterable[str] = SECTIONS) -> Dict:
+    sections = {}
+    for name in names:
+        result = EXPORTERS[name]()
+        if result is not None:
+            sections[name] = result
+    write_snapshot(path, sections)
+    return {name: entries for name, (_, entries) in sections.items()}
+
+
+# --- Lesen --------------------------------------------------------------------------------------
+
+class Snapshot:
+    """Snapshot-Datei per mmap; Kopf und Tabelle werden beim Öffnen geprüft, Inhalte mit verify()"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, count, self.created_at, table_digest = HEADER.unpack_from(self.data)
+        except struct.error:
+            raise SnapshotError("Snapshot too short")
+        if magic != MAGIC:
+            raise SnapshotError("Not a cache snapshot")
+        if version != VERSION:
+            raise SnapshotError(f"Unsupported snapshot version {version}")
+
+        table = self.data[HEADER.size:HEADER.size + SECTION.size * count]
+        if _digest(table) != table_digest:
+            raise SnapshotError("Snapshot section table checksum mismatch")
+
+        self.sections: Dict[str, Tuple[int, int, int, bytes]] = {}
+        for index in range(count):
+            name, offset, length, entries, digest = SECTION.unpack_from(table, index * SECTION.size)
+            if offset + length > len(self.data):
+                raise SnapshotError("Snapshot truncated")
+            self.sections[name.rstrip(b'\0').decode('ascii')] = (offset, length, entries, digest)
+
+        self._verses = self.sections.get('verses')
+        self._verse_count = COUNT.unpack_from(self.data, self._verses[0])[0] if self._verses else 0
+
+    def close(self):
+        self.data.close()
+
+    def section(self, name: str) -> Optional[bytes]:
+        if name not in self.sections:
+            return None
+        offset, length, _, _ = self.sections[name]
+        return self.data[offset:offset + length]
+
+    def verify(self) -> List[str]:
+        """Namen der Abschnitte, deren Prüfsumme nicht stimmt"""
+        return [name for name, (_, _, _, digest) in self.sections.items()
+                if _digest(self.section(name)) != digest]
+
+    def _verse_entry(self, index: int) -> Tuple[bytes, int, int, int]:
+        return VERSE_ENTRY.unpack_from(self.data, self._verses[0] + COUNT.size + index * VERSE_ENTRY.size)
+
+    def _verse_value(self, offset: int, length: int) -> bytes:
+        start = self._verses[0] + COUNT.size + self._verse_count * VERSE_ENTRY.size + offset
+        return zlib.decompress(self.data[start:start + length])
+
+    def verse(self, key: str) -> Optional[bytes]:
+        """Rohwert eines Verse-Cache-Schlüssels per Binärsuche, ohne den Abschnitt zu lesen"""
+        if not self._verse_count:
+            return None
+        try:
+            digest = _key_digest(key)
+        except (ValueError, IndexError):
+            return None
+        low, high = 0, self._verse_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._verse_entry(middle)[0] < digest:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self._verse_count:
+            return None
+        found, _, offset, length = self._verse_entry(low)
+        if found != digest:
+            return None
+        try:
+            return self._verse_value(offset, length)
+        except zlib.error:
+            return None
+
+    def verses(self) -> Iterable[Tuple[str, int, bytes]]:
+        for index in range(self._verse_count):
+            digest, ttl, offset, length = self._verse_entry(index)
+            yield 'bible:' + digest.hex(), ttl, self._verse_value(offset, length)
+
+    def json_section(self, name: str) -> Optional[object]:
+        data = self.section(name)
+        return _unpack_json(data) if data is not None else None
+
+    def info(self) -> Dict:
+        return {
+            'path': self.path,
+            'version': VERSION,
+            'created_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.created_at)),
+            'size': len(self.data),
+            'sections': {name: {'entries': entries, 'bytes': length}
+                         for name, (_, length, entries, _) in self.sections.items()},
+        }
+
+
+_reader: Optional[Snapshot] = None
+_reader_loaded = False
+
+
+def get_reader() -> Optional[Snapshot]:
+    """Snapshot aus SCRAPER_SNAPSHOT einmal pro Prozess öffnen, None ohne (gültige) Datei"""
+    global _reader, _reader_loaded
+    if not _reader_loaded:
+        _reader_loaded = True
+        path = os.environ.get('SCRAPER_SNAPSHOT')
+        if path and os.path.exists(path):
+            try:
+                _reader = Snapshot(path)
+            except (OSError, ValueError, SnapshotError) as e:
+                print(f"Snapshot: {path} ignored - {e}", file=sys.stderr)
+    return _reader
+
+
+# --- Import -------------------------------------------------------------------------------------
+
+def _import_verses(snapshot: Snapshot) -> int:
+    from verse_cache import get_cache
+
+    cache = get_cache()
+    if cache is None or not cache.enabled:
+        print("Snapshot: verse cache not available, skipping verses", file=sys.stderr)
+        return 0
+    return cache.restore(snapshot.verses())
+
+
+def _import_losungen(snapshot: Snapshot) -> int:
+    import losung_cache
+
+    today = losung_cache.today()
+    imported = 0
+    for day, data in snapshot.json_section('losungen').items():
+        try:
+            parsed = date.fromisoformat(day)
+        except ValueError:
+            continue
+        # Ältere Tage räumt losung_cache ohnehin weg; vorhandene lokale Einträge gewinnen
+        if (today - parsed).days > losung_cache.KEEP_DAYS or losung_cache.get(parsed) is not None:
+            continue
+        losung_cache.put(data, parsed)
+        imported += 1
+    return imported
+
+
+def _import_capabilities(snapshot: Snapshot) -> int:
+    import capabilities
+
+    matrix = snapshot.json_section('capabilities')
+    local = capabilities.load()
+    if local and local.get('probed_at', 0) >= matrix.get('probed_at', 0):
+        return 0
+    capabilities.save(matrix)
+    return len(matrix.get('translations', {}))
+
+
+def _import_crossrefs(snapshot: Snapshot) -> int:
+    import cross_references
+
+    index = cross_references.CrossReferenceIndex.from_bytes(zlib.decompress(snapshot.section('crossrefs')))
+    if not len(index):
+        return 0
+    # Über das Log, damit compact() mit dem lokalen Index zusammenführt
+    cross_references.append(list(index.edges()), 'snapshot')
+    return cross_references.compact() or 0
+
+
+IMPORTERS = {
+    'verses': _import_verses,
+    'losungen': _import_losungen,
+    'capabilities': _import_capabilities,
+    'crossrefs': _import_crossrefs,
+}
+
+
+def import_snapshot(path: str, names: Iterable[str] = SECTIONS) -> Dict:
+    snapshot = Snapshot(path)
+    try:
+        broken = snapshot.verify()
+        if broken:
+            raise SnapshotError(f"Checksum mismatch in section(s): {', '.join(broken)}")
+        return {name: IMPORTERS[name](snapshot) for name in names if name in snapshot.sections}
+    finally:
+        snapshot.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache-Snapshot exportieren und importieren")
+    sub = parser.add_subparsers(dest='command', required=True)
+    for command, text in (('export', "Caches in eine Snapshot-Datei schreiben"),
+                          ('import', "Snapshot prüfen und in die Caches laden"),
+                          ('verify', "Prüfsummen aller Abschnitte prüfen"),
+                          ('info', "Abschnitte und Größen ausgeben")):
+        command_parser = sub.add_parser(command, help=text)
+        command_parser.add_argument('path')
+        if command in ('export', 'import'):
+            command_parser.add_argument('--sections', default=','.join(SECTIONS),
+                                        help="Kommagetrennt, Standard alle")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    try:
+        if args.command in ('export', 'import'):
+            names = [name.strip() for name in args.sections.split(',') if name.strip()]
+            unknown = [name for name in names if name not in SECTIONS]
+            if unknown:
+                parser.error(f"unknown section(s): {', '.join(unknown)}")
+            counts = export(args.path, names) if args.command == 'export' else import_snapshot(args.path, names)
+            report = {'sections': counts, 'bytes': os.path.getsize(args.path)}
+        else:
+            snapshot = Snapshot(args.path)
+            try:
+                report = snapshot.info()
+                if args.command == 'verify':
+                    report['broken'] = snapshot.verify()
+            finally:
+                snapshot.close()
+    except (OSError, SnapshotError, ValueError, zlib.error) as e:
+        print(json.dumps({"error": str(e)}))
+        sys.exit(1)
+
+    report['duration_s'] = round(time.monotonic() - started, 3)
+    print(json.dumps(report, ensure_ascii=False))
+    if report.get('broken'):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
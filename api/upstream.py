@@ -0,0 +1,617 @@
+#!/opt/venv/bin/python3
+"""
+Upstream-Zugriffe für die Scraper (bibleserver.com, BIGS, losungen.de)
+Rollierende Latenz-Statistik pro Host, adaptive Timeouts und optionale Hedged Requests
+sowie gestreamtes Ausschneiden des relevanten HTML-Containers (fetch_fragment)
+
+Ein Gesamtbudget pro Aufruf (deadline(), z.B. aus --deadline-ms) begrenzt Connect, Read und
+Wartezeiten aller Teilabrufe; ist es aufgebraucht, wirft fetch() DeadlineExceeded.
+
+Für asyncio gibt es fetch_async() und fetch_fragment_async(): mit aiohttp über einen gemeinsamen
+Verbindungs-Pool pro Event-Loop (SCRAPER_ASYNC_POOL Verbindungen), ohne aiohttp über den
+synchronen Weg in einem gemeinsamen Thread-Pool (SCRAPER_ASYNC_FETCH_THREADS).
+"""
+
+import asyncio
+import contextvars
+import fcntl
+import functools
+import json
+import os
+import queue
+import re
+import tempfile
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+try:
+    import aiohttp
+except ImportError:  # optional, ohne aiohttp laufen asynchrone Abrufe über requests in Threads
+    aiohttp = None
+
+# Zustand wird prozessübergreifend geteilt, da jeder Scraper-Aufruf ein eigener Prozess ist
+STATE_DIR = os.environ.get('SCRAPER_STATE_DIR', '/tmp/ketiv_scraper')
+LATENCY_FILE = os.path.join(STATE_DIR, 'latency.json')
+
+# Hedged Requests: nach Ablauf der beobachteten p95 eine zweite, identische Anfrage senden
+HEDGE_ENABLED = os.environ.get('SCRAPER_HEDGE', '1') == '1'
+
+WINDOW_SIZE = 200          # Anzahl der Messwerte pro Host im rollierenden Fenster
+MIN_SAMPLES = 20           # Darunter gelten die statischen Standard-Timeouts
+DEFAULT_TIMEOUT = (3.05, 10.0)
+CONNECT_TIMEOUT_RANGE = (1.0, 3.05)
+READ_TIMEOUT_RANGE = (2.0, 10.0)
+# Aufschlag für fehlgeschlagene Abrufe (Sekunden). Gezählt wird die tatsächliche Dauer plus
+# Aufschlag, höchstens der Timeout: ein sofortiges "connection refused" darf die p95 nicht
+# auf die Timeout-Obergrenze treiben und damit Hedging und adaptive Timeouts aushebeln
+FAILURE_PENALTY = float(os.environ.get('SCRAPER_FAILURE_PENALTY_MS', '250')) / 1000
+
+# Obergrenze für gestreamte Seiten; danach wird mit dem bisher Gelesenen weitergearbeitet
+MAX_PAGE_BYTES = int(os.environ.get('SCRAPER_MAX_PAGE_BYTES', str(5 * 1024 * 1024)))
+CHUNK_SIZE = 16 * 1024
+
+# Übertragene Bytes dieses Prozesses (für Profiling und Lasttests)
+transfer_stats = {'requests': 0, 'bytes_read': 0, 'fragments': 0}
+
+# Gleichzeitige Verbindungen pro Event-Loop (aiohttp) bzw. Threads für blockierende Aufrufe
+ASYNC_POOL_SIZE = int(os.environ.get('SCRAPER_ASYNC_POOL', '100'))
+ASYNC_FETCH_THREADS = int(os.environ.get('SCRAPER_ASYNC_FETCH_THREADS', '32'))
+
+
+def _clamp(value: float, bounds: Tuple[float, float]) -> float:
+    return max(bounds[0], min(bounds[1], value))
+
+
+def _failure_sample(elapsed: float, timeout: Tuple[float, float]) -> float:
+    return min(elapsed + FAILURE_PENALTY, sum(timeout))
+
+
+class DeadlineExceeded(Exception):
+    """Das Zeitbudget des Aufrufs ist aufgebraucht"""
+
+
+# Ein Timeout so kurz vor Budget-Ende gilt als Budget-Ende (Sekunden)
+DEADLINE_TOLERANCE = 0.05
+
+# Absoluter Zeitpunkt (time.monotonic) für den laufenden Aufruf; ContextVar, damit
+# Worker-Threads der Warteschlange jeweils ihr eigenes Budget haben
+_deadline: contextvars.ContextVar = contextvars.ContextVar('scraper_deadline', default=None)
+
+
+@contextmanager
+def deadline(ms: Optional[float]):
+    """Gesamtbudget in Millisekunden für alle Abrufe innerhalb des Blocks (None = unbegrenzt)"""
+    token = _deadline.set(time.monotonic() + ms / 1000 if ms else None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def start_deadline(ms: Optional[float]):
+    """Budget ab jetzt für den Rest des aktuellen Kontexts (Kommandozeilen-Aufrufe)"""
+    _deadline.set(time.monotonic() + ms / 1000 if ms else None)
+
+
+def remaining() -> Optional[float]:
+    """Verbleibende Sekunden des Budgets, None ohne Budget"""
+    until = _deadline.get()
+    return None if until is None else until - time.monotonic()
+
+
+def deadline_expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def check_deadline():
+    if deadline_expired():
+        raise DeadlineExceeded("Deadline exceeded")
+
+
+class LatencyTracker:
+    """Rollierendes Latenz-Fenster pro Host, persistiert in einer JSON-Datei"""
+
+    def __init__(self, path: str = LATENCY_FILE, window_size: int = WINDOW_SIZE):
+        self.path = path
+        self.window_size = window_size
+        self._lock = threading.Lock()
+        self._samples: Dict[str, List[float]] = self._load()
+
+    def _load(self) -> Dict[str, List[float]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return {host: [float(s) for s in samples] for host, samples in data.items()}
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def refresh(self):
+        """Fenster neu von der Platte lesen (Messwerte anderer Prozesse übernehmen)"""
+        with self._lock:
+            self._samples = self._load()
+
+    def record(self, host: str, seconds: float):
+        """Messwert aufnehmen und das Fenster atomar auf die Platte schreiben"""
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path + '.lock', 'w') as lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    # Frisch laden, damit Messwerte paralleler Prozesse nicht verloren gehen
+                    self._samples = self._load()
+                    samples = self._samples.setdefault(host, [])
+                    samples.append(round(seconds, 4))
+                    del samples[:-self.window_size]
+                    self._write()
+            except OSError:
+                samples = self._samples.setdefault(host, [])
+                samples.append(round(seconds, 4))
+                del samples[:-self.window_size]
+
+    def _write(self):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._samples, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def percentile(self, host: str, q: float) -> Optional[float]:
+        """Perzentil q (0-100) der Latenz in Sekunden, None bei zu wenigen Messwerten"""
+        samples = self._samples.get(host) or []
+        if len(samples) < MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(round(q / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def timeouts(self, host: str) -> Tuple[float, float]:
+        """Connect- und Read-Timeout aus dem jüngsten Verhalten des Hosts ableiten"""
+        p50 = self.percentile(host, 50)
+        p99 = self.percentile(host, 99)
+        if p50 is None or p99 is None:
+            return DEFAULT_TIMEOUT
+
+        # Verbindungsaufbau ist ein Bruchteil der Gesamtzeit, daher am Median orientiert
+        connect = _clamp(p50 * 2, CONNECT_TIMEOUT_RANGE)
+        read = _clamp(p99 * 3, READ_TIMEOUT_RANGE)
+        return (round(connect, 2), round(read, 2))
+
+    def hedge_delay(self, host: str) -> Optional[float]:
+        """Wartezeit bis zur Hedge-Anfrage (beobachtete p95), None ohne ausreichende Statistik"""
+        return self.percentile(host, 95)
+
+    def stats(self) -> Dict[str, Dict]:
+        result = {}
+        for host, samples in self._samples.items():
+            result[host] = {
+                'samples': len(samples),
+                'p50_ms': self._ms(self.percentile(host, 50)),
+                'p95_ms': self._ms(self.percentile(host, 95)),
+                'p99_ms': self._ms(self.percentile(host, 99)),
+                'timeouts': self.timeouts(host)
+            }
+        return result
+
+    @staticmethod
+    def _ms(value: Optional[float]) -> Optional[int]:
+        return int(value * 1000) if value is not None else None
+
+
+_tracker: Optional[LatencyTracker] = None
+_local = threading.local()
+
+
+def get_tracker() -> LatencyTracker:
+    global _tracker
+    if _tracker is None:
+        _tracker = LatencyTracker()
+    return _tracker
+
+
+def _session() -> requests.Session:
+    # requests.Session ist nicht threadsicher, daher eine Session pro Thread
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        _local.session = session
+    return session
+
+
+def _timed_get(url: str, headers: Optional[Dict], timeout: Tuple[float, float], host: str, stream: bool = False):
+    # Bei stream=True misst die Statistik die Zeit bis zu den Response-Headern
+    started = time.monotonic()
+    try:
+        response = _session().get(url, headers=headers, timeout=timeout, stream=stream)
+    except requests.RequestException:
+        # Fehlschläge zählen mit Aufschlag, damit die Statistik nicht zu optimistisch wird
+        get_tracker().record(host, _failure_sample(time.monotonic() - started, timeout))
+        raise
+    get_tracker().record(host, time.monotonic() - started)
+    return response
+
+
+def fetch(url: str, headers: Optional[Dict] = None, hedge: Optional[bool] = None,
+          stream: bool = False) -> requests.Response:
+    """
+    GET-Anfrage mit adaptiven Timeouts und optionalem Hedging
+
+    Ist nach der beobachteten p95 des Hosts noch keine Antwort da, wird genau eine
+    zweite Anfrage gestartet und die zuerst eintreffende Antwort verwendet.
+    Hintergrund-Abrufe (scheduler.BACKGROUND) warten vorher ggf. auf einen freien Slot.
+    Wirft dieselben Exceptions wie requests.get(), bei aufgebrauchtem Budget DeadlineExceeded.
+    """
+    # Vorrang interaktiver Abrufe vor Hintergrund-Arbeit (scheduler.py, importiert hier wegen Zyklus)
+    import scheduler
+
+    try:
+        with scheduler.admit(urlparse(url).netloc):
+            return _fetch(url, headers, hedge, stream)
+    except requests.RequestException as e:
+        # Ein auf das Restbudget gekürzter Timeout ist ein Budget-Ende, kein Upstream-Fehler
+        left = remaining()
+        if left is not None and left <= DEADLINE_TOLERANCE:
+            raise DeadlineExceeded(f"Deadline exceeded while fetching {urlparse(url).netloc}") from e
+        raise
+
+
+def _request_plan(host: str, hedge: Optional[bool]) -> Tuple[Tuple[float, float], Optional[float]]:
+    """(Connect-/Read-Timeout, Hedge-Verzögerung) für einen Abruf"""
+    tracker = get_tracker()
+    timeout = tracker.timeouts(host)
+
+    # Timeouts nie über das verbleibende Budget hinaus
+    left = remaining()
+    if left is not None:
+        if left <= 0:
+            raise DeadlineExceeded(f"Deadline exceeded before fetching {host}")
+        timeout = (min(timeout[0], left), min(timeout[1], left))
+
+    if hedge is None:
+        hedge = HEDGE_ENABLED
+    return timeout, tracker.hedge_delay(host) if hedge else None
+
+
+def _fetch(url: str, headers: Optional[Dict], hedge: Optional[bool], stream: bool) -> requests.Response:
+    host = urlparse(url).netloc
+    timeout, delay = _request_plan(host, hedge)
+
+    if delay is None:
+        return _timed_get(url, headers, timeout, host, stream)
+
+    # Daemon-Threads, damit eine verlorene Anfrage das Prozessende nicht blockiert
+    results: queue.Queue = queue.Queue()
+    decided = threading.Event()
+    lock = threading.Lock()
+
+    def worker():
+        try:
+            response = _timed_get(url, headers, timeout, host, stream)
+        except Exception as e:
+            results.put((False, e))
+            return
+        with lock:
+            if decided.is_set():
+                # Verlorene gestreamte Antwort nicht offen halten
+                response.close()
+                return
+            results.put((True, response))
+
+    def decide():
+        # Danach schließt ein Verlierer seine Antwort selbst; eine schon abgelegte schließen wir hier
+        with lock:
+            decided.set()
+            while True:
+                try:
+                    ok, value = results.get_nowait()
+                except queue.Empty:
+                    break
+                if ok:
+                    value.close()
+
+    threading.Thread(target=worker, daemon=True).start()
+
+    try:
+        ok, value = results.get(timeout=delay)
+    except queue.Empty:
+        pass
+    else:
+        decide()
+        if ok:
+            return value
+        raise value
+
+    threading.Thread(target=worker, daemon=True).start()
+
+    error = None
+    for _ in range(2):
+        ok, value = results.get()
+        if ok:
+            decide()
+            return value
+        error = value
+
+    raise error
+
+
+def _container_patterns(tag: str, css_class: str) -> Tuple['re.Pattern', 're.Pattern']:
+    name = re.escape(tag.encode('ascii'))
+    cls = re.escape(css_class.encode('ascii'))
+    start = re.compile(rb'<' + name + rb'\b[^>]*?\bclass=["\'](?:[^"\']*\s)?' + cls + rb'(?:\s[^"\']*)?["\']', re.I)
+    # Öffnende/schließende Tags desselben Namens für die Verschachtelungstiefe
+    token = re.compile(rb'<(/?)' + name + rb'[\s>/]', re.I)
+    return start, token
+
+
+def _charset(response: requests.Response) -> str:
+    # Ohne charset-Angabe liefert requests ISO-8859-1; die Quellen sind UTF-8
+    match = re.search(r'charset=([\w-]+)', response.headers.get('Content-Type', ''), re.I)
+    return match.group(1) if match else 'utf-8'
+
+
+class ContainerScanner:
+    """Sucht Chunk für Chunk nach dem ersten <tag class="css_class">-Container (sync und async)"""
+
+    def __init__(self, tag: str, css_class: str, max_bytes: int = MAX_PAGE_BYTES):
+        self.start_pattern, self.token_pattern = _container_patterns(tag, css_class)
+        self.max_bytes = max_bytes
+        self.buffer = bytearray()
+        self.start: Optional[int] = None
+        self.scan = 0
+        self.depth = 0
+        self.search_from = 0
+        self.fragment: Optional[bytes] = None
+
+    def feed(self, chunk: bytes) -> bool:
+        """Chunk anhängen; True, sobald nicht weitergelesen werden muss"""
+        if not chunk:
+            return False
+        # Der Read-Timeout gilt pro Chunk, das Budget für den ganzen Download
+        check_deadline()
+        buffer = self.buffer
+        buffer += chunk
+
+        if self.start is None:
+            match = self.start_pattern.search(buffer, self.search_from)
+            if match is None:
+                # Ein Start-Tag kann über die Chunk-Grenze reichen
+                self.search_from = max(0, len(buffer) - 2048)
+                return len(buffer) >= self.max_bytes
+            self.start = match.start()
+            self.scan = self.start
+
+        for token in self.token_pattern.finditer(buffer, self.scan):
+            if token.group(1):
+                self.depth -= 1
+                if self.depth == 0:
+                    end = buffer.find(b'>', token.end() - 1) + 1
+                    if end > 0:
+                        self.fragment = bytes(buffer[self.start:end])
+                        return True
+            else:
+                self.depth += 1
+            self.scan = token.end()
+
+        return len(buffer) >= self.max_bytes
+
+    def result(self) -> Tuple[bytes, bool, int]:
+        if self.fragment is not None:
+            return self.fragment, True, len(self.buffer)
+        return bytes(self.buffer), False, len(self.buffer)
+
+
+def extract_container(chunks, tag: str, css_class: str, max_bytes: int = MAX_PAGE_BYTES) -> Tuple[bytes, bool, int]:
+    """
+    Liest Chunks nur so weit, bis der erste <tag class="css_class">-Container geschlossen ist
+
+    Liefert (Bytes, gefunden, gelesene Bytes). Wird der Container nicht gefunden oder
+    nicht geschlossen, enthält das Ergebnis alles bisher Gelesene, damit der Aufrufer
+    wie bisher auf der ganzen Seite suchen kann.
+    """
+    scanner = ContainerScanner(tag, css_class, max_bytes)
+    for chunk in chunks:
+        if scanner.feed(chunk):
+            break
+    return scanner.result()
+
+
+def fetch_fragment(url: str, tag: str, css_class: str, headers: Optional[Dict] = None) -> Tuple[int, str]:
+    """
+    Lädt eine Seite gestreamt und liefert (HTTP-Status, HTML des Containers)
+
+    Der Download endet, sobald der Container geschlossen ist; Navigation, Skripte und
+    Footer danach werden nicht mehr übertragen und nicht geparst. Ohne Treffer wird
+    die ganze Seite zurückgegeben.
+    """
+    response = fetch(url, headers=headers, stream=True)
+    try:
+        if response.status_code != 200:
+            return response.status_code, response.text
+        body, found, read = extract_container(response.iter_content(CHUNK_SIZE), tag, css_class)
+        transfer_stats['requests'] += 1
+        transfer_stats['bytes_read'] += read
+        transfer_stats['fragments'] += 1 if found else 0
+        return response.status_code, body.decode(_charset(response), errors='replace')
+    finally:
+        response.close()
+
+
+# --- asyncio -------------------------------------------------------------------------------------
+
+_blocking_pool: Optional[ThreadPoolExecutor] = None
+_blocking_pool_lock = threading.Lock()
+
+# Ein aiohttp-Pool pro Event-Loop; verschwindet mit der Loop
+_async_sessions: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+
+# False in run_sync(): eine Loop pro synchronem Aufruf würde jeden aiohttp-Pool gleich wieder
+# wegwerfen, dort bleiben die wiederverwendeten requests-Sessions der Threads besser
+_native: contextvars.ContextVar = contextvars.ContextVar('scraper_async_native', default=True)
+# True, wenn nur eine Coroutine auf der Loop läuft: blockierende Aufrufe direkt ausführen
+# (kein Thread-Wechsel, cProfile von --profile sieht weiterhin alles)
+_inline: contextvars.ContextVar = contextvars.ContextVar('scraper_async_inline', default=False)
+
+
+def _get_blocking_pool() -> ThreadPoolExecutor:
+    global _blocking_pool
+    if _blocking_pool is None:
+        with _blocking_pool_lock:
+            if _blocking_pool is None:
+                _blocking_pool = ThreadPoolExecutor(max_workers=ASYNC_FETCH_THREADS,
+                                                    thread_name_prefix='scraper-io')
+    return _blocking_pool
+
+
+async def run_blocking(func: Callable, *args, executor: Optional[ThreadPoolExecutor] = None):
+    """Blockierenden Aufruf in einem Thread-Pool ausführen; Budget und Priorität wandern mit"""
+    if _inline.get():
+        return func(*args)
+    call = functools.partial(contextvars.copy_context().run, func, *args)
+    return await asyncio.get_running_loop().run_in_executor(executor or _get_blocking_pool(), call)
+
+
+def run_sync(coroutine, concurrent: bool = False):
+    """
+    Coroutine aus synchronem Code ausführen (eigene Event-Loop, Abrufe über requests)
+
+    Ohne concurrent laufen blockierende Teile direkt auf der Loop; nur wenn die Coroutine
+    selbst mehrere Abrufe nebenläufig startet, gehen sie in den Thread-Pool. Läuft im
+    aufrufenden Thread schon eine Event-Loop (synchrone API aus async-Code), läuft die
+    Coroutine in einem Hilfs-Thread und der Aufrufer blockiert wie bei jedem sync-Aufruf.
+    """
+    async def runner():
+        _native.set(False)
+        _inline.set(not concurrent)
+        return await coroutine
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(runner())
+
+    # asyncio.run() ist in einem Thread mit laufender Loop verboten; Kontext wandert mit
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='scraper-sync') as helper:
+        return helper.submit(context.run, asyncio.run, runner()).result()
+
+
+def _async_session() -> 'aiohttp.ClientSession':
+    loop = asyncio.get_running_loop()
+    session = _async_sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(limit=ASYNC_POOL_SIZE, ttl_dns_cache=300)
+        session = aiohttp.ClientSession(connector=connector)
+        _async_sessions[loop] = session
+    return session
+
+
+async def close_async_session():
+    """Verbindungs-Pool der laufenden Event-Loop schließen (beim Herunterfahren eines Dienstes)"""
+    session = _async_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+
+
+async def _timed_get_async(url: str, headers: Optional[Dict], timeout: Tuple[float, float], host: str):
+    started = time.monotonic()
+    try:
+        response = await _async_session().get(
+            url, headers=headers, timeout=aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1]))
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        get_tracker().record(host, _failure_sample(time.monotonic() - started, timeout))
+        raise
+    get_tracker().record(host, time.monotonic() - started)
+    return response
+
+
+async def _discard(tasks: List[asyncio.Future]):
+    """Offene Anfragen abbrechen und abwarten, schon eingetroffene Antworten schließen"""
+    for task in tasks:
+        task.cancel()
+    for outcome in await asyncio.gather(*tasks, return_exceptions=True):
+        if not isinstance(outcome, BaseException):
+            outcome.close()
+
+
+async def _fetch_async(url: str, headers: Optional[Dict], hedge: Optional[bool]):
+    host = urlparse(url).netloc
+    timeout, delay = _request_plan(host, hedge)
+
+    tasks = [asyncio.ensure_future(_timed_get_async(url, headers, timeout, host))]
+    winner = None
+    try:
+        if delay is not None:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                tasks.append(asyncio.ensure_future(_timed_get_async(url, headers, timeout, host)))
+
+        pending = set(tasks)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winners = [task for task in done if task.exception() is None]
+            if winners:
+                winner = winners[0]
+                return winner.result()
+            error = next(iter(done)).exception()
+        raise error
+    finally:
+        # Auch bei Abbruch von außen (Budget, cancel()): verlorene Anfrage abbrechen und abwarten,
+        # eine gleichzeitig eingetroffene Antwort schließen - wie im synchronen Pfad
+        await _discard([task for task in tasks if task is not winner])
+
+
+async def fetch_async(url: str, headers: Optional[Dict] = None, hedge: Optional[bool] = None):
+    """
+    Wie fetch(), für asyncio mit aiohttp; liefert eine aiohttp.ClientResponse
+
+    Adaptive Timeouts, Hedging, Budget und Vorrang (scheduler.admit_async) wie beim
+    synchronen Abruf. Die Antwort muss der Aufrufer schließen.
+    """
+    import scheduler
+
+    try:
+        async with scheduler.admit_async(urlparse(url).netloc):
+            return await _fetch_async(url, headers, hedge)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        left = remaining()
+        if left is not None and left <= DEADLINE_TOLERANCE:
+            raise DeadlineExceeded(f"Deadline exceeded while fetching {urlparse(url).netloc}") from e
+        raise
+
+
+async def fetch_fragment_async(url: str, tag: str, css_class: str, headers: Optional[Dict] = None) -> Tuple[int, str]:
+    """fetch_fragment() für asyncio; ohne aiohttp bzw. aus run_sync() über requests im Thread-Pool"""
+    if aiohttp is None or not _native.get():
+        return await run_blocking(fetch_fragment, url, tag, css_class, headers)
+
+    response = await fetch_async(url, headers=headers)
+    try:
+        if response.status != 200:
+            return response.status, await response.text(errors='replace')
+        scanner = ContainerScanner(tag, css_class)
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            if scanner.feed(chunk):
+                break
+        body, found, read = scanner.result()
+        transfer_stats['requests'] += 1
+        transfer_stats['bytes_read'] += read
+        transfer_stats['fragments'] += 1 if found else 0
+        return response.status, body.decode(_charset(response), errors='replace')
+    finally:
+        response.close()
+
+
+if __name__ == "__main__":
+    print(json.dumps(get_tracker().stats(), ensure_ascii=False))
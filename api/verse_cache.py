@@ -0,0 +1,365 @@
+#!/opt/venv/bin/python3
+"""
+Verse-Cache aus Python, kompatibel zu redis_cache.php
+Gleiche Schlüssel (bible:md5(referenz:übersetzung)), gleiche Datenbank (1) und gleiches
+JSON inklusive cached_at, cache_key und ttl, damit PHP und Python dieselben Einträge nutzen.
+
+Backends (SCRAPER_VERSE_CACHE):
+    redis   Standard; Redis unter REDIS_HOST/REDIS_PORT, ohne redis-Paket deaktiviert
+    memory  In-Memory-Ersatz mit gleicher Schnittstelle (Tests, lokale Läufe)
+    off     kein Cache
+
+Fehltreffer schlagen zusätzlich im Snapshot aus SCRAPER_SNAPSHOT nach (siehe snapshot.py).
+
+Vorwärmen, z.B. mit den Losungen eines Jahres:
+    python3 verse_cache.py warm LUT,ELB < referenzen.ndjson
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import redis
+except ImportError:  # optional, ohne redis-Paket bleibt der Cache deaktiviert
+    redis = None
+
+BACKEND = os.environ.get('SCRAPER_VERSE_CACHE', 'redis')
+REDIS_HOST = os.environ.get('REDIS_HOST', 'redis')
+REDIS_PORT = int(os.environ.get('REDIS_PORT', '6379'))
+REDIS_DB = 1
+
+# 30 Tage wie RedisCache::$defaultTtl - Bibeltexte ändern sich nie
+DEFAULT_TTL = 86400 * 30
+
+# Schlüssel pro MGET bzw. Pipeline-Ausführung
+BATCH_SIZE = 500
+
+# Wie RedisCache::createKey() byteweise in PHP: trim() entfernt nur diese Zeichen, preg_replace('/\s+/')
+# ohne /u kennt nur ASCII-Leerraum und strtolower() ändert nur A-Z ("Ü" und NBSP bleiben)
+PHP_TRIM_CHARACTERS = ' \t\n\r\0\x0b'
+WHITESPACE_PATTERN = re.compile(r'[ \t\n\x0b\f\r]+')
+ASCII_LOWER = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+# Von RedisCache::set() ergänzte Felder, nicht Teil des Scraper-Ergebnisses
+METADATA_FIELDS = ('cached_at', 'cache_key', 'ttl')
+
+
+def cache_key(reference: str, translation: str) -> str:
+    """Entspricht RedisCache::createKey()"""
+    normalized = WHITESPACE_PATTERN.sub(' ', reference.strip(PHP_TRIM_CHARACTERS).translate(ASCII_LOWER))
+    return "bible:" + hashlib.md5(f"{normalized}:{translation}".encode('utf-8')).hexdigest()
+
+
+def api_payload(result: Dict) -> Dict:
+    """Scraper-Ergebnis so, wie BibleSearchAPI::scrapeReference() es für einfache Referenzen speichert"""
+    payload = dict(result)
+    if payload.get('verses'):
+        payload['verses'] = [dict(verse, optional=verse.get('optional', False), excluded=False)
+                             for verse in payload['verses']]
+    return payload
+
+
+def strip_metadata(data: Dict) -> Dict:
+    return {key: value for key, value in data.items() if key not in METADATA_FIELDS}
+
+
+class MemoryBackend:
+    """In-Memory-Ersatz für die genutzte Teilmenge der redis-py-Schnittstelle"""
+
+    def __init__(self):
+        self.data: Dict[str, Tuple[float, bytes]] = {}
+        self.lock = threading.Lock()
+
+    def ping(self) -> bool:
+        return True
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self.data[key]
+                return None
+            return entry[1]
+
+    def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        return [self.get(key) for key in keys]
+
+    def setex(self, key: str, ttl: int, value) -> bool:
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        with self.lock:
+            self.data[key] = (time.time() + ttl, value)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        with self.lock:
+            return sum(1 for key in keys if self.data.pop(key, None) is not None)
+
+    def scan_iter(self, match: str = '*', count: int = 0) -> Iterable[str]:
+        with self.lock:
+            keys = list(self.data)
+        return (key for key in keys if fnmatch.fnmatchcase(key, match))
+
+    def pipeline(self, transaction: bool = False) -> 'MemoryPipeline':
+        return MemoryPipeline(self)
+
+
+class MemoryPipeline:
+    def __init__(self, backend: MemoryBackend):
+        self.backend = backend
+        self.commands: List[Tuple[str, int, bytes]] = []
+
+    def setex(self, key: str, ttl: int, value):
+        self.commands.append((key, ttl, value))
+        return self
+
+    def execute(self) -> List[bool]:
+        results = [self.backend.setex(key, ttl, value) for key, ttl, value in self.commands]
+        self.commands = []
+        return results
+
+
+class VerseCache:
+    """Lesen und Schreiben von Bibeltext-Einträgen im Redis-Cache der PHP-API"""
+
+    def __init__(self, backend=None, host: str = REDIS_HOST, port: int = REDIS_PORT):
+        # Verbindung erst beim ersten Zugriff, damit Aufrufe ohne Cache-Nutzung nichts kosten
+        self.client = backend
+        self.host = host
+        self.port = port
+        self.connected = backend is not None
+        self.counters = {'hits': 0, 'misses': 0, 'writes': 0, 'snapshot_hits': 0}
+
+    def _client(self):
+        if self.connected:
+            return self.client
+        self.connected = True
+        if BACKEND == 'memory':
+            self.client = MemoryBackend()
+        elif BACKEND == 'redis' and redis is not None:
+            try:
+                client = redis.Redis(host=self.host, port=self.port, db=REDIS_DB, socket_timeout=2,
+                                     socket_connect_timeout=2)
+                client.ping()
+                self.client = client
+            except Exception as e:
+                print(f"Verse cache: connection failed - {e}", file=sys.stderr)
+        return self.client
+
+    @property
+    def enabled(self) -> bool:
+        return self._client() is not None
+
+    @staticmethod
+    def _decode(raw) -> Optional[Dict]:
+        if not raw:
+            return None
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) and 'cached_at' in data else None
+
+    def _encode(self, key: str, data: Dict, ttl: int) -> str:
+        payload = dict(data)
+        payload['cached_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        payload['cache_key'] = key
+        payload['ttl'] = ttl
+        return json.dumps(payload, ensure_ascii=False)
+
+    def get(self, reference: str, translation: str) -> Optional[Dict]:
+        return self.get_many([(reference, translation)])[0]
+
+    def set(self, reference: str, translation: str, data: Dict, ttl: Optional[int] = None) -> bool:
+        """Wie RedisCache::set(): Metadaten ergänzen und mit TTL speichern"""
+        return self.set_many([(reference, translation, data)], ttl) == 1
+
+    def get_many(self, items: List[Tuple[str, str]]) -> List[Optional[Dict]]:
+        """Mehrere (Referenz, Übersetzung) mit MGET in Blöcken zu BATCH_SIZE lesen"""
+        client = self._client()
+        snapshot = _snapshot_reader()
+        if client is None and snapshot is None:
+            return [None] * len(items)
+
+        keys = [cache_key(reference, translation) for reference, translation in items]
+        results: List[Optional[Dict]] = []
+        try:
+            for start in range(0, len(keys), BATCH_SIZE):
+                if client is not None:
+                    results.extend(self._decode(raw) for raw in client.mget(keys[start:start + BATCH_SIZE]))
+        except Exception as e:
+            print(f"Verse cache: get error - {e}", file=sys.stderr)
+            results = []
+        results.extend([None] * (len(keys) - len(results)))
+
+        if snapshot is not None:
+            for index, key in enumerate(keys):
+                if results[index] is None:
+                    results[index] = self._decode(snapshot.verse(key))
+                    if results[index] is not None:
+                        self.counters['snapshot_hits'] += 1
+
+        hits = sum(1 for result in results if result is not None)
+        self.counters['hits'] += hits
+        self.counters['misses'] += len(results) - hits
+        return results
+
+    def set_many(self, items: Iterable[Tuple[str, str, Dict]], ttl: Optional[int] = None) -> int:
+        """Mehrere Einträge per Pipeline (SETEX, ohne Transaktion) schreiben; liefert die Anzahl"""
+        client = self._client()
+        if client is None:
+            return 0
+
+        ttl = ttl or DEFAULT_TTL
+        written = 0
+        pipeline = client.pipeline(transaction=False)
+        pending = 0
+        try:
+            for reference, translation, data in items:
+                key = cache_key(reference, translation)
+                pipeline.setex(key, ttl, self._encode(key, data, ttl))
+                pending += 1
+                if pending >= BATCH_SIZE:
+                    written += sum(1 for ok in pipeline.execute() if ok)
+                    pending = 0
+            if pending:
+                written += sum(1 for ok in pipeline.execute() if ok)
+        except Exception as e:
+            print(f"Verse cache: set error - {e}", file=sys.stderr)
+
+        self.counters['writes'] += written
+        return written
+
+    def scan(self) -> Iterable[Tuple[str, int, bytes]]:
+        """Alle Einträge als (Schlüssel, TTL, Rohwert), per SCAN und MGET in Blöcken zu BATCH_SIZE"""
+        client = self._client()
+        if client is None:
+            return
+        batch: List[str] = []
+        for key in client.scan_iter(match='bible:*', count=BATCH_SIZE):
+            batch.append(key.decode('utf-8') if isinstance(key, bytes) else key)
+            if len(batch) >= BATCH_SIZE:
+                yield from self._scan_batch(client, batch)
+                batch = []
+        if batch:
+            yield from self._scan_batch(client, batch)
+
+    def _scan_batch(self, client, keys: List[str]) -> Iterable[Tuple[str, int, bytes]]:
+        for key, raw in zip(keys, client.mget(keys)):
+            data = self._decode(raw)
+            if data is None:
+                continue
+            if isinstance(raw, str):
+                raw = raw.encode('utf-8')
+            yield key, int(data.get('ttl') or DEFAULT_TTL), raw
+
+    def restore(self, entries: Iterable[Tuple[str, int, bytes]]) -> int:
+        """Rohwerte unverändert (inklusive cached_at) per Pipeline schreiben, TTL ab jetzt"""
+        client = self._client()
+        if client is None:
+            return 0
+
+        written = 0
+        pipeline = client.pipeline(transaction=False)
+        pending = 0
+        try:
+            for key, ttl, raw in entries:
+                pipeline.setex(key, ttl or DEFAULT_TTL, raw)
+                pending += 1
+                if pending >= BATCH_SIZE:
+                    written += sum(1 for ok in pipeline.execute() if ok)
+                    pending = 0
+            if pending:
+                written += sum(1 for ok in pipeline.execute() if ok)
+        except Exception as e:
+            print(f"Verse cache: restore error - {e}", file=sys.stderr)
+
+        self.counters['writes'] += written
+        return written
+
+
+def _snapshot_reader():
+    if not os.environ.get('SCRAPER_SNAPSHOT'):
+        return None
+    import snapshot
+    return snapshot.get_reader()
+
+
+_default_cache: Optional[VerseCache] = None
+
+
+def get_cache() -> Optional[VerseCache]:
+    """Prozessweiter Cache gemäß SCRAPER_VERSE_CACHE (None bei 'off')"""
+    global _default_cache
+    if BACKEND == 'off':
+        return None
+    if _default_cache is None:
+        _default_cache = VerseCache()
+    return _default_cache
+
+
+def _read_references(stream) -> Iterable[str]:
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('"') or line.startswith('{'):
+            item = json.loads(line)
+            line = item['reference'] if isinstance(item, dict) else item
+        yield line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verse-Cache (kompatibel zu redis_cache.php)")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    warm_parser = sub.add_parser('warm', help="Referenzen von stdin laden und in den Cache schreiben")
+    warm_parser.add_argument('translations', help="Kommagetrennte Übersetzungen, z.B. LUT,ELB")
+
+    key_parser = sub.add_parser('key', help="Cache-Schlüssel einer Referenz ausgeben")
+    key_parser.add_argument('reference')
+    key_parser.add_argument('translation')
+
+    args = parser.parse_args()
+
+    if args.command == 'key':
+        print(cache_key(args.reference, args.translation))
+        return
+
+    from bible_scraper import BibleScraper
+    import scheduler
+
+    # Vorwärmen ist Hintergrund-Arbeit und weicht Nutzeranfragen aus
+    scheduler.set_priority(scheduler.BACKGROUND)
+    cache = get_cache()
+    if cache is None or not cache.enabled:
+        print(json.dumps({"error": "Verse cache not available"}))
+        return
+
+    scraper = BibleScraper(cache=cache)
+    references = list(dict.fromkeys(_read_references(sys.stdin)))
+    started = time.monotonic()
+    report = {}
+    for translation in [t.strip() for t in args.translations.split(',') if t.strip()]:
+        results = scraper.scrape_many([(reference, translation) for reference in references])
+        report[translation] = {
+            'references': len(references),
+            'resolved': sum(1 for result in results if result),
+        }
+    report['cache'] = cache.counters
+    report['duration_s'] = round(time.monotonic() - started, 2)
+    print(json.dumps(report, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/opt/venv/bin/python3
+"""
+Vorgerenderte Ausgabeformate für Bibeltexte
+Die Formate des FormatSelectors (text, html, markdown) werden einmal beim Scrapen erzeugt und
+als "formats" mit den Versdaten gecacht; ein Formatwechsel ist dann nur noch ein Cache-Lesezugriff.
+BibleSearchAPI::renderFormats() in bible_search.php erzeugt für zusammengesetzte Ergebnisse
+dieselbe Ausgabe - Änderungen hier bitte dort nachziehen.
+
+    text      Fließtext ohne ausgeschlossene Verse (wie bisher)
+    html      <sup class="verse-number"> je Vers, optionale/ausgeschlossene Verse als <span class="…">
+    markdown  Versnummern fett, optionale Verse *(kursiv in Klammern)*, ausgeschlossene ~~durchgestrichen~~
+
+Verwendung:
+    python3 verse_formats.py html < ergebnis.json
+"""
+
+import json
+import sys
+from typing import Dict, List
+
+FORMATS = ('text', 'html', 'markdown')
+
+# Wie htmlspecialchars($s, ENT_QUOTES) in PHP
+HTML_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#039;'})
+
+
+def _escape(value) -> str:
+    return str(value).translate(HTML_ESCAPES)
+
+
+def _translation_name(result: Dict) -> str:
+    translation = result.get('translation') or {}
+    return translation.get('name') or translation.get('code') or 'Unbekannte Übersetzung'
+
+
+def _verse_label(verse: Dict) -> str:
+    return f"{verse.get('number', '')}{verse.get('suffix') or ''}"
+
+
+def render_html(result: Dict) -> str:
+    verses: List[Dict] = result.get('verses') or []
+    if verses:
+        parts = []
+        for verse in verses:
+            part = f'<sup class="verse-number">{_escape(_verse_label(verse))}</sup> {_escape(verse.get("text", ""))}'
+            if verse.get('excluded'):
+                part = f'<span class="verse excluded">{part}</span>'
+            elif verse.get('optional'):
+                part = f'<span class="verse optional">({part})</span>'
+            parts.append(part)
+        body = ' '.join(parts)
+    else:
+        body = _escape(result.get('text') or '')
+
+    return ("<div class=\"bible-verse\">\n"
+            f"  <h3 class=\"reference\">{_escape(result.get('reference') or '')}</h3>\n"
+            f"  <blockquote class=\"text\">{body}</blockquote>\n"
+            f"  <footer class=\"translation\">{_escape(_translation_name(result))}</footer>\n"
+            "</div>")
+
+
+def render_markdown(result: Dict) -> str:
+    verses: List[Dict] = result.get('verses') or []
+    if verses:
+        parts = []
+        for verse in verses:
+            part = f"**{_verse_label(verse)}** {verse.get('text', '')}"
+            if verse.get('excluded'):
+                part = f"~~{part}~~"
+            elif verse.get('optional'):
+                part = f"*({part})*"
+            parts.append(part)
+        body = ' '.join(parts)
+    else:
+        body = result.get('text') or 'Kein Text verfügbar'
+
+    reference = result.get('reference') or 'Unbekannte Referenz'
+    return f"## {reference}\n\n> {body}\n\n*— {_translation_name(result)}*"
+
+
+def render_formats(result: Dict) -> Dict[str, str]:
+    return {
+        'text': result.get('text', ''),
+        'html': render_html(result),
+        'markdown': render_markdown(result),
+    }
+
+
+def with_formats(result: Dict) -> Dict:
+    """Ergebnis mit "formats"; bereits gerenderte Formate werden übernommen"""
+    if isinstance(result.get('formats'), dict) and all(name in result['formats'] for name in FORMATS):
+        return result
+    return dict(result, formats=render_formats(result))
+
+
+def main():
+    if len(sys.argv) != 2 or sys.argv[1] not in FORMATS:
+        print(f"Usage: python3 verse_formats.py {'|'.join(FORMATS)} < ergebnis.json", file=sys.stderr)
+        sys.exit(1)
+    print(render_formats(json.load(sys.stdin))[sys.argv[1]])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,452 @@
+#!/opt/venv/bin/python3
+"""
+Wörterbuch-komprimierter Versspeicher pro Übersetzung
+Verse sind kurze, stark ähnliche Texte; einzeln komprimiert bringt zlib kaum etwas, weil jeder
+Datensatz ohne Vorwissen beginnt. Pro Übersetzung wird deshalb aus einer Stichprobe ein
+Wörterbuch trainiert und jeder Vers damit einzeln komprimiert - jeder Vers bleibt per
+Binärsuche im mmap einzeln abrufbar, ohne Nachbarn zu entpacken.
+
+Codec: zstd mit trainiertem Wörterbuch, wenn das Paket zstandard installiert ist, sonst
+zlib (raw deflate) mit einem zdict aus gleichmäßig über die Übersetzung verteilten Versen
+(höchstens 32 KB; schlug in Messungen ein Wörterbuch aus häufigen Wortfolgen).
+
+Format (Little Endian):
+    Kopf      VSTR, Version, Codec, Anzahl Verse, Länge Wörterbuch, Länge Metadaten,
+              CRC32 von Wörterbuch, Metadaten und Tabelle
+    Wörterbuch, Metadaten (JSON: Übersetzung, Bücher außerhalb der 66 kanonischen)
+    Tabelle   je Vers Vers-ID (wie cross_references.verse_id), Offset, Länge - nach ID sortiert
+    Daten     die einzeln komprimierten Verstexte
+
+Eingabe ist das NDJSON von scripts/crawl_chapters.py. Dateien: <SCRAPER_STATE_DIR>/verses/<Übersetzung>.vstore
+BibleScraper setzt Stellen vor einem Upstream-Abruf aus dem Speicher zusammen, wenn dort alle
+angefragten Verse stehen (BibleScraper.from_store).
+
+Verwendung:
+    python3 verse_store.py build LUT [corpus/LUT.ndjson ...] [--codec zlib|zstd]
+    python3 verse_store.py get LUT "Römer 8,28-30"
+    python3 verse_store.py bench LUT [--samples 20000]
+    python3 verse_store.py stats
+"""
+
+import argparse
+import glob
+import json
+import mmap
+import os
+import random
+import re
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # optional, ohne zstandard wird zlib mit zdict genutzt
+    zstandard = None
+
+from cross_references import BIBLE_BOOKS, _book_key, book_number, split_id, verse_id
+from upstream import STATE_DIR
+
+STORE_DIR = os.path.join(STATE_DIR, 'verses')
+CORPUS_DIR = os.path.join(STATE_DIR, 'corpus')
+
+MAGIC = b'VSTR'
+VERSION = 2
+HEADER = struct.Struct('<4sHBxIIII')
+ENTRY = struct.Struct('<III')
+
+CODEC_ZLIB = 0
+CODEC_ZSTD = 1
+CODEC_NAMES = {CODEC_ZLIB: 'zlib', CODEC_ZSTD: 'zstd'}
+
+# zlib nutzt nur die letzten 32 KB eines zdict; zstd-Wörterbücher dürfen größer sein
+ZLIB_DICT_SIZE = 32 * 1024
+ZSTD_DICT_SIZE = 64 * 1024
+ZSTD_LEVEL = 19
+# Stichprobe für das Training (Bytes Verstext)
+SAMPLE_BYTES = 2 * 1024 * 1024
+
+# Bücher außerhalb der 66 (BIGS-Spätschriften) bekommen Nummern ab hier
+EXTRA_BOOK_BASE = 100
+
+REFERENCE_PATTERN = re.compile(r'^(.+?)\s+(\d+)(?:,(\d+)(?:-(\d+))?)?$')
+
+
+def store_path(translation: str) -> str:
+    return os.path.join(STORE_DIR, f"{translation}.vstore")
+
+
+# --- Codecs -------------------------------------------------------------------------------------
+
+class ZlibCodec:
+    """Raw deflate (ohne Kopf und Prüfsumme je Datensatz) mit gemeinsamem zdict"""
+
+    codec_id = CODEC_ZLIB
+
+    def __init__(self, dictionary: bytes):
+        self.dictionary = dictionary
+
+    @staticmethod
+    def train(samples: List[bytes]) -> bytes:
+        """Verse aus der ganzen Stichprobe aneinandergereiht, bis das 32-KB-Fenster voll ist"""
+        step = max(1, sum(len(sample) for sample in samples) // ZLIB_DICT_SIZE)
+        chosen = list(dict.fromkeys(samples[::step]))
+        return b''.join(chosen)[-ZLIB_DICT_SIZE:]
+
+    def compress(self, data: bytes) -> bytes:
+        compressor = zlib.compressobj(9, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY, self.dictionary)
+        return compressor.compress(data) + compressor.flush()
+
+    def decompress(self, data: bytes) -> bytes:
+        decompressor = zlib.decompressobj(-15, zdict=self.dictionary)
+        return decompressor.decompress(data) + decompressor.flush()
+
+
+class ZstdCodec:
+    """zstd mit trainiertem Wörterbuch, ohne Prüfsumme und Wörterbuch-ID je Datensatz"""
+
+    codec_id = CODEC_ZSTD
+
+    def __init__(self, dictionary: bytes):
+        self.dictionary = dictionary
+        compression_dict = zstandard.ZstdCompressionDict(dictionary)
+        self.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=compression_dict,
+                                                   write_checksum=False, write_dict_id=False)
+        self.decompressor = zstandard.ZstdDecompressor(dict_data=compression_dict)
+
+    @staticmethod
+    def train(samples: List[bytes]) -> bytes:
+        return zstandard.train_dictionary(ZSTD_DICT_SIZE, samples).as_bytes()
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self.decompressor.decompress(data)
+
+
+def codec_class(codec_id: int):
+    if codec_id == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstandard package required for zstd verse stores")
+        return ZstdCodec
+    return ZlibCodec
+
+
+def default_codec() -> int:
+    return CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+
+
+# --- Bau ----------------------------------------------------------------------------------------
+
+def read_corpus(paths: Iterable[str]) -> Iterable[Tuple[str, int, int, str]]:
+    """(Buch, Kapitel, Vers, Text) aus NDJSON-Dateien von crawl_chapters.py"""
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    item = json.loads(line)
+                    for number, text in item['v']:
+                        yield item['b'], int(item['c']), int(number), text
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+
+def _sample(records: List[Tuple[int, bytes]]) -> List[bytes]:
+    """Gleichmäßig über die Übersetzung verteilte Stichprobe bis SAMPLE_BYTES"""
+    total = sum(len(text) for _, text in records)
+    step = max(1, round(total / SAMPLE_BYTES)) if total > SAMPLE_BYTES else 1
+    return [text for _, text in records[::step]]
+
+
+def build(translation: str, corpus: Iterable[Tuple[str, int, int, str]], path: Optional[str] = None,
+          codec_id: Optional[int] = None) -> Dict:
+    """Wörterbuch trainieren, alle Verse einzeln komprimieren und die Datei atomar schreiben"""
+    extra_books: List[str] = []
+    records: Dict[int, bytes] = {}
+    for book, chapter, verse, text in corpus:
+        number = book_number(book)
+        if number is None:
+            key = _book_key(book)
+            known = [_book_key(name) for name in extra_books]
+            if key not in known:
+                extra_books.append(book)
+                known.append(key)
+            number = EXTRA_BOOK_BASE + known.index(key)
+        records[verse_id(number, chapter, verse)] = text.encode('utf-8')
+    ordered = sorted(records.items())
+    if not ordered:
+        raise ValueError(f"No verses for {translation}")
+
+    codec_id = default_codec() if codec_id is None else codec_id
+    codec_type = codec_class(codec_id)
+    started = time.monotonic()
+    codec = codec_type(codec_type.train(_sample(ordered)))
+    trained = time.monotonic() - started
+
+    table = []
+    blob = []
+    offset = 0
+    for vid, text in ordered:
+        compressed = codec.compress(text)
+        table.append(ENTRY.pack(vid, offset, len(compressed)))
+        blob.append(compressed)
+        offset += len(compressed)
+
+    # Im JSON statt im Kopf: Kürzel wie NGÜ sind kein ASCII
+    meta = json.dumps({'translation': translation, 'books': extra_books}, ensure_ascii=False).encode('utf-8')
+    table_bytes = b''.join(table)
+    checksum = zlib.crc32(table_bytes, zlib.crc32(meta, zlib.crc32(codec.dictionary)))
+    header = HEADER.pack(MAGIC, VERSION, codec_id, len(ordered), len(codec.dictionary), len(meta), checksum)
+
+    path = path or store_path(translation)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for part in (header, codec.dictionary, meta, table_bytes):
+                f.write(part)
+            for compressed in blob:
+                f.write(compressed)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    raw = sum(len(text) for _, text in ordered)
+    return {
+        'translation': translation,
+        'codec': CODEC_NAMES[codec_id],
+        'verses': len(ordered),
+        'raw_bytes': raw,
+        'data_bytes': offset,
+        'dictionary_bytes': len(codec.dictionary),
+        'file_bytes': os.path.getsize(path),
+        'ratio': round(raw / offset, 2),
+        'ratio_with_overhead': round(raw / os.path.getsize(path), 2),
+        'train_s': round(trained, 2),
+        'path': path,
+    }
+
+
+# --- Lesen --------------------------------------------------------------------------------------
+
+class VerseStore:
+    """Versspeicher einer Übersetzung per mmap; Verse werden einzeln entpackt"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            (magic, version, codec_id, self.count, dictionary_size, meta_size,
+             self.checksum) = HEADER.unpack_from(self.data)
+        except struct.error:
+            raise ValueError("Verse store too short")
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Unknown verse store format")
+        self.codec_id = codec_id
+
+        offset = HEADER.size
+        dictionary = self.data[offset:offset + dictionary_size]
+        offset += dictionary_size
+        meta = json.loads(self.data[offset:offset + meta_size])
+        self.translation: str = meta['translation']
+        self.extra_books: List[str] = meta['books']
+        offset += meta_size
+        self.table_offset = offset
+        self.data_offset = offset + self.count * ENTRY.size
+        self.codec = codec_class(codec_id)(dictionary)
+        # Nur die IDs (jedes dritte uint32 der Tabelle) als Array für die Binärsuche
+        table = array('I', self.data[self.table_offset:self.data_offset])
+        if sys.byteorder != 'little':
+            table.byteswap()
+        self.ids = table[::3]
+
+    def close(self):
+        self.data.close()
+
+    def verify(self) -> bool:
+        """Wörterbuch, Metadaten und Tabelle liegen am Stück hinter dem Kopf"""
+        return zlib.crc32(self.data[HEADER.size:self.data_offset]) == self.checksum
+
+    def book_number(self, name: str) -> Optional[int]:
+        number = book_number(name)
+        if number is not None:
+            return number
+        key = _book_key(name)
+        for index, book in enumerate(self.extra_books):
+            if _book_key(book) == key:
+                return EXTRA_BOOK_BASE + index
+        return None
+
+    def book_name(self, number: int) -> str:
+        if number >= EXTRA_BOOK_BASE:
+            return self.extra_books[number - EXTRA_BOOK_BASE]
+        return BIBLE_BOOKS[number - 1]
+
+    def _text(self, index: int) -> str:
+        _, offset, length = ENTRY.unpack_from(self.data, self.table_offset + index * ENTRY.size)
+        start = self.data_offset + offset
+        return self.codec.decompress(self.data[start:start + length]).decode('utf-8')
+
+    def get_id(self, vid: int) -> Optional[str]:
+        index = bisect_left(self.ids, vid)
+        if index == self.count or self.ids[index] != vid:
+            return None
+        return self._text(index)
+
+    def get(self, book: str, chapter: int, verse: int) -> Optional[str]:
+        number = self.book_number(book)
+        return self.get_id(verse_id(number, chapter, verse)) if number is not None else None
+
+    def verses(self, book: str, chapter: int, start: int = 1, end: Optional[int] = None) -> List[Tuple[int, str]]:
+        """(Vers, Text) eines Kapitels bzw. Versbereichs"""
+        number = self.book_number(book)
+        if number is None:
+            return []
+        low = bisect_left(self.ids, verse_id(number, chapter, start))
+        high = bisect_left(self.ids, verse_id(number, chapter, end + 1 if end else 1000))
+        return [(split_id(self.ids[index])[2], self._text(index)) for index in range(low, high)]
+
+    def items(self) -> Iterable[Tuple[int, str]]:
+        for index in range(self.count):
+            yield self.ids[index], self._text(index)
+
+
+_stores: Dict[str, Optional[VerseStore]] = {}
+
+
+def get_store(translation: str) -> Optional[VerseStore]:
+    """Versspeicher einer Übersetzung einmal pro Prozess öffnen, None ohne Datei"""
+    if translation not in _stores:
+        store = None
+        path = store_path(translation)
+        if os.path.exists(path):
+            try:
+                store = VerseStore(path)
+            except (OSError, ValueError, RuntimeError) as e:
+                print(f"Verse store: {path} ignored - {e}", file=sys.stderr)
+        _stores[translation] = store
+    return _stores[translation]
+
+
+def lookup(translation: str, reference: str) -> Optional[List[Tuple[int, str]]]:
+    """Verse zu "Buch Kapitel[,Vers[-Vers]]", None wenn Speicher oder Verse fehlen"""
+    store = get_store(translation)
+    match = REFERENCE_PATTERN.match(reference.strip())
+    if store is None or not match:
+        return None
+    start = int(match.group(3)) if match.group(3) else 1
+    end = int(match.group(4)) if match.group(4) else (start if match.group(3) else None)
+    verses = store.verses(match.group(1), int(match.group(2)), start, end)
+    return verses or None
+
+
+# --- Messung ------------------------------------------------------------------------------------
+
+def bench(translation: str, samples: int = 20000) -> Dict:
+    """Kompressionsrate und Dekodierdurchsatz bei zufälligem Einzelzugriff"""
+    started = time.monotonic()
+    store = VerseStore(store_path(translation))
+    opened = time.monotonic() - started
+
+    texts = [text.encode('utf-8') for _, text in store.items()]
+    raw = sum(len(text) for text in texts)
+    stored = len(store.data) - store.data_offset
+    # Vergleich: jeder Vers einzeln mit zlib ohne Wörterbuch
+    plain = sum(len(zlib.compress(text, 9)) for text in texts)
+
+    ids = random.Random(0).choices(store.ids, k=samples)
+    started = time.monotonic()
+    decoded = 0
+    for vid in ids:
+        decoded += len(store.get_id(vid).encode('utf-8'))
+    elapsed = time.monotonic() - started
+
+    return {
+        'translation': translation,
+        'codec': CODEC_NAMES[store.codec_id],
+        'verses': store.count,
+        'raw_bytes': raw,
+        'data_bytes': stored,
+        'file_bytes': len(store.data),
+        'ratio': round(raw / stored, 2),
+        'ratio_with_overhead': round(raw / len(store.data), 2),
+        'ratio_zlib_without_dictionary': round(raw / plain, 2),
+        'open_ms': round(opened * 1000, 2),
+        'random_reads': samples,
+        'decode_verses_per_s': int(samples / elapsed),
+        'decode_mb_per_s': round(decoded / elapsed / 1e6, 2),
+        'read_us': round(elapsed / samples * 1e6, 2),
+    }
+
+
+def stats() -> Dict:
+    report = {}
+    for path in sorted(glob.glob(os.path.join(STORE_DIR, '*.vstore'))):
+        try:
+            store = VerseStore(path)
+        except (OSError, ValueError, RuntimeError):
+            continue
+        report[store.translation] = {'codec': CODEC_NAMES[store.codec_id], 'verses': store.count,
+                                     'file_bytes': len(store.data)}
+        store.close()
+    report['total_bytes'] = sum(entry['file_bytes'] for entry in report.values())
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wörterbuch-komprimierter Versspeicher pro Übersetzung")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = sub.add_parser('build', help="Speicher aus Crawler-NDJSON bauen")
+    build_parser.add_argument('translation')
+    build_parser.add_argument('corpus', nargs='*', help="NDJSON-Dateien (Standard: <SCRAPER_STATE_DIR>/corpus/<Übersetzung>.ndjson)")
+    build_parser.add_argument('--codec', choices=('zlib', 'zstd'), help="Standard: zstd, falls installiert")
+    build_parser.add_argument('--output', help="Zieldatei (Standard: <SCRAPER_STATE_DIR>/verses/<Übersetzung>.vstore)")
+
+    get_parser = sub.add_parser('get', help="Verse einer Stelle ausgeben")
+    get_parser.add_argument('translation')
+    get_parser.add_argument('reference')
+
+    bench_parser = sub.add_parser('bench', help="Kompressionsrate und Dekodierdurchsatz messen")
+    bench_parser.add_argument('translation')
+    bench_parser.add_argument('--samples', type=int, default=20000)
+
+    sub.add_parser('stats', help="Vorhandene Speicher und Größen")
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'build':
+            paths = args.corpus or [os.path.join(CORPUS_DIR, f"{args.translation}.ndjson")]
+            codec_id = {'zlib': CODEC_ZLIB, 'zstd': CODEC_ZSTD}.get(args.codec)
+            report = build(args.translation, read_corpus(paths), args.output, codec_id)
+        elif args.command == 'get':
+            verses = lookup(args.translation, args.reference)
+            report = ({'reference': args.reference, 'translation': args.translation,
+                       'verses': [{'number': number, 'text': text} for number, text in verses]}
+                      if verses else {'error': 'Verses not found'})
+        elif args.command == 'bench':
+            report = bench(args.translation, args.samples)
+        else:
+            report = stats()
+    except (OSError, ValueError, RuntimeError) as e:
+        print(json.dumps({"error": str(e)}))
+        sys.exit(1)
+
+    print(json.dumps(report, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
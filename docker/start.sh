@@ -3,8 +3,17 @@ set -e
 
 echo "=== LOSUNGEN API CONTAINER STARTING ==="
 
+# Cache-Snapshot (ins Image gebacken oder per SCRAPER_SNAPSHOT gemountet): der Verse-Cache liest
+# sofort daraus, der Import füllt Redis und den Scraper-Zustand im Hintergrund
+SNAPSHOT="${SCRAPER_SNAPSHOT:-/var/lib/ketiv/snapshot/cache.snap}"
+if [ -f "$SNAPSHOT" ]; then
+    export SCRAPER_SNAPSHOT="$SNAPSHOT"
+    echo "Importing cache snapshot $SNAPSHOT..."
+    (sleep 5 && runuser -u www-data -- /opt/venv/bin/python3 /var/www/html/snapshot.py import "$SNAPSHOT") >> /proc/1/fd/1 2>&1 &
+fi
+
 # Container-Env für Cron-Jobs verfügbar machen (Cron erbt keine Docker-Env-Variablen!)
-printenv | grep -E '^(DB_|REDIS_|API_KEY_|BIBLESERVER_|TZ=)' | while IFS='=' read -r key value; do
+printenv | grep -E '^(DB_|REDIS_|API_KEY_|BIBLESERVER_|SCRAPER_|TZ=)' | while IFS='=' read -r key value; do
     printf "export %s='%s'\n" "$key" "${value//\'/\'\\\'\'}"
 done > /etc/container.env
 chmod 600 /etc/container.env
@@ -16,6 +25,20 @@ service cron start
 # Übersetzungen für heute nach, ohne den Apache-Start zu blockieren
 (sleep 10 && /usr/local/bin/php /var/www/html/scripts/startup_check.php) >> /proc/1/fd/1 2>&1 &
 
+# Scrape-Warteschlange als www-data, damit Socket und Zustandsdateien für PHP beschreibbar bleiben
+if [ "${SCRAPER_QUEUE:-1}" = "1" ]; then
+    echo "Starting scrape queue..."
+    runuser -u www-data -- /opt/venv/bin/python3 /var/www/html/scrape_queue.py serve >> /proc/1/fd/1 2>&1 &
+fi
+
+# Fähigkeiten-Matrix der Übersetzungen erstellen, falls noch keine vorhanden ist (danach wöchentlich per Cron)
+if [ "${SCRAPER_CAPABILITY_PROBE:-1}" = "1" ]; then
+    STATE_DIR="${SCRAPER_STATE_DIR:-/tmp/ketiv_scraper}"
+    if [ ! -f "${SCRAPER_CAPABILITY_FILE:-$STATE_DIR/capabilities.json}" ]; then
+        (sleep 30 && runuser -u www-data -- /opt/venv/bin/python3 /var/www/html/capabilities.py probe) >> /proc/1/fd/1 2>&1 &
+    fi
+fi
+
 echo "Starting Apache2..."
 echo "=== LOSUNGEN API READY ==="
 exec apache2-foreground
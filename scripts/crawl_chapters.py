@@ -0,0 +1,329 @@
+#!/opt/venv/bin/python3
+"""
+Kapitel-Crawler für eine ganze Übersetzung
+Lädt jedes Kapitel (Liste aus sql/bibelbuecher mit kapitel und versanzahl.sql) über
+BibleScraper, parst die Seiten in einem Prozess-Pool und hängt pro Kapitel eine
+kompakte NDJSON-Zeile an die Ausgabedatei an.
+
+Verwendung:
+    python3 crawl_chapters.py LUT [--output datei.ndjson] [--rate 2] [--concurrency 4]
+                                  [--workers N] [--books Gen,Ex] [--deuterocanonical] [--store]
+
+Ausgabe (eine Zeile pro Kapitel):
+    {"t":"LUT","b":"Römer","c":8,"v":[[1,"..."],[2,"..."],...]}
+
+Die Ausgabedatei ist zugleich der Checkpoint: Ein erneuter Aufruf überspringt alle
+Kapitel, die dort schon stehen, und schneidet eine beim Abbruch halb geschriebene
+letzte Zeile ab. Fortschritt und fehlgeschlagene Kapitel stehen zusätzlich in
+<ausgabe>.state.json.
+
+Mit --store wird aus der Ausgabe anschließend der komprimierte Versspeicher der
+Übersetzung gebaut (siehe api/verse_store.py).
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SQL = os.path.join(BASE_DIR, '..', 'sql', 'bibelbuecher mit kapitel und versanzahl.sql')
+
+# Im Repository liegen die Scraper unter api/, im Container direkt in /var/www/html
+API_DIR = next((d for d in (os.path.join(BASE_DIR, '..', 'api'), os.path.join(BASE_DIR, '..'))
+                if os.path.exists(os.path.join(d, 'bible_scraper.py'))), os.path.join(BASE_DIR, '..', 'api'))
+sys.path.insert(0, API_DIR)
+
+import scheduler  # noqa: E402
+import upstream  # noqa: E402
+import verse_store  # noqa: E402
+from bible_scraper import BibleScraper  # noqa: E402
+
+# Abkürzungen der SQL-Datei -> Buchnamen, wie sie in Losungen-Referenzen vorkommen
+BOOK_NAMES = {
+    'Gen': '1. Mose', 'Ex': '2. Mose', 'Lev': '3. Mose', 'Num': '4. Mose', 'Dtn': '5. Mose',
+    'Jos': 'Josua', 'Ri': 'Richter', '1 Sam': '1. Samuel', '2 Sam': '2. Samuel',
+    '1 Kön': '1. Könige', '2 Kön': '2. Könige', 'Jes': 'Jesaja', 'Jer': 'Jeremia',
+    'Ez/Hes': 'Hesekiel', 'Hos': 'Hosea', 'Joel': 'Joel', 'Am': 'Amos', 'Ob': 'Obadja',
+    'Jona': 'Jona', 'Mi': 'Micha', 'Nah': 'Nahum', 'Hab': 'Habakuk', 'Zef': 'Zefanja',
+    'Hag': 'Haggai', 'Sach': 'Sacharja', 'Mal': 'Maleachi', 'Ps': 'Psalm', 'Spr': 'Sprüche',
+    'Hiob': 'Hiob', 'Hld': 'Hohelied', 'Rut': 'Rut', 'Klgl': 'Klagelieder', 'Koh': 'Prediger',
+    'Est': 'Ester', 'Dan': 'Daniel', 'Esr': 'Esra', 'Neh': 'Nehemia',
+    '1 Chr': '1. Chronik', '2 Chr': '2. Chronik',
+    'Mt': 'Matthäus', 'Mk': 'Markus', 'Lk': 'Lukas', 'Joh': 'Johannes', 'Apg': 'Apostelgeschichte',
+    'Röm': 'Römer', '1 Kor': '1. Korinther', '2 Kor': '2. Korinther', 'Gal': 'Galater',
+    'Eph': 'Epheser', 'Phil': 'Philipper', 'Kol': 'Kolosser', '1 Thess': '1. Thessalonicher',
+    '2 Thess': '2. Thessalonicher', '1 Tim': '1. Timotheus', '2 Tim': '2. Timotheus',
+    'Tit': 'Titus', 'Phlm': 'Philemon', 'Hebr': 'Hebräer', 'Jak': 'Jakobus',
+    '1 Petr': '1. Petrus', '2 Petr': '2. Petrus', '1 Joh': '1. Johannes', '2 Joh': '2. Johannes',
+    '3 Joh': '3. Johannes', 'Jud': 'Judas', 'Offb/Apk': 'Offenbarung',
+}
+
+# Spätschriften, nur mit --deuterocanonical (nicht jede Übersetzung enthält sie).
+# Zusätze zu Ester/Daniel, Susanna, Bel und Jeremiabrief sind bei bibleserver.com
+# Teil anderer Bücher und werden nicht einzeln geladen.
+DEUTEROCANONICAL_NAMES = {
+    'Tob': 'Tobit', 'Jdt': 'Judit', 'Weish': 'Weisheit', 'Sir': 'Jesus Sirach', 'Bar': 'Baruch',
+    '1 Makk': '1. Makkabäer', '2 Makk': '2. Makkabäer', 'Geb Man': 'Gebet des Manasse',
+}
+
+BOOK_ROW = re.compile(r"\((\d+),'((?:[^']|'')*)','((?:[^']|'')*)',(\d+)\)")
+CHAPTER_ROW = re.compile(r"\((\d+),(\d+),(\d+)\)")
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+def load_chapters(path: str, deuterocanonical: bool = False,
+                  books: Optional[Set[str]] = None) -> List[Tuple[str, int, int]]:
+    """(Buchname, Kapitel, Versanzahl) in der Reihenfolge der SQL-Datei"""
+    with open(path, 'r', encoding='utf-8') as f:
+        sql = f.read()
+
+    books_part, _, chapters_part = sql.partition('INSERT INTO `kapitel`')
+    names = dict(BOOK_NAMES, **DEUTEROCANONICAL_NAMES) if deuterocanonical else BOOK_NAMES
+
+    book_names = {}
+    for buch_id, _name, abbreviation, _count in BOOK_ROW.findall(books_part):
+        if abbreviation in names and (not books or abbreviation in books or names[abbreviation] in books):
+            book_names[int(buch_id)] = names[abbreviation]
+
+    chapters = []
+    for buch_id, chapter, verses in CHAPTER_ROW.findall(chapters_part):
+        if int(buch_id) in book_names:
+            chapters.append((book_names[int(buch_id)], int(chapter), int(verses)))
+    return chapters
+
+
+def chapter_reference(book: str, chapter: int, verses: int) -> Dict:
+    """Referenz im Format von BibleScraper.parse_reference für ein ganzes Kapitel"""
+    return {
+        'book': book,
+        'chapter': chapter,
+        'start_verse': 1,
+        'end_verse': verses,
+        'original': f"{book} {chapter}",
+        'optional_verses': [],
+        'whole_chapter': True
+    }
+
+
+class RateLimiter:
+    """Token-Bucket über alle Fetch-Threads: höchstens `rate` Anfragen pro Sekunde"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_scraper: Optional[BibleScraper] = None
+
+
+def _get_scraper() -> BibleScraper:
+    global _scraper
+    if _scraper is None:
+        _scraper = BibleScraper()
+    return _scraper
+
+
+def fetch_chapter(job: Tuple[str, int, int], translation: str, limiter: RateLimiter,
+                  retries: int) -> Tuple[int, str, str]:
+    """Netzwerk-Stufe (Threads): Kapitelseite laden, bei 429/5xx mit Backoff wiederholen"""
+    reference = chapter_reference(*job)
+    attempt = 0
+    while True:
+        limiter.wait()
+        try:
+            status, html, url = _get_scraper().fetch_reference(reference, translation)
+        except Exception:
+            if attempt >= retries:
+                raise
+            status, html, url = None, '', ''
+        if status == 200 or (status is not None and status not in RETRY_STATUS) or attempt >= retries:
+            return status, html, url
+        time.sleep(min(60, 2 ** attempt))
+        attempt += 1
+
+
+def parse_chapter(job: Tuple[str, int, int], translation: str, html: str, url: str) -> Optional[Dict]:
+    """Parse-Stufe (Prozess-Pool): Verse aus der Seite lesen und kompakt zurückgeben"""
+    reference = chapter_reference(*job)
+    scraper = _get_scraper()
+    if translation == 'BIGS':
+        result = scraper.parse_bigs(html, reference, url)
+    else:
+        result = scraper.parse_bibleserver(html, reference, translation, url)
+    if not result:
+        return None
+
+    if result['verses']:
+        verses = [[verse['number'], verse['text']] for verse in result['verses']]
+    else:
+        verses = [[1, result['text']]]
+    return {'t': translation, 'b': job[0], 'c': job[1], 'v': verses}
+
+
+def read_done(path: str) -> Set[Tuple[str, int]]:
+    """Bereits geschriebene Kapitel; eine unvollständige letzte Zeile wird abgeschnitten"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+
+    valid_length = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                record = json.loads(line)
+                done.add((record['b'], record['c']))
+            except (ValueError, KeyError):
+                break
+            valid_length += len(line)
+
+    if valid_length < os.path.getsize(path):
+        with open(path, 'r+b') as f:
+            f.truncate(valid_length)
+    return done
+
+
+def write_state(path: str, state: Dict):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def crawl(translation: str, chapters: List[Tuple[str, int, int]], output: str, rate: float,
+          concurrency: int, workers: int, retries: int) -> Dict:
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    done = read_done(output)
+    todo: Iterator[Tuple[str, int, int]] = iter([job for job in chapters if (job[0], job[1]) not in done])
+
+    state = {
+        'translation': translation,
+        'total': len(chapters),
+        'done': len(done),
+        'failed': [],
+        'started': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    state_path = output + '.state.json'
+    limiter = RateLimiter(rate)
+    # Begrenzt, wie viele geladene, noch nicht geparste Seiten im Speicher liegen
+    max_in_flight = concurrency + 2 * workers
+
+    started = time.monotonic()
+    last_state = 0.0
+    with open(output, 'a', encoding='utf-8') as out, \
+            ThreadPoolExecutor(max_workers=concurrency) as fetchers, \
+            ProcessPoolExecutor(max_workers=workers) as parsers:
+        # Parse-Prozesse starten, bevor es Download-Threads gibt: ein späterer fork würde
+        # gerade gehaltene Dateisperren (Latenz-Fenster, Single-Flight, Hintergrund-Slots)
+        # in die Kinder vererben, und die Sperren blieben für immer belegt
+        parsers.submit(os.getpid).result()
+
+        fetching: Dict = {}
+        parsing: Dict = {}
+        exhausted = False
+
+        while True:
+            while not exhausted and len(fetching) + len(parsing) < max_in_flight:
+                job = next(todo, None)
+                if job is None:
+                    exhausted = True
+                    break
+                fetching[fetchers.submit(fetch_chapter, job, translation, limiter, retries)] = job
+
+            if not fetching and not parsing:
+                break
+
+            finished, _ = wait(list(fetching) + list(parsing), return_when=FIRST_COMPLETED)
+            for future in finished:
+                if future in fetching:
+                    job = fetching.pop(future)
+                    try:
+                        status, html, url = future.result()
+                    except Exception as e:
+                        state['failed'].append(f"{job[0]} {job[1]}: {e.__class__.__name__}")
+                        continue
+                    if status != 200:
+                        state['failed'].append(f"{job[0]} {job[1]}: HTTP {status}")
+                        continue
+                    parsing[parsers.submit(parse_chapter, job, translation, html, url)] = job
+                else:
+                    job = parsing.pop(future)
+                    try:
+                        record = future.result()
+                    except Exception:
+                        record = None
+                    if record is None:
+                        state['failed'].append(f"{job[0]} {job[1]}: no verses")
+                        continue
+                    out.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+                    out.flush()
+                    state['done'] += 1
+
+            if time.monotonic() - last_state > 5:
+                state['updated'] = time.strftime('%Y-%m-%d %H:%M:%S')
+                write_state(state_path, state)
+                last_state = time.monotonic()
+
+        os.fsync(out.fileno())
+
+    state['updated'] = time.strftime('%Y-%m-%d %H:%M:%S')
+    state['duration_s'] = round(time.monotonic() - started, 1)
+    write_state(state_path, state)
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lädt alle Kapitel einer Übersetzung (fortsetzbar)")
+    parser.add_argument('translation', help="Übersetzung, z.B. LUT, ELB oder BIGS")
+    parser.add_argument('--output', help="NDJSON-Ausgabe (Standard: <SCRAPER_STATE_DIR>/corpus/<Übersetzung>.ndjson)")
+    parser.add_argument('--sql', default=DEFAULT_SQL, help="SQL-Datei mit Büchern und Kapiteln")
+    parser.add_argument('--rate', type=float, default=2.0, help="Maximale Anfragen pro Sekunde (0 = unbegrenzt)")
+    parser.add_argument('--concurrency', type=int, default=4, help="Parallele Downloads")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Parse-Prozesse")
+    parser.add_argument('--retries', type=int, default=3, help="Wiederholungen bei 429/5xx")
+    parser.add_argument('--books', help="Nur diese Bücher (Abkürzungen oder Namen, kommagetrennt)")
+    parser.add_argument('--deuterocanonical', action='store_true', help="Spätschriften mitladen")
+    parser.add_argument('--store', action='store_true', help="Danach den Versspeicher (verse_store.py) bauen")
+    args = parser.parse_args()
+
+    output = args.output or os.path.join(upstream.STATE_DIR, 'corpus', f"{args.translation}.ndjson")
+    books = {book.strip() for book in args.books.split(',')} if args.books else None
+    chapters = load_chapters(args.sql, args.deuterocanonical, books)
+
+    # Hedged Requests würden das Rate-Limit verdoppeln
+    upstream.HEDGE_ENABLED = False
+    # Der Crawl ist Hintergrund-Arbeit: Nutzeranfragen haben Vorrang (SCRAPER_BACKGROUND_SLOTS)
+    scheduler.set_priority(scheduler.BACKGROUND)
+
+    state = crawl(args.translation, chapters, output, args.rate, args.concurrency, args.workers, args.retries)
+    summary = dict(state, failed=len(state['failed']), output=output)
+    if args.store:
+        summary['store'] = verse_store.build(args.translation, verse_store.read_corpus([output]))
+    print(json.dumps(summary, ensure_ascii=False))
+    for failure in state['failed']:
+        print(f"failed: {failure}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -64,9 +64,9 @@ class DailyFetcher {
             try {
                 echo sprintf("[%2d/%2d] %4s: ", $index + 1, count($this->availableTranslations), $translation);
                 
-                // Python-Scraper aufrufen
+                // Python-Scraper aufrufen; als Hintergrund-Arbeit hinter Nutzeranfragen eingereiht (scheduler.py)
                 $pythonScript = '/var/www/html/scraper.py';
-                $command = "/opt/venv/bin/python3 {$pythonScript} " . escapeshellarg($translation) . " 2>&1";
+                $command = "/opt/venv/bin/python3 {$pythonScript} " . escapeshellarg($translation) . " --priority background 2>&1";
                 $output = shell_exec($command);
                 
                 if (!$output) {
@@ -0,0 +1,336 @@
+#!/opt/venv/bin/python3
+"""
+Lokaler Stand-in für bibleserver.com, BIGS und losungen.de
+Spielt aufgezeichnete Seiten ab (oder erzeugt Seiten im Original-Markup) und
+simuliert Latenz, Fehler und Throttling – für Lasttests ohne Netzwerk.
+
+Verwendung:
+    python3 fake_upstream.py serve [--port 8780] [--recordings DIR]
+                             [--latency [quelle=]SPEC ...] [--error-rate 0.02]
+                             [--throttle-rate 0.01] [--rate-limit 50] [--capacity 4]
+    python3 fake_upstream.py record --recordings DIR URL [URL ...]
+
+Latenz-SPEC: fixed:MS | uniform:MIN,MAX | lognormal:MEDIAN_MS,SIGMA
+Quellen: bibleserver, bigs, losungen (ohne Präfix gilt die Angabe für alle)
+--capacity N: höchstens N Anfragen werden gleichzeitig bedient, weitere warten (Latenz steigt mit der Last)
+
+Die Scraper werden über Umgebungsvariablen auf den Stand-in umgeleitet, die beim
+Start ausgegeben werden (SCRAPER_BIBLESERVER_URL, SCRAPER_BIGS_URL, SCRAPER_LOSUNGEN_URL).
+Statistik: GET /__stats, Zurücksetzen: POST /__reset
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import quote, unquote, urlparse
+
+SOURCES = ('bibleserver', 'bigs', 'losungen')
+
+# Zuordnung echter Hosts zu Quellen für den Aufnahme-Modus
+SOURCE_HOSTS = {
+    'www.bibleserver.com': 'bibleserver',
+    'www.bibel-in-gerechter-sprache.de': 'bigs',
+    'www.losungen.de': 'losungen',
+}
+
+DEFAULT_VERSES_PER_CHAPTER = 30
+PADDING_KB = 60  # Navigation/Skripte, damit die Parse-Kosten realistisch bleiben
+
+LOREM = ("Und Gott sprach zu dem Volk, und sie hörten seine Stimme und gingen "
+         "ihren Weg durch die Wüste, bis sie an das Wasser kamen")
+
+
+class LatencyModel:
+    """Latenzverteilung aus einer SPEC-Zeichenkette"""
+
+    def __init__(self, spec: str = 'fixed:0'):
+        kind, _, params = spec.partition(':')
+        values = [float(v) for v in params.split(',') if v]
+        if kind not in ('fixed', 'uniform', 'lognormal'):
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        self.kind = kind
+        self.values = values or [0.0]
+        self.spec = spec
+
+    def sample(self) -> float:
+        """Latenz in Sekunden"""
+        if self.kind == 'uniform':
+            return random.uniform(self.values[0], self.values[1]) / 1000.0
+        if self.kind == 'lognormal':
+            median, sigma = self.values[0], (self.values[1] if len(self.values) > 1 else 0.5)
+            return random.lognormvariate(math.log(max(median, 0.001)), sigma) / 1000.0
+        return self.values[0] / 1000.0
+
+
+class UpstreamState:
+    def __init__(self, args):
+        self.recordings = args.recordings
+        self.error_rate = args.error_rate
+        self.throttle_rate = args.throttle_rate
+        self.rate_limit = args.rate_limit
+        self.verses = args.verses
+        self.padding = ('<!-- ' + 'x' * 1020 + ' -->\n') * args.padding_kb
+        self.capacity = threading.BoundedSemaphore(args.capacity) if args.capacity else None
+
+        self.latency = {source: LatencyModel() for source in SOURCES}
+        for spec in args.latency or []:
+            source, sep, dist = spec.partition('=')
+            if sep and source in SOURCES:
+                self.latency[source] = LatencyModel(dist)
+            else:
+                for name in SOURCES:
+                    self.latency[name] = LatencyModel(spec)
+
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counts = {source: {'requests': 0, 'errors': 0, 'throttled': 0, 'replayed': 0} for source in SOURCES}
+            self.window_start = time.monotonic()
+            self.window_count = 0
+
+    def count(self, source: str, field: str):
+        with self.lock:
+            self.counts[source][field] += 1
+
+    def over_rate_limit(self) -> bool:
+        if not self.rate_limit:
+            return False
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window_start >= 1.0:
+                self.window_start = now
+                self.window_count = 0
+            self.window_count += 1
+            return self.window_count > self.rate_limit
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {
+                'sources': json.loads(json.dumps(self.counts)),
+                'total_requests': sum(c['requests'] for c in self.counts.values()),
+                'latency': {source: model.spec for source, model in self.latency.items()},
+                'error_rate': self.error_rate,
+                'throttle_rate': self.throttle_rate,
+                'rate_limit': self.rate_limit
+            }
+
+
+def recording_path(recordings: str, source: str, path_and_query: str) -> str:
+    return os.path.join(recordings, source, quote(path_and_query, safe='') + '.html')
+
+
+def _verse_text(book: str, chapter: int, verse: int) -> str:
+    return f"{LOREM} ({book} {chapter},{verse})."
+
+
+def render_bibleserver(path: str, verses: int, padding: str) -> Optional[str]:
+    """Kapitelseite im Markup von bibleserver.com (/<Übersetzung>/<BuchKapitel[,Verse]>)"""
+    match = re.match(r'^/([^/]+)/(.+?)(\d+)(?:,(\d+)(?:-(\d+))?)?$', unquote(path))
+    if not match:
+        return None
+    translation, book, chapter = match.group(1), match.group(2), int(match.group(3))
+    last = max(verses, int(match.group(5) or match.group(4) or 0))
+    if last > 200:
+        last = verses
+
+    spans = []
+    for verse in range(1, last + 1):
+        spans.append(
+            f'<span class="verse v{verse}" data-vid="{chapter}{verse:03d}">'
+            f'<span class="verse-number">{verse}</span>'
+            f'<span class="verse-content"><span class="verse-content--hover">'
+            f'{_verse_text(book, chapter, verse)}<sup class="footnote">a</sup>'
+            f'<span class="verse-references"><a href="/{translation}/{book}{chapter + 1},{verse}">'
+            f'{book} {chapter + 1},{verse}</a></span>'
+            f'</span></span></span> '
+        )
+    return (f'<!DOCTYPE html><html><head><title>{book} {chapter} | {translation}</title>'
+            f'<script>{padding}</script></head><body><nav>{padding}</nav>'
+            f'<article class="chapter">{"".join(spans)}</article><footer>{padding}</footer></body></html>')
+
+
+def render_bigs(query: str, verses: int, padding: str) -> Optional[str]:
+    """Seite im Markup von BIGS online (?<Buch>/<Kapitel>/<Vers[-Vers]>/)"""
+    match = re.match(r'^([^/]+)/(\d+)/(\d+)(?:-(\d+))?/?$', unquote(query))
+    if not match:
+        return None
+    book, chapter = match.group(1), int(match.group(2))
+    last = max(verses, int(match.group(4) or match.group(3)))
+
+    parts = []
+    for verse in range(1, last + 1):
+        parts.append(f'<span class="vers">{verse}</span>{_verse_text(book, chapter, verse)} '
+                     f'<a class="glossar" href="#">Gott</a>° ')
+    return (f'<!DOCTYPE html><html><head><script>{padding}</script></head><body><nav>{padding}</nav>'
+            f'<div class="bibelText"><p>{"".join(parts)}</p></div></body></html>')
+
+
+def render_losungen(padding: str) -> str:
+    """Startseite im Markup von losungen.de"""
+    today = time.strftime('%d.%m.%Y')
+    return (f'<!DOCTYPE html><html><head><script>{padding}</script></head><body><nav>{padding}</nav>'
+            '<div class="tx_phipfelswatchword"><div class="watchwordWrapper">'
+            f'<p class="dateWrapper">{today}</p>'
+            '<p class="watchword">Der HERR ist mein Hirte, mir wird nichts mangeln. '
+            '<span class="watchwordPassage">Psalm 23,1</span></p>'
+            '<p class="instructiveText">Ich bin der gute Hirte. '
+            '<span class="instructiveTextPassage">Johannes 10,11</span></p>'
+            f'</div></div><footer>{padding}</footer></body></html>')
+
+
+class FakeUpstreamHandler(BaseHTTPRequestHandler):
+    state: UpstreamState = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: str, content_type: str = 'text/html; charset=utf-8',
+              headers: Optional[Dict] = None):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if self.path == '/__reset':
+            self.state.reset()
+            self._send(200, '{"reset": true}', 'application/json')
+        else:
+            self._send(404, 'not found')
+
+    def do_GET(self):
+        if self.path == '/__stats':
+            self._send(200, json.dumps(self.state.stats()), 'application/json')
+            return
+
+        parsed = urlparse(self.path)
+        source, _, rest = parsed.path.lstrip('/').partition('/')
+        if source not in SOURCES:
+            self._send(404, 'unknown source')
+            return
+
+        state = self.state
+        state.count(source, 'requests')
+        if state.capacity is not None:
+            # Begrenzte Kapazität: wartende Anfragen bekommen die Latenz der vorherigen dazu
+            with state.capacity:
+                time.sleep(state.latency[source].sample())
+        else:
+            time.sleep(state.latency[source].sample())
+
+        if state.over_rate_limit() or random.random() < state.throttle_rate:
+            state.count(source, 'throttled')
+            self._send(429, 'Too Many Requests', headers={'Retry-After': '1'})
+            return
+
+        if random.random() < state.error_rate:
+            state.count(source, 'errors')
+            self._send(random.choice((500, 502, 503)), 'Upstream error')
+            return
+
+        body = self._replay(source, '/' + rest, parsed.query)
+        if body is None:
+            self._send(404, 'not found')
+            return
+        self._send(200, body)
+
+    def _replay(self, source: str, path: str, query: str) -> Optional[str]:
+        state = self.state
+        if state.recordings:
+            recorded = recording_path(state.recordings, source, path + ('?' + query if query else ''))
+            if os.path.exists(recorded):
+                state.count(source, 'replayed')
+                with open(recorded, 'r', encoding='utf-8') as f:
+                    return f.read()
+
+        if source == 'bibleserver':
+            return render_bibleserver(path, state.verses, state.padding)
+        if source == 'bigs':
+            return render_bigs(query, state.verses, state.padding)
+        return render_losungen(state.padding)
+
+
+def record(recordings: str, urls):
+    """Echte Seiten herunterladen und für den Abspielmodus ablegen"""
+    import requests
+
+    for url in urls:
+        parsed = urlparse(url)
+        source = SOURCE_HOSTS.get(parsed.netloc)
+        if not source:
+            print(f"skip {url}: unknown host", file=sys.stderr)
+            continue
+
+        path = parsed.path
+        if source == 'bigs':
+            path = '/'
+        elif source == 'losungen':
+            path = '/'
+        target = recording_path(recordings, source, path + ('?' + parsed.query if parsed.query else ''))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+
+        response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0 (compatible; LosungenAPI/1.0)'}, timeout=15)
+        with open(target, 'w', encoding='utf-8') as f:
+            f.write(response.text)
+        print(f"{response.status_code} {url} -> {target}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokaler Stand-in für die Upstream-Quellen der Scraper")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    serve = sub.add_parser('serve', help="Stand-in-Server starten")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8780)
+    serve.add_argument('--recordings', help="Verzeichnis mit aufgezeichneten Seiten")
+    serve.add_argument('--latency', action='append', help="[quelle=]SPEC, mehrfach möglich")
+    serve.add_argument('--error-rate', type=float, default=0.0, help="Anteil 5xx-Antworten (0-1)")
+    serve.add_argument('--throttle-rate', type=float, default=0.0, help="Anteil zufälliger 429-Antworten (0-1)")
+    serve.add_argument('--rate-limit', type=int, default=0, help="Anfragen pro Sekunde, darüber 429 (0 = aus)")
+    serve.add_argument('--capacity', type=int, default=0, help="Gleichzeitig bediente Anfragen (0 = unbegrenzt)")
+    serve.add_argument('--verses', type=int, default=DEFAULT_VERSES_PER_CHAPTER, help="Verse pro erzeugtem Kapitel")
+    serve.add_argument('--padding-kb', type=int, default=PADDING_KB, help="Füllmaterial pro Seite in KB")
+
+    rec = sub.add_parser('record', help="Echte Seiten aufzeichnen")
+    rec.add_argument('--recordings', required=True)
+    rec.add_argument('urls', nargs='+')
+
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        record(args.recordings, args.urls)
+        return
+
+    FakeUpstreamHandler.state = UpstreamState(args)
+    server = ThreadingHTTPServer((args.host, args.port), FakeUpstreamHandler)
+    server.daemon_threads = True
+
+    base = f"http://{args.host}:{args.port}"
+    print(f"export SCRAPER_BIBLESERVER_URL={base}/bibleserver")
+    print(f"export SCRAPER_BIGS_URL={base}/bigs/")
+    print(f"export SCRAPER_LOSUNGEN_URL={base}/losungen/")
+    sys.stdout.flush()
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+#!/opt/venv/bin/python3
+"""
+Kirchenjahr-Generator für die Tabelle church_events
+Berechnet den evangelischen Kalender (Perikopenordnung 2018) für beliebige Kirchenjahre aus
+Osterdatum (gregorianische Osterformel) und 1. Advent: Feste, Sonntage nach Epiphanias und
+Trinitatis, Perikopenreihe und Predigttext. Farbe, Festzeit, Lesungen und Lieder kommen aus der
+statischen Proprium-Tabelle sql/kirchenjahr_proprium.json.
+
+Ein Kirchenjahr wird über das Jahr seines 1. Advents angegeben (2026 = Advent 2026 bis
+Ewigkeitssonntag 2027). copy nutzt denselben Writer wie import_church_events.py. upsert
+gleicht über (event_date, summary) ab statt über die uid, denn importierte Tage tragen
+ICS-UIDs (NNNN@liturgischerkalender): vorhandene Tage werden aktualisiert (uid bleibt),
+fehlende eingefügt.
+
+Verwendung:
+    python3 generate_church_year.py [--from-year 2026] [--to-year 2076] [--mode copy|upsert]
+    python3 generate_church_year.py --from 2026-11-29 --to 2027-11-27
+    python3 generate_church_year.py extract [datei.ics]     # Proprium aus einer ICS-Datei auffrischen
+
+Beispiel (50 Kirchenjahre direkt in die Datenbank):
+    python3 scripts/generate_church_year.py --from-year 2026 --to-year 2075 --mode copy \\
+        | psql -U losungen_user losungen_db
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import unicodedata
+from datetime import date, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+from import_church_events import (COLUMNS, DEFAULT_ICS, DEFAULT_INDEX, PERIKOPEN_REIHEN,  # noqa: E402
+                                  iter_rows, load_index, sql_literal, write_copy)
+
+DEFAULT_PROPRIUM = os.path.join(BASE_DIR, '..', 'sql', 'kirchenjahr_proprium.json')
+
+UID_SUFFIX = '@kirchenjahr-generiert'
+
+# Reihe I begann mit dem Kirchenjahr 2018/19 (wie getCurrentPerikopenreihe() in sunday.php)
+REIHE_START_YEAR = 2018
+
+# Feste Feiertage im Kirchenjahr: (Monat, Tag, Bezeichnung); Dezember gehört zum Advents-Jahr
+FIXED_FEASTS = [
+    (12, 6, 'Nikolaustag'),
+    (12, 24, 'Christvesper'),
+    (12, 24, 'Christnacht'),
+    (12, 25, 'Christfest I'),
+    (12, 26, 'Christfest II'),
+    (12, 31, 'Altjahresabend'),
+    (1, 1, 'Neujahrstag'),
+    (1, 6, 'Epiphanias (Erscheinungsfest)'),
+    (6, 24, 'Tag der Geburt Johannes des Täufers (Johannis)'),
+    (9, 29, 'Michaelistag'),
+    (10, 31, 'Reformationsfest'),
+    (11, 11, 'Martinstag'),
+]
+
+# Abstand zum Ostersonntag in Tagen
+EASTER_OFFSETS = [
+    (-56, 'Sexagesimä'),
+    (-49, 'Estomihi'),
+    (-46, 'Aschermittwoch'),
+    (-42, 'Invocavit'),
+    (-35, 'Reminiszere'),
+    (-28, 'Okuli'),
+    (-21, 'Lätare'),
+    (-14, 'Judika'),
+    (-7, 'Palmarum / Palmsonntag'),
+    (-3, 'Gründonnerstag'),
+    (-2, 'Karfreitag'),
+    (-1, 'Karsamstag'),
+    (-1, 'Osternacht'),
+    (0, 'Ostersonntag'),
+    (1, 'Ostermontag'),
+    (7, 'Quasimodogeniti'),
+    (14, 'Misericordias Domini'),
+    (21, 'Jubilate'),
+    (28, 'Kantate'),
+    (35, 'Rogate'),
+    (39, 'Christi Himmelfahrt'),
+    (42, 'Exaudi'),
+    (49, 'Pfingstsonntag'),
+    (50, 'Pfingstmontag'),
+    (56, 'Trinitatis'),
+]
+
+# Abstand zum 1. Advent des folgenden Kirchenjahres
+END_OFFSETS = [
+    (-21, 'Drittl.S.d.Kj.'),
+    (-14, 'Vorletzter Sonntag d. Kj.'),
+    (-11, 'Buß-und Bettag'),
+    (-7, 'Totensonntag'),
+    (-7, 'Ewigkeitssonntag'),
+]
+
+# Nur selten vorkommende Sonntage ohne eigenes Proprium: Farbe und Festzeit vom Nachbarsonntag
+PROPRIUM_FALLBACKS = {
+    '5. So. v. d. Passionszeit': '4. So. v. d. Passionszeit',
+    '24. So. n. Trinitatis': '23. So. n. Trinitatis',
+}
+
+PROPRIUM_FIELDS = [
+    'liturgical_color', 'season', 'weekly_verse', 'weekly_verse_reference', 'psalm',
+    'old_testament_reading', 'epistle', 'gospel', 'hymn_1', 'hymn_2', 'perikopen',
+    'hymn1_eg', 'hymn2_eg', 'psalm_eg'
+]
+
+SLUG_PATTERN = re.compile(r'[^a-z0-9]+')
+
+
+def easter(year: int) -> date:
+    """Ostersonntag nach der gregorianischen Osterformel (Meeus/Jones/Butcher)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7  # noqa: E741
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def sunday_on_or_before(day: date) -> date:
+    return day - timedelta(days=(day.weekday() + 1) % 7)
+
+
+def first_advent(year: int) -> date:
+    """1. Advent: vier Sonntage vor dem 4. Advent (Sonntag zwischen 18. und 24.12.)"""
+    return sunday_on_or_before(date(year, 12, 24)) - timedelta(days=21)
+
+
+def perikopen_reihe(advent_year: int) -> str:
+    return PERIKOPEN_REIHEN[(advent_year - REIHE_START_YEAR) % len(PERIKOPEN_REIHEN)]
+
+
+def church_year_days(advent_year: int) -> List[Tuple[date, str]]:
+    """Alle Sonn- und Feiertage eines Kirchenjahres als (Datum, Bezeichnung), nach Datum sortiert"""
+    year = advent_year + 1
+    advent = first_advent(advent_year)
+    next_advent = first_advent(year)
+    easter_day = easter(year)
+    days: List[Tuple[date, str]] = []
+
+    for week in range(4):
+        days.append((advent + timedelta(weeks=week), f"{week + 1}. Advent"))
+
+    # Sonntage nach Christfest: 27.12.-2.1. und ggf. ein zweiter bis 5.1.
+    first_christmas_sunday = sunday_on_or_before(date(year, 1, 2))
+    days.append((first_christmas_sunday, '1. So. n. Christfest'))
+    second_christmas_sunday = sunday_on_or_before(date(year, 1, 5))
+    if second_christmas_sunday != first_christmas_sunday:
+        days.append((second_christmas_sunday, '2. So. nach Christfest'))
+
+    # Epiphaniaszeit bis zum letzten Sonntag nach Epiphanias, danach Vorpassionszeit ab Septuagesimä
+    septuagesimae = easter_day - timedelta(days=63)
+    candlemas_sunday = sunday_on_or_before(date(year, 2, 2))
+    if septuagesimae > candlemas_sunday:
+        last_epiphany = candlemas_sunday
+        # Zwischen letztem So. n. Epiphanias und Septuagesimä liegen höchstens zwei Sonntage
+        for weeks, name in ((1, '4. So. v. d. Passionszeit'), (2, '5. So. v. d. Passionszeit')):
+            sunday = septuagesimae - timedelta(weeks=weeks)
+            if sunday > last_epiphany:
+                days.append((sunday, name))
+        days.append((septuagesimae, 'Septuagesimä'))
+    elif septuagesimae == candlemas_sunday:
+        last_epiphany = candlemas_sunday
+    else:
+        last_epiphany = septuagesimae - timedelta(weeks=1)
+        days.append((septuagesimae, 'Septuagesimä'))
+
+    sunday = sunday_on_or_before(date(year, 1, 6)) + timedelta(weeks=1)
+    number = 1
+    while sunday < last_epiphany:
+        days.append((sunday, f"{number}. So. nach Epiphanias"))
+        sunday += timedelta(weeks=1)
+        number += 1
+    days.append((last_epiphany, 'letzter So. nach Epiphanias'))
+
+    for offset, name in EASTER_OFFSETS:
+        days.append((easter_day + timedelta(days=offset), name))
+
+    # Sonntage nach Trinitatis bis vor den drittletzten Sonntag; Erntedank ersetzt den ersten Sonntag im Oktober
+    thanksgiving = sunday_on_or_before(date(year, 10, 7))
+    end_of_year = next_advent - timedelta(days=21)
+    sunday = easter_day + timedelta(days=63)
+    number = 1
+    while sunday < end_of_year:
+        days.append((sunday, 'Erntedank' if sunday == thanksgiving else f"{number}. So. n. Trinitatis"))
+        sunday += timedelta(weeks=1)
+        number += 1
+
+    for offset, name in END_OFFSETS:
+        days.append((next_advent + timedelta(days=offset), name))
+
+    # Feste Feiertage zuletzt, damit ein Sonntag am selben Tag vorne steht (sunday.php nimmt den ersten Eintrag)
+    for month, day, name in FIXED_FEASTS:
+        days.append((date(advent_year if month == 12 else year, month, day), name))
+
+    # sorted() ist stabil: gleiche Tage behalten die Reihenfolge oben (z.B. Totensonntag vor Ewigkeitssonntag)
+    return sorted(days, key=lambda item: item[0])
+
+
+def slugify(name: str) -> str:
+    ascii_name = unicodedata.normalize('NFKD', name.lower()).encode('ascii', 'ignore').decode('ascii')
+    return SLUG_PATTERN.sub('-', ascii_name).strip('-')
+
+
+def load_proprium(path: str) -> Dict[str, Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['propria']
+
+
+def build_row(day: date, name: str, reihe: str, propria: Dict[str, Dict], missing: set) -> Dict:
+    row = {column: None for column in COLUMNS}
+    row['uid'] = f"{day.isoformat()}-{slugify(name)}{UID_SUFFIX}"
+    row['summary'] = name
+    row['event_date'] = day.isoformat()
+
+    proprium = propria.get(name)
+    if proprium is None:
+        missing.add(name)
+        template = propria.get(PROPRIUM_FALLBACKS.get(name, ''), {})
+        row['liturgical_color'] = template.get('liturgical_color')
+        row['season'] = template.get('season')
+        return row
+
+    for field in PROPRIUM_FIELDS:
+        row[field] = proprium.get(field)
+    perikopen = proprium.get('perikopen') or {}
+    if perikopen:
+        row['perikopen'] = json.dumps(perikopen, ensure_ascii=False)
+    row['sermon_text'] = perikopen.get(reihe)
+    return row
+
+
+def generate(from_year: int, to_year: int, propria: Dict[str, Dict], missing: set,
+             date_from: Optional[str] = None, date_to: Optional[str] = None) -> Iterator[Dict]:
+    for advent_year in range(from_year, to_year + 1):
+        reihe = perikopen_reihe(advent_year)
+        for day, name in church_year_days(advent_year):
+            event_date = day.isoformat()
+            if date_from and event_date < date_from:
+                continue
+            if date_to and event_date > date_to:
+                continue
+            yield build_row(day, name, reihe, propria, missing)
+
+
+def write_upsert(rows: Iterable[Dict], out: TextIO, batch_size: int = 500) -> int:
+    """Upsert über (event_date, summary): Zeilen in eine Temp-Tabelle, dann UPDATE und INSERT der fehlenden"""
+    columns = ', '.join(COLUMNS)
+    # Was der Generator nicht kennt (z.B. url), bleibt aus dem Import erhalten
+    updates = ', '.join(f"{column} = COALESCE(g.{column}, e.{column})" for column in COLUMNS if column != 'uid')
+    header = f"INSERT INTO generated_events ({columns}) VALUES\n"
+
+    batch: List[str] = []
+    count = 0
+
+    def flush():
+        if batch:
+            out.write(header + ',\n'.join(batch) + ";\n")
+            batch.clear()
+
+    out.write("BEGIN;\n")
+    out.write(f"CREATE TEMP TABLE generated_events ON COMMIT DROP AS SELECT {columns} FROM church_events WITH NO DATA;\n")
+    for row in rows:
+        batch.append('(' + ', '.join(sql_literal(row[column]) for column in COLUMNS) + ')')
+        count += 1
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    out.write(f"UPDATE church_events e SET {updates}, updated_at = CURRENT_TIMESTAMP\n"
+              "FROM generated_events g WHERE e.event_date = g.event_date AND e.summary = g.summary;\n")
+    out.write(f"INSERT INTO church_events ({columns})\n"
+              f"SELECT {columns} FROM generated_events g WHERE NOT EXISTS (\n"
+              "    SELECT 1 FROM church_events e WHERE e.event_date = g.event_date AND e.summary = g.summary);\n")
+    out.write("COMMIT;\n")
+    return count
+
+
+def advent_year_of(day: date) -> int:
+    return day.year if day >= first_advent(day.year) else day.year - 1
+
+
+def extract(ics_path: str, index_path: str, proprium_path: str):
+    """Proprium-Tabelle aus einer Kirchenjahr-ICS-Datei auffrischen (neuere Einträge gewinnen)"""
+    try:
+        with open(proprium_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = {'propria': {}}
+
+    propria = data['propria']
+    index = load_index(index_path)
+    stream = sys.stdin if ics_path == '-' else open(ics_path, 'r', encoding='utf-8', newline='')
+    updated = 0
+    with stream:
+        for row in iter_rows(stream, index):
+            entry = {field: row[field] for field in PROPRIUM_FIELDS}
+            entry['perikopen'] = json.loads(row['perikopen']) if row['perikopen'] else None
+            propria[row['summary']] = entry
+            updated += 1
+
+    with open(proprium_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+    print(f"-- {updated} Propria aus {ics_path} übernommen ({len(propria)} insgesamt)", file=sys.stderr)
+
+
+def _valid_date(value: str) -> str:
+    date.fromisoformat(value)
+    return value
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'extract':
+        parser = argparse.ArgumentParser(prog='generate_church_year.py extract',
+                                         description="Proprium-Tabelle aus einer Kirchenjahr-ICS-Datei auffrischen")
+        parser.add_argument('ics', nargs='?', default=DEFAULT_ICS, help="ICS-Datei (Standard: Frontend-Kalender)")
+        parser.add_argument('--index', default=DEFAULT_INDEX, help="Gesangbuch-Index (JSON) für EG-Nummern")
+        parser.add_argument('--proprium', default=DEFAULT_PROPRIUM)
+        args = parser.parse_args(sys.argv[2:])
+        extract(args.ics, args.index, args.proprium)
+        return
+
+    this_year = advent_year_of(date.today())
+    parser = argparse.ArgumentParser(description="Erzeugt church_events-SQL für beliebige Kirchenjahre")
+    parser.add_argument('--from-year', type=int, help="Erstes Kirchenjahr (Jahr des 1. Advents)")
+    parser.add_argument('--to-year', type=int, help="Letztes Kirchenjahr (Jahr des 1. Advents)")
+    parser.add_argument('--from', dest='date_from', type=_valid_date, help="Erstes Datum (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='date_to', type=_valid_date, help="Letztes Datum (YYYY-MM-DD)")
+    parser.add_argument('--mode', choices=('upsert', 'copy'), default='copy',
+                        help="copy: DELETE + COPY für das Fenster (Standard), "
+                             "upsert: über (Datum, Bezeichnung) aktualisieren bzw. einfügen")
+    parser.add_argument('--batch-size', type=int, default=500, help="Zeilen pro INSERT im Upsert-Modus")
+    parser.add_argument('--proprium', default=DEFAULT_PROPRIUM, help="Proprium-Tabelle (JSON)")
+    args = parser.parse_args()
+
+    if args.date_from or args.date_to:
+        from_year = advent_year_of(date.fromisoformat(args.date_from)) if args.date_from else this_year
+        to_year = advent_year_of(date.fromisoformat(args.date_to)) if args.date_to else from_year
+        date_from, date_to = args.date_from, args.date_to
+    else:
+        from_year = args.from_year if args.from_year is not None else this_year
+        to_year = args.to_year if args.to_year is not None else from_year
+        date_from = first_advent(from_year).isoformat()
+        date_to = (first_advent(to_year + 1) - timedelta(days=1)).isoformat()
+    if to_year < from_year:
+        parser.error("--to-year liegt vor --from-year")
+
+    propria = load_proprium(args.proprium)
+    missing: set = set()
+    rows = generate(from_year, to_year, propria, missing, date_from, date_to)
+    if args.mode == 'copy':
+        count = write_copy(rows, sys.stdout, date_from, date_to)
+    else:
+        count = write_upsert(rows, sys.stdout, args.batch_size)
+
+    for name in sorted(missing):
+        print(f"-- Warnung: kein Proprium für '{name}', nur Farbe/Festzeit gesetzt", file=sys.stderr)
+    print(f"-- {count} church_events für die Kirchenjahre {from_year}/{from_year + 1} "
+          f"bis {to_year}/{to_year + 1} erzeugt", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/opt/venv/bin/python3
+"""
+ICS-Import für die Tabelle church_events
+Liest eine Kirchenjahr-ICS-Datei (kirchenjahr-evangelisch.de) Event für Event und
+erzeugt COPY- oder Upsert-SQL inklusive Perikopen und EG-Nummern.
+
+Verwendung:
+    python3 import_church_events.py [datei.ics] [--from YYYY-MM-DD] [--to YYYY-MM-DD]
+                                    [--mode upsert|copy] [--batch-size N] [--index datei.json]
+
+Beispiel (neues Kirchenjahr direkt in die Datenbank):
+    python3 scripts/import_church_events.py kirchenjahr.ics --from 2026-11-29 --to 2027-11-27 \\
+        | psql -U losungen_user losungen_db
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ICS = os.path.join(BASE_DIR, '..', 'frontend', 'public', 'kirchenjahr-evangelisch-all.ics')
+DEFAULT_INDEX = os.path.join(BASE_DIR, '..', 'sql', 'gesangbuch_index.json')
+
+# Spalten in der Reihenfolge der bisherigen SQL-Dateien (sql/2025-2026.sql)
+COLUMNS = [
+    'uid', 'summary', 'event_date', 'url', 'liturgical_color', 'season',
+    'weekly_verse', 'weekly_verse_reference', 'psalm', 'old_testament_reading',
+    'epistle', 'gospel', 'sermon_text', 'hymn_1', 'hymn_2', 'perikopen',
+    'hymn1_eg', 'hymn2_eg', 'psalm_eg'
+]
+
+# Felder aus der DESCRIPTION ("Schlüssel: Wert" pro Zeile)
+DESCRIPTION_FIELDS = {
+    'liturgische Farbe': 'liturgical_color',
+    'Festzeit': 'season',
+    'Wochenpsalm': 'psalm',
+    'AT-Lesung': 'old_testament_reading',
+    'Epistel': 'epistle',
+    'Evangelium': 'gospel',
+    'Predigttext': 'sermon_text',
+}
+
+PERIKOPEN_REIHEN = ('I', 'II', 'III', 'IV', 'V', 'VI')
+
+ICS_UNESCAPE = re.compile(r'\\([\\;,nN])')
+
+
+def _unescape(value: str) -> str:
+    return ICS_UNESCAPE.sub(lambda m: '\n' if m.group(1) in 'nN' else m.group(1), value)
+
+
+def unfold_lines(stream: TextIO) -> Iterator[str]:
+    """Entfaltet ICS-Zeilen (RFC 5545: Fortsetzungszeilen beginnen mit Leerzeichen/Tab)"""
+    current = None
+    for raw in stream:
+        line = raw.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def iter_events(stream: TextIO) -> Iterator[Dict[str, str]]:
+    """Liefert die VEVENTs einzeln als {Property: Wert}, ohne die Datei komplett zu laden"""
+    event = None
+    for line in unfold_lines(stream):
+        if line == 'BEGIN:VEVENT':
+            event = {}
+        elif line == 'END:VEVENT':
+            if event is not None:
+                yield event
+            event = None
+        elif event is not None and ':' in line:
+            name, value = line.split(':', 1)
+            # Parameter wie DTSTART;VALUE=DATE abtrennen
+            event[name.split(';', 1)[0].upper()] = value
+
+
+def split_weekly_verse(value: str):
+    """'Text (Ref)' in Text und Referenz zerlegen, Klammern in der Referenz bleiben erhalten"""
+    value = value.strip()
+    if not value.endswith(')'):
+        return value or None, None
+
+    depth = 0
+    for index in range(len(value) - 1, -1, -1):
+        if value[index] == ')':
+            depth += 1
+        elif value[index] == '(':
+            depth -= 1
+            if depth == 0:
+                return value[:index].strip() or None, value[index + 1:-1].strip() or None
+    return value, None
+
+
+def map_event(event: Dict[str, str], index: Dict) -> Optional[Dict]:
+    """ICS-Event auf eine church_events-Zeile abbilden"""
+    dtstart = event.get('DTSTART', '')
+    if not re.match(r'^\d{8}', dtstart):
+        return None
+
+    row = {column: None for column in COLUMNS}
+    row['uid'] = event.get('UID')
+    row['summary'] = _unescape(event.get('SUMMARY', '')).strip()
+    row['event_date'] = f"{dtstart[0:4]}-{dtstart[4:6]}-{dtstart[6:8]}"
+    row['url'] = event.get('URL')
+
+    perikopen = {}
+    for line in _unescape(event.get('DESCRIPTION', '')).split('\n'):
+        if ':' not in line:
+            continue
+        key, value = line.split(':', 1)
+        key, value = key.strip(), value.strip()
+        if not value:
+            continue
+
+        if key in DESCRIPTION_FIELDS:
+            row[DESCRIPTION_FIELDS[key]] = value
+        elif key == 'Wochenspruch':
+            row['weekly_verse'], row['weekly_verse_reference'] = split_weekly_verse(value)
+        elif key == 'Wochenlied':
+            hymns = [h.strip() for h in value.split(' / ')]
+            row['hymn_1'] = hymns[0] or None
+            row['hymn_2'] = hymns[1] if len(hymns) > 1 and hymns[1] else None
+        elif key in PERIKOPEN_REIHEN:
+            perikopen[key] = value
+
+    if perikopen:
+        row['perikopen'] = json.dumps(perikopen, ensure_ascii=False)
+
+    # Anreicherung mit EG-Nummern aus dem Gesangbuch-Index
+    hymns_index = index.get('hymns', {})
+    psalms_index = index.get('psalms', {})
+    row['hymn1_eg'] = hymns_index.get(row['hymn_1']) if row['hymn_1'] else None
+    row['hymn2_eg'] = hymns_index.get(row['hymn_2']) if row['hymn_2'] else None
+    row['psalm_eg'] = psalms_index.get(row['psalm']) if row['psalm'] else None
+
+    if not row['uid'] or not row['summary']:
+        return None
+    return row
+
+
+def iter_rows(stream: TextIO, index: Dict, date_from: Optional[str] = None,
+              date_to: Optional[str] = None) -> Iterator[Dict]:
+    for event in iter_events(stream):
+        row = map_event(event, index)
+        if row is None:
+            continue
+        if date_from and row['event_date'] < date_from:
+            continue
+        if date_to and row['event_date'] > date_to:
+            continue
+        yield row
+
+
+def sql_literal(value) -> str:
+    if value is None:
+        return 'NULL'
+    if isinstance(value, int):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def copy_literal(value) -> str:
+    if value is None:
+        return '\\N'
+    text = str(value)
+    return (text.replace('\\', '\\\\').replace('\t', '\\t')
+                .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def _delete_window(date_from: Optional[str], date_to: Optional[str]) -> Optional[str]:
+    conditions = []
+    if date_from:
+        conditions.append(f"event_date >= {sql_literal(date_from)}")
+    if date_to:
+        conditions.append(f"event_date <= {sql_literal(date_to)}")
+    if not conditions:
+        return None
+    return "DELETE FROM church_events WHERE " + " AND ".join(conditions) + ";"
+
+
+def write_copy(rows: Iterable[Dict], out: TextIO, date_from: Optional[str], date_to: Optional[str]) -> int:
+    """COPY-Format: schnellster Bulk-Load, ersetzt das Datumsfenster komplett"""
+    out.write("BEGIN;\n")
+    delete = _delete_window(date_from, date_to)
+    if delete:
+        out.write(delete + "\n")
+    out.write(f"COPY church_events ({', '.join(COLUMNS)}) FROM stdin;\n")
+    count = 0
+    for row in rows:
+        out.write('\t'.join(copy_literal(row[column]) for column in COLUMNS) + '\n')
+        count += 1
+    out.write("\\.\n")
+    out.write("COMMIT;\n")
+    return count
+
+
+def write_upsert(rows: Iterable[Dict], out: TextIO, batch_size: int = 500) -> int:
+    """Gebündelte INSERT ... ON CONFLICT (uid) DO UPDATE, idempotent wiederholbar"""
+    updates = ', '.join(f"{column} = EXCLUDED.{column}" for column in COLUMNS if column != 'uid')
+    header = f"INSERT INTO church_events ({', '.join(COLUMNS)}) VALUES\n"
+    footer = f"\nON CONFLICT (uid) DO UPDATE SET {updates}, updated_at = CURRENT_TIMESTAMP;\n"
+
+    batch: List[str] = []
+    count = 0
+
+    def flush():
+        if batch:
+            out.write(header + ',\n'.join(batch) + footer)
+            batch.clear()
+
+    out.write("BEGIN;\n")
+    for row in rows:
+        batch.append('(' + ', '.join(sql_literal(row[column]) for column in COLUMNS) + ')')
+        count += 1
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    out.write("COMMIT;\n")
+    return count
+
+
+def load_index(path: str) -> Dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        print(f"-- Warnung: Gesangbuch-Index {path} nicht lesbar, EG-Nummern bleiben leer", file=sys.stderr)
+        return {}
+
+
+def _valid_date(value: str) -> str:
+    date.fromisoformat(value)
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Erzeugt church_events-SQL aus einer Kirchenjahr-ICS-Datei")
+    parser.add_argument('ics', nargs='?', default=DEFAULT_ICS, help="ICS-Datei (Standard: Frontend-Kalender, '-' für stdin)")
+    parser.add_argument('--from', dest='date_from', type=_valid_date, help="Erstes Datum (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='date_to', type=_valid_date, help="Letztes Datum (YYYY-MM-DD)")
+    parser.add_argument('--mode', choices=('upsert', 'copy'), default='upsert',
+                        help="upsert: INSERT ... ON CONFLICT (Standard), copy: DELETE + COPY für das Fenster")
+    parser.add_argument('--batch-size', type=int, default=500, help="Zeilen pro INSERT im Upsert-Modus")
+    parser.add_argument('--index', default=DEFAULT_INDEX, help="Gesangbuch-Index (JSON) für EG-Nummern")
+    args = parser.parse_args()
+
+    index = load_index(args.index)
+    stream = sys.stdin if args.ics == '-' else open(args.ics, 'r', encoding='utf-8', newline='')
+
+    with stream:
+        rows = iter_rows(stream, index, args.date_from, args.date_to)
+        if args.mode == 'copy':
+            count = write_copy(rows, sys.stdout, args.date_from, args.date_to)
+        else:
+            count = write_upsert(rows, sys.stdout, args.batch_size)
+
+    print(f"-- {count} church_events exportiert", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
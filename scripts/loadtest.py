@@ -0,0 +1,212 @@
+#!/opt/venv/bin/python3
+"""
+Lasttest-Treiber für die Scraper
+Führt N Bibelstellen-Abfragen mit C parallelen Aufrufern aus und berichtet
+Durchsatz, p50/p95/p99-Latenz und die Zahl der Upstream-Anfragen.
+
+Verwendung (mit laufendem scripts/fake_upstream.py):
+    eval "$(python3 fake_upstream.py serve --latency lognormal:150,0.6 & sleep 1)"
+    python3 loadtest.py -n 200 -c 20 --translation LUT --upstream http://127.0.0.1:8780
+
+Modi:
+    process  jede Abfrage startet bible_scraper.py bzw. scraper.py wie PHP (Standard)
+    thread   BibleScraper im selben Prozess, Threads als Aufrufer
+
+Mit --background N laufen während des Tests N parallele Warm-up-Aufrufer
+(bible_scraper.py --priority background über wechselnde Kapitel), wie daily_fetch.php
+zur selben Zeit wie Nutzeranfragen. --background-priority interactive zeigt zum
+Vergleich das Verhalten ohne Vorrang.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.request import Request, urlopen
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Im Repository liegen die Scraper unter api/, im Container direkt in /var/www/html
+API_DIR = next((d for d in (os.path.join(BASE_DIR, '..', 'api'), os.path.join(BASE_DIR, '..'))
+                if os.path.exists(os.path.join(d, 'bible_scraper.py'))), os.path.join(BASE_DIR, '..', 'api'))
+
+DEFAULT_REFERENCES = [
+    'Johannes 3,16', 'Psalm 23,1-6', 'Römer 8,28', '1. Korinther 13,4-8', 'Jesaja 40,31',
+    'Matthäus 5,3-12', 'Psalm 103,11', 'Römer 5,20-21', 'Lukas 2,1-14', 'Jeremia 29,11',
+]
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def upstream_call(base: Optional[str], path: str, method: str = 'GET') -> Optional[Dict]:
+    if not base:
+        return None
+    try:
+        request = Request(base.rstrip('/') + path, method=method, data=b'' if method == 'POST' else None)
+        with urlopen(request, timeout=5) as response:
+            return json.loads(response.read().decode('utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def run_process(target: str, reference: str, translation: str) -> bool:
+    if target == 'losung':
+        command = [sys.executable, os.path.join(API_DIR, 'scraper.py'), translation]
+    else:
+        command = [sys.executable, os.path.join(API_DIR, 'bible_scraper.py'), reference, translation]
+    completed = subprocess.run(command, capture_output=True, text=True, timeout=120)
+    try:
+        return 'error' not in json.loads(completed.stdout)
+    except ValueError:
+        return False
+
+
+def run_background(stop: threading.Event, translation: str, priority: str, counter: Dict[str, int]):
+    """Warm-up-Last: fortlaufend neue Kapitel, damit weder Cache noch Single-Flight greifen"""
+    chapter = 1000 + threading.get_ident() % 1000 * 1000
+    while not stop.is_set():
+        chapter += 1
+        command = [sys.executable, os.path.join(API_DIR, 'bible_scraper.py'), f"Psalm {chapter},1",
+                   translation, '--priority', priority]
+        completed = subprocess.run(command, capture_output=True, text=True, timeout=120)
+        counter['done' if '"error"' not in completed.stdout else 'failed'] += 1
+
+
+def make_thread_runner(target: str):
+    sys.path.insert(0, API_DIR)
+    if target == 'losung':
+        import scraper
+
+        def run(reference: str, translation: str) -> bool:
+            result = scraper.extract_losungen_data()
+            return bool(result) and 'error' not in result
+        return run
+
+    from bible_scraper import BibleScraper
+    bible_scraper = BibleScraper()
+
+    def run(reference: str, translation: str) -> bool:
+        parsed = bible_scraper.parse_reference(reference)
+        if not parsed:
+            return False
+        if translation == 'BIGS':
+            return bible_scraper.scrape_bigs(parsed) is not None
+        return bible_scraper.scrape_bibleserver(parsed, translation) is not None
+    return run
+
+
+def load_references(path: Optional[str]) -> List[str]:
+    if not path:
+        return DEFAULT_REFERENCES
+    references = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('"') or line.startswith('{'):
+                item = json.loads(line)
+                line = item['reference'] if isinstance(item, dict) else item
+            references.append(line)
+    return references
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lasttest für bible_scraper.py / scraper.py")
+    parser.add_argument('-n', '--requests', type=int, default=100, help="Anzahl Abfragen")
+    parser.add_argument('-c', '--concurrency', type=int, default=10, help="Parallele Aufrufer")
+    parser.add_argument('--translation', action='append', help="Übersetzung(en), Standard LUT")
+    parser.add_argument('--references', help="Datei mit Bibelstellen (Zeilen oder NDJSON)")
+    parser.add_argument('--target', choices=('verse', 'losung'), default='verse',
+                        help="verse: bible_scraper.py, losung: scraper.py")
+    parser.add_argument('--mode', choices=('process', 'thread'), default='process')
+    parser.add_argument('--upstream', help="Basis-URL von fake_upstream.py für Anfragezähler")
+    parser.add_argument('--background', type=int, default=0, help="Parallele Warm-up-Aufrufer während des Tests")
+    parser.add_argument('--background-priority', choices=('background', 'interactive'), default='background')
+    args = parser.parse_args()
+
+    references = load_references(args.references)
+    translations = args.translation or ['LUT']
+    jobs = [(references[i % len(references)], translations[i % len(translations)]) for i in range(args.requests)]
+
+    runner = make_thread_runner(args.target) if args.mode == 'thread' else \
+        (lambda reference, translation: run_process(args.target, reference, translation))
+
+    upstream_call(args.upstream, '/__reset', 'POST')
+
+    latencies: List[float] = []
+    failures = 0
+
+    def timed(job):
+        started = time.perf_counter()
+        try:
+            ok = runner(*job)
+        except Exception:
+            ok = False
+        return ok, time.perf_counter() - started
+
+    stop = threading.Event()
+    background = {'done': 0, 'failed': 0}
+    warmers = [threading.Thread(target=run_background, args=(stop, translations[0], args.background_priority, background),
+                                daemon=True) for _ in range(args.background)]
+    for warmer in warmers:
+        warmer.start()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for ok, duration in pool.map(timed, jobs):
+            latencies.append(duration)
+            if not ok:
+                failures += 1
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    for warmer in warmers:
+        warmer.join()
+
+    def ms(value):
+        return round(value * 1000, 1) if value is not None else None
+
+    report = {
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'mode': args.mode,
+        'target': args.target,
+        'failures': failures,
+        'duration_s': round(elapsed, 2),
+        'throughput_rps': round(args.requests / elapsed, 2) if elapsed else None,
+        'latency_ms': {
+            'p50': ms(percentile(latencies, 50)),
+            'p95': ms(percentile(latencies, 95)),
+            'p99': ms(percentile(latencies, 99)),
+            'max': ms(max(latencies) if latencies else None)
+        }
+    }
+
+    if args.background:
+        report['background'] = dict(background, callers=args.background, priority=args.background_priority)
+
+    stats = upstream_call(args.upstream, '/__stats')
+    if stats:
+        report['upstream'] = {
+            'total_requests': stats['total_requests'],
+            'per_request': round(stats['total_requests'] / args.requests, 2),
+            'sources': stats['sources']
+        }
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
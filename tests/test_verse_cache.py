@@ -0,0 +1,32 @@
+r"""
+Schlüssel von verse_cache.py gegen RedisCache::createKey() aus redis_cache.php
+Die erwarteten Werte sind md5() über die Bytes, wie PHP sie nach strtolower(trim()) und
+preg_replace('/\s+/', ' ') sieht: nur A-Z werden kleingeschrieben, "Ö" und NBSP bleiben.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+from verse_cache import cache_key  # noqa: E402
+
+
+class CacheKeyTest(unittest.TestCase):
+    def test_ascii_reference(self):
+        self.assertEqual(cache_key('Johannes 3,16', 'LUT'), 'bible:79bd96c9b45d7a2f4e8199b67d778c26')
+
+    def test_collapses_whitespace(self):
+        self.assertEqual(cache_key(' Johannes \t 3,16\n', 'LUT'), 'bible:79bd96c9b45d7a2f4e8199b67d778c26')
+
+    def test_keeps_uppercase_umlaut(self):
+        # PHP: strtolower("  RÖMER 8,28 ") === "rÖmer 8,28"
+        self.assertEqual(cache_key('  RÖMER 8,28 ', 'LUT'), 'bible:b6ac792fc30ad9d6ddab116c77487d0a')
+
+    def test_keeps_non_breaking_space(self):
+        self.assertEqual(cache_key('JOHANNES 3,16', 'NGÜ'), 'bible:1497e9e3bad4ea29699347de82b5c62a')
+
+
+if __name__ == '__main__':
+    unittest.main()